@@ -1,172 +1,302 @@
 
 import streamlit as st
 import pandas as pd
-import os, sys
+import os, sys, shutil, time, uuid
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.loaders.csv_loader import load_from_csv
-from src.loaders.sql_loader import load_from_sql
-from src.loaders.sqlserver_pytds import load_from_sqlserver_pytds
-from src.loaders.sqlserver_mssqlpy import load_from_sqlserver_mssqlpy
+from src.loaders.cache import QUERY_TTL_SECONDS, cache_key, file_digest, get_default_cache
+from src.loaders.registry import get_source, source_types
 from src.compare.dataframe_compare import compare_dataframes
+from src.compare.duckdb_backend import DUCKDB_AVAILABLE
+from src.compare.diff_sink import FORMATS, PARQUET_AVAILABLE, DiffSink, export_dir, remove_stale_exports
+from src.utils.jobs import get_default_registry
+from src.utils.profiling import Profiler, profile_table
 
 st.set_page_config(page_title='Comparateur de Données', layout='wide')
 st.title('🔍 Comparateur de Données (SQL / CSV)')
-st.caption('Pandas + SQLAlchemy + Streamlit + pytds + mssql-python')
-
-# Init session state defaults
-init_keys = [
-    'A_df','B_df','A_type','B_type',
-    'A_conn','B_conn','A_sql','B_sql','A_as_string','B_as_string',
-    'A_pytds_host','A_pytds_db','A_pytds_user','A_pytds_password','A_pytds_port','A_pytds_sql','A_pytds_as_string',
-    'B_pytds_host','B_pytds_db','B_pytds_user','B_pytds_password','B_pytds_port','B_pytds_sql','B_pytds_as_string',
-    'A_mpy_host','A_mpy_db','A_mpy_user','A_mpy_password','A_mpy_port','A_mpy_sql','A_mpy_as_string',
-    'B_mpy_host','B_mpy_db','B_mpy_user','B_mpy_password','B_mpy_port','B_mpy_sql','B_mpy_as_string',
-]
-for key in init_keys:
+st.caption('Pandas + Streamlit – sources : ' + ', '.join(get_source(name).label for name in source_types()))
+
+# Init session state defaults (the source forms keep their values under '{side}_{type}_{field}')
+for key in ('A_df', 'B_df', 'A_type', 'B_type'):
     if key not in st.session_state:
-        if key.endswith('_as_string'):
-            st.session_state[key] = True
-        elif key.endswith('_port'):
-            st.session_state[key] = 1433
-        else:
-            st.session_state[key] = None
+        st.session_state[key] = None
+# Owner token of this session's background jobs (the job registry is shared by all sessions)
+if 'job_owner' not in st.session_state:
+    st.session_state['job_owner'] = uuid.uuid4().hex
+
+# Page refresh period while a background job (load or comparison) runs
+POLL_SECONDS = 0.5
+
+def _job(name):
+    """Background job whose id is kept in session_state[name], reattached after any rerun."""
+    return get_default_registry().get(st.session_state.get(name), owner=st.session_state['job_owner'])
+
+def _submit(name, work, kind):
+    return get_default_registry().submit(name, work, kind=kind, owner=st.session_state['job_owner'])
+
+def _job_progress(job, what):
+    """Live state of a running job: progress bar and ETA (row counter when the total is unknown), cancel button."""
+    text = f"{what} – {job.stage or 'démarrage'} – {job.rows:,} lignes".replace(',', ' ')
+    if job.rows_per_sec:
+        text += f" – {job.rows_per_sec:,.0f} lignes/s".replace(',', ' ')
+    if job.mb_per_sec:
+        text += f" – {job.mb_per_sec:.1f} Mo/s"
+    if job.eta is not None:
+        text += f" – reste ~{job.eta:.0f}s"
+    if job.fraction is not None:
+        st.progress(job.fraction, text=text)
+    else:
+        st.caption(f"{text} – {job.elapsed:.0f}s écoulées")
+    if job.cancel_requested:
+        st.caption('Annulation demandée…')
+    elif st.button('Annuler', key=f'cancel_{job.id}'):
+        job.cancel()
+        st.rerun()
+
+def _start_load(side_key, label, source, params, target=None, data=None, refresh=False):
+    """Run ``source.load(**params)`` as a background job through the shared on-disk cache
+    (files unless disabled in the sidebar, query results only when enabled there, for
+    QUERY_TTL_SECONDS); ``data`` (uploaded bytes) is hashed in the job for the cache key.
+    ``refresh`` reads the source again. A load still running for this side is cancelled."""
+    previous = _job(f'{side_key}_job')
+    if previous is not None:
+        previous.cancel()
+    query_source = source.query_field is not None
+    use_cache = st.session_state.get('cache_queries', False) if query_source else st.session_state.get('use_cache', True)
+    refresh = refresh or not use_cache
+    ttl = QUERY_TTL_SECONDS if query_source else None
+    profiling = bool(st.session_state.get('profile_stages'))
+    target = target or source.target(params)
+    query = params.get(source.query_field) if source.query_field else None
+    # the cache key leaves out what the target, the query or the content hash already hold, and secrets
+    options = {f.name: params.get(f.name) for f in source.fields
+               if f.kind not in ('file', 'password') and f.name != source.query_field}
+    options.update(source.app_defaults)
+
+    def work(progress):
+        prof = Profiler() if profiling else None
+        content_hash = file_digest(data) if data is not None else None
+        key = cache_key(source.name, target, query=query, content_hash=content_hash, options=options)
+        df, info = get_default_cache().load(key, lambda: source.load(**params, on_progress=progress, profiler=prof),
+                                            refresh=refresh, ttl_seconds=ttl, source_type=source.name)
+        # a cache hit has no stage profile
+        return {'df': df, 'rows': len(df), 'info': info, 'profile': prof.report() if prof else None}
+
+    job = _submit(f'Chargement {label}', work, 'load')
+    st.session_state[f'{side_key}_job'] = job.id
+    st.session_state[f'{side_key}_profile'] = None
+    st.session_state[f'{side_key}_reload'] = dict(source=source, params=params, target=target, data=data)
+
+def _load_status(side_key, label, source):
+    """Progress of the side's load job, its outcome, and the frame in memory."""
+    job = _job(f'{side_key}_job')
+    if job is not None and not job.done:
+        _job_progress(job, job.name)
+        return
+    loaded = False
+    if job is not None and job.state == 'failed':
+        st.error(f"{label}: erreur {source.label} – {job.error}")
+    elif job is not None and job.state == 'cancelled':
+        st.warning(f"{label}: chargement annulé")
+    elif job is not None and job.state == 'done':
+        result = job.result
+        if 'df' in result:  # first rerun after the load: the frame moves to the session
+            st.session_state[f'{side_key}_df'] = result.pop('df')
+            st.session_state[f'{side_key}_profile'] = result['profile']
+            # when a cache hit was read from the source (None: read by this load)
+            info = result['info']
+            st.session_state[f'{side_key}_read_at'] = time.time() - info['age_seconds'] if info['hit'] else None
+        st.success(f"{label}: {result['rows']} lignes chargées{_load_note(result['info'])}")
+        loaded = True
+    df_prev = st.session_state.get(f'{side_key}_df')
+    if isinstance(df_prev, pd.DataFrame):
+        if not loaded:
+            st.info(f"{label}: {len(df_prev)} lignes en mémoire")
+        reload = st.session_state.get(f'{side_key}_reload')
+        if reload is not None and st.button('Rafraîchir depuis la source', key=f'{side_key}_refresh'):
+            _start_load(side_key, label, refresh=True, **reload)
+            st.rerun()
+        st.dataframe(df_prev.head(20))
+
+def _show_profile(title, report):
+    """Per-stage breakdown: table (seconds, rows, rows/s, peak MB and its scope, share) and time chart."""
+    if not report:
+        return
+    table = profile_table(report)
+    st.markdown(f'**{title}**')
+    st.dataframe(table.rename(columns={'stage': 'étape', 'elapsed': 'secondes', 'rows': 'lignes',
+                                       'rows_per_sec': 'lignes/s', 'peak_mb': 'pic mémoire (Mo)',
+                                       'memory': 'mesure mémoire', 'calls': 'appels', 'share': 'part du temps'}))
+    st.bar_chart(table.set_index('stage')['elapsed'])
+
+def _diff_sink(fmt):
+    """Fresh export directory for this run (the previous run's files are removed,
+    as are the exports of other sessions untouched for a day)."""
+    previous = st.session_state.get('diff_dir')
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    remove_stale_exports()
+    st.session_state['diff_dir'] = export_dir()
+    return DiffSink(st.session_state['diff_dir'], fmt)
+
+def _download(files, kind, sample_df=None, sample_name=None):
+    """Serve the complete exported diff file when there is one, else the sample as CSV."""
+    info = files.get(kind)
+    if info:
+        rows = f"{info['rows']:,}".replace(',', ' ')
+        label = f"Télécharger toutes les lignes ({rows}, {info['path'].rsplit('.', 1)[-1]})"
+        with open(info['path'], 'rb') as f:
+            st.download_button(label, f, file_name=os.path.basename(info['path']), key=f'download_{kind}')
+    elif sample_df is not None:
+        st.download_button('Télécharger (CSV)', sample_df.to_csv(index=False).encode('utf-8'), file_name=sample_name)
+
+def _column_tolerances(text):
+    """'montant=0.01, taux=0;1e-6' -> {'montant': (0.01, 0.0), 'taux': (0.0, 1e-06)}"""
+    out = {}
+    for item in filter(None, (p.strip() for p in (text or '').split(','))):
+        name, sep, value = item.partition('=')
+        try:
+            parts = [float(v) for v in value.split(';')] if sep else []
+            if not name.strip() or not 1 <= len(parts) <= 2:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Tolérance de colonne invalide: '{item}' (attendu: colonne=abs ou colonne=abs;rel)")
+        out[name.strip()] = (parts[0], parts[1] if len(parts) > 1 else 0.0)
+    return out
+
+def _show_results(res, files, keys):
+    """Results of a finished comparison (metrics, samples, downloads of the complete diff)."""
+    st.success('Comparaison terminée')
+    m1, m2, m3 = st.columns(3)
+    with m1:
+        st.metric('Lignes A', res['left_count'])
+    with m2:
+        st.metric('Lignes B', res['right_count'])
+    with m3:
+        st.metric('Volumétrie identique', '✅' if res['row_count_equal'] else '❌')
+    st.metric('Colonnes identiques', '✅' if res['columns_equal'] else '❌')
+    st.metric('Données identiques', '✅' if res['data_equal'] else '❌')
+    precheck = res.get('precheck') or {}
+    if precheck.get('differing_columns'):
+        st.caption('Colonnes dont les empreintes diffèrent : ' + ', '.join(map(str, precheck['differing_columns'])))
+    if res['differences'].get('matched_within_tolerance'):
+        st.caption(f"{res['differences']['matched_within_tolerance']} lignes appariées dans la tolérance numérique")
+    if 'profile' in res:
+        with st.expander('Profil des étapes', expanded=True):
+            _show_profile('Chargement A', st.session_state.get('A_profile'))
+            _show_profile('Chargement B', st.session_state.get('B_profile'))
+            _show_profile('Comparaison', res['profile'])
+    diffs = res.get('differences', {})
+    if 'only_in_left_sample' in diffs:
+        st.subheader('Lignes uniquement dans A (échantillon)')
+        df_only_left = pd.DataFrame(diffs['only_in_left_sample'])
+        st.dataframe(df_only_left)
+        _download(files, 'left_only', df_only_left, 'only_in_left_sample.csv')
+    if 'only_in_right_sample' in diffs:
+        st.subheader('Lignes uniquement dans B (échantillon)')
+        df_only_right = pd.DataFrame(diffs['only_in_right_sample'])
+        st.dataframe(df_only_right)
+        _download(files, 'right_only', df_only_right, 'only_in_right_sample.csv')
+    if 'mismatched_rows_sample' in diffs:
+        st.subheader('Lignes divergentes (sur clés) – Échantillon')
+        flat = []
+        for item in diffs['mismatched_rows_sample']:
+            row = {}
+            for k, v in item.get('keys', {}).items():
+                row[f'key_{k}'] = v
+            cols = item.get('columns', [])
+            for c in cols:
+                row[f'left_{c}'] = item['left_values'].get(c)
+                row[f'right_{c}'] = item['right_values'].get(c)
+            flat.append(row)
+        df_mis = pd.DataFrame(flat)
+        st.dataframe(df_mis)
+        _download(files, 'mismatch', df_mis, 'mismatched_rows_sample.csv')
+    if keys and ('left_only' in files or 'right_only' in files):
+        st.subheader('Clés présentes d’un seul côté')
+        if 'left_only' in files:
+            st.caption(f"Uniquement dans A : {diffs.get('left_only_keys_count', 0)} clés")
+            _download(files, 'left_only')
+        if 'right_only' in files:
+            st.caption(f"Uniquement dans B : {diffs.get('right_only_keys_count', 0)} clés")
+            _download(files, 'right_only')
+
+def _age(seconds):
+    if seconds < 60:
+        return f'{seconds:.0f} s'
+    return f'{seconds / 60:.0f} min' if seconds < 3600 else f'{seconds / 3600:.1f} h'
+
+def _load_note(info):
+    return f" – depuis le cache, lu à la source il y a {_age(info['age_seconds'])}" if info['hit'] \
+        else f" – {info['seconds']:.1f}s"
+
+def _data_age_note(read_at):
+    """Warning when a compared side was served from the cache, with the age of its data."""
+    stale = [f'{side} lue à la source il y a {_age(time.time() - t)}' for side, t in read_at.items() if t is not None]
+    if stale:
+        st.warning('Données comparées issues du cache : ' + ', '.join(stale)
+                   + ' – « Rafraîchir depuis la source » pour relire.')
+
+def _field_input(label, side_key, source, field):
+    """Widget of one loader parameter (registry Field); values are kept in the session
+    under '{side}_{type}_{field}' so that switching source types does not lose them."""
+    text = f"{label}: {field.label}"
+    if field.kind == 'file':
+        return st.file_uploader(text, type=list(field.choices) or None, key=f'{side_key}_{source.name}_{field.name}')
+    saved = f'{side_key}_{source.name}_{field.name}'
+    current = st.session_state.get(saved, field.default)
+    if field.kind == 'choice':
+        value = st.selectbox(text, field.choices, index=field.choices.index(current),
+                             format_func=lambda v: 'TAB' if v == '\t' else v)
+    elif field.kind == 'bool':
+        value = st.checkbox(text, value=bool(current))
+    elif field.kind == 'int':
+        value = int(st.number_input(text, value=int(current or 0), min_value=0, step=1))
+    elif field.kind == 'sql':
+        value = st.text_area(text, value=current or '', height=150)
+    elif field.kind == 'columns':
+        value = st.text_input(text, value=current or '')
+    else:
+        value = st.text_input(text, value=current or '', type='password' if field.kind == 'password' else 'default')
+    st.session_state[saved] = value
+    if field.kind == 'columns':
+        return [c.strip() for c in value.split(',') if c.strip()] or None
+    return value if value != '' else None
 
 def load_ui(label: str, side_key: str):
+    """Source form of one side, built from the loader registry."""
     st.subheader(label)
-    typ = st.radio(
-        f"Type de source – {label}",
-        ['CSV', 'SQL (SQLAlchemy/ODBC)', 'SQL Server (pytds)', 'SQL Server (mssql-python)'],
-        horizontal=True,
-        key=f'{side_key}_type_radio',
-        index=0 if (st.session_state.get(f'{side_key}_type') or 'CSV')=='CSV' else 1 if st.session_state.get(f'{side_key}_type')=='SQL (SQLAlchemy/ODBC)' else 2 if st.session_state.get(f'{side_key}_type')=='SQL Server (pytds)' else 3
-    )
+    sources = [get_source(name) for name in source_types()]
+    labels = [s.label for s in sources]
+    current = st.session_state.get(f'{side_key}_type')
+    typ = st.radio(f"Type de source – {label}", labels, horizontal=True, key=f'{side_key}_type_radio',
+                   index=labels.index(current) if current in labels else 0)
     st.session_state[f'{side_key}_type'] = typ
+    source = sources[labels.index(typ)]
+    if not source.available:
+        st.warning(f"{label}: pilote {source.label} non installé – pip install {source.package}")
+        return
 
-    
-    if typ == 'CSV':
-        col1, col2 = st.columns([1,1])
-        with col1:
-            delim_label = f"{label}: Délimiteur CSV"
-            # Propose les séparateurs courants : virgule, point-virgule, tabulation, |, :
-            delim = st.selectbox(
-                delim_label,
-                options=[',',';','\\t','|',':'],
-                index=0,
-                key=f'{side_key}_csv_delim'
-            )
-            if delim == '\\t':
-                st.caption('Délimiteur actuel: TAB')
-        with col2:
-            st.caption("Format attendu: encodage UTF-8 par défaut.")
-
-        up = st.file_uploader(f"{label}: Charger un CSV", type=['csv'], key=f'{side_key}_csv')
-        if up is not None:
-            try:
-                # Normalise la valeur de l’UI : si '\\t', on passe bien '\t' à pandas
-                sep = '\t' if st.session_state.get(f'{side_key}_csv_delim') in ('\\t', '\t') \
-                        else st.session_state.get(f'{side_key}_csv_delim', ',')
-
-                df = pd.read_csv(up, dtype='string', sep=sep)
-                # Trim de sécurité
-                for c in df.columns:
-                    if pd.api.types.is_string_dtype(df[c]):
-                        df[c] = df[c].str.strip()
-                st.session_state[f'{side_key}_df'] = df
-                st.success(f"{label}: {len(df)} lignes chargées (CSV, sep='{sep if sep!='\\t' else 'TAB'}')")
-                st.dataframe(df.head(20))
-            except Exception as e:
-                st.error(f"{label}: erreur de lecture CSV – {e}")
+    params = {f.name: _field_input(label, side_key, source, f) for f in source.fields}
+    params.update(source.app_defaults)
+    upload = next((f.name for f in source.fields if f.kind == 'file'), None)
+    if upload is not None:
+        up = params[upload]
+        if up is None:
+            st.session_state[f'{side_key}_upload'] = None
         else:
-            df_prev = st.session_state.get(f'{side_key}_df')
-            if isinstance(df_prev, pd.DataFrame):
-                st.info(f"{label}: {len(df_prev)} lignes en mémoire (CSV)")
-                st.dataframe(df_prev.head(20))
-
-
-    elif typ == 'SQL (SQLAlchemy/ODBC)':
-        conn = st.text_input(f"{label}: Chaîne de connexion SQLAlchemy", value=st.session_state.get(f'{side_key}_conn') or '')
-        sql = st.text_area(f"{label}: Requête SQL", value=st.session_state.get(f'{side_key}_sql') or '', height=150)
-        st.session_state[f'{side_key}_conn'] = conn
-        st.session_state[f'{side_key}_sql'] = sql
-        as_str_default = st.session_state.get(f'{side_key}_as_string', True)
-        st.checkbox(f"{label}: Forcer toutes les colonnes en string (SQL)", value=as_str_default, key=f'{side_key}_as_string')
-        if conn and sql and st.button(f"Exécuter {label}", key=f'{side_key}_exec_sqlalchemy'):
-            with st.spinner('Chargement depuis SQL (SQLAlchemy/ODBC)...'):
-                try:
-                    df = load_from_sql(conn, sql, as_string=st.session_state[f'{side_key}_as_string'])
-                    st.session_state[f'{side_key}_df'] = df
-                    st.success(f"{label}: {len(df)} lignes chargées (SQL)")
-                    st.dataframe(df.head(20))
-                except Exception as e:
-                    st.error(f"{label}: erreur SQL – {e}")
-        else:
-            df_prev = st.session_state.get(f'{side_key}_df')
-            if isinstance(df_prev, pd.DataFrame):
-                st.info(f"{label}: {len(df_prev)} lignes en mémoire (SQL)")
-                st.dataframe(df_prev.head(20))
-
-    elif typ == 'SQL Server (pytds)':
-        host = st.text_input(f"{label} (pytds): Hôte/IP", value=st.session_state.get(f'{side_key}_pytds_host') or '')
-        db = st.text_input(f"{label} (pytds): Base", value=st.session_state.get(f'{side_key}_pytds_db') or '')
-        user = st.text_input(f"{label} (pytds): Utilisateur", value=st.session_state.get(f'{side_key}_pytds_user') or '')
-        pw = st.text_input(f"{label} (pytds): Mot de passe", value=st.session_state.get(f'{side_key}_pytds_password') or '', type='password')
-        port = st.number_input(f"{label} (pytds): Port", value=st.session_state.get(f'{side_key}_pytds_port') or 1433, min_value=1, max_value=65535, step=1)
-        sql2 = st.text_area(f"{label} (pytds): Requête SQL", value=st.session_state.get(f'{side_key}_pytds_sql') or '', height=150)
-        as_str_default2 = st.session_state.get(f'{side_key}_pytds_as_string', True)
-        st.checkbox(f"{label} (pytds): Forcer toutes les colonnes en string", value=as_str_default2, key=f'{side_key}_pytds_as_string')
-        # Save inputs (non-widget keys only)
-        st.session_state[f'{side_key}_pytds_host'] = host
-        st.session_state[f'{side_key}_pytds_db'] = db
-        st.session_state[f'{side_key}_pytds_user'] = user
-        st.session_state[f'{side_key}_pytds_password'] = pw
-        st.session_state[f'{side_key}_pytds_port'] = port
-        st.session_state[f'{side_key}_pytds_sql'] = sql2
-        if host and db and sql2 and st.button(f"Exécuter {label} (pytds)", key=f'{side_key}_exec_pytds'):
-            with st.spinner('Chargement depuis SQL Server (pytds)...'):
-                try:
-                    df = load_from_sqlserver_pytds(host, db, user=user or None, password=pw or None, port=int(port), query=sql2, as_string=st.session_state[f'{side_key}_pytds_as_string'])
-                    st.session_state[f'{side_key}_df'] = df
-                    st.success(f"{label}: {len(df)} lignes chargées (pytds)")
-                    st.dataframe(df.head(20))
-                except Exception as e:
-                    st.error(f"{label}: erreur pytds – {e}")
-        else:
-            df_prev = st.session_state.get(f'{side_key}_df')
-            if isinstance(df_prev, pd.DataFrame):
-                st.info(f"{label}: {len(df_prev)} lignes en mémoire (pytds)")
-                st.dataframe(df_prev.head(20))
-
-    else:  # 'SQL Server (mssql-python)'
-        host = st.text_input(f"{label} (mssql-python): Hôte/IP", value=st.session_state.get(f'{side_key}_mpy_host') or '')
-        db = st.text_input(f"{label} (mssql-python): Base", value=st.session_state.get(f'{side_key}_mpy_db') or '')
-        user = st.text_input(f"{label} (mssql-python): Utilisateur", value=st.session_state.get(f'{side_key}_mpy_user') or '')
-        pw = st.text_input(f"{label} (mssql-python): Mot de passe", value=st.session_state.get(f'{side_key}_mpy_password') or '', type='password')
-        port = st.number_input(f"{label} (mssql-python): Port", value=st.session_state.get(f'{side_key}_mpy_port') or 1433, min_value=1, max_value=65535, step=1)
-        sql3 = st.text_area(f"{label} (mssql-python): Requête SQL", value=st.session_state.get(f'{side_key}_mpy_sql') or '', height=150)
-        as_str_default3 = st.session_state.get(f'{side_key}_mpy_as_string', True)
-        st.checkbox(f"{label} (mssql-python): Forcer toutes les colonnes en string", value=as_str_default3, key=f'{side_key}_mpy_as_string')
-        # Save inputs
-        st.session_state[f'{side_key}_mpy_host'] = host
-        st.session_state[f'{side_key}_mpy_db'] = db
-        st.session_state[f'{side_key}_mpy_user'] = user
-        st.session_state[f'{side_key}_mpy_password'] = pw
-        st.session_state[f'{side_key}_mpy_port'] = port
-        st.session_state[f'{side_key}_mpy_sql'] = sql3
-        if host and db and sql3 and st.button(f"Exécuter {label} (mssql-python)", key=f'{side_key}_exec_mpy'):
-            with st.spinner('Chargement depuis SQL Server (mssql-python)...'):
-                try:
-                    df = load_from_sqlserver_mssqlpy(host, db, user=user or None, password=pw or None, port=int(port), query=sql3, as_string=st.session_state[f'{side_key}_mpy_as_string'])
-                    st.session_state[f'{side_key}_df'] = df
-                    st.success(f"{label}: {len(df)} lignes chargées (mssql-python)")
-                    st.dataframe(df.head(20))
-                except Exception as e:
-                    st.error(f"{label}: erreur mssql-python – {e}")
-        else:
-            df_prev = st.session_state.get(f'{side_key}_df')
-            if isinstance(df_prev, pd.DataFrame):
-                st.info(f"{label}: {len(df_prev)} lignes en mémoire (mssql-python)")
-                st.dataframe(df_prev.head(20))
+            # Chargé une seule fois par fichier et options (pas à chaque rerun de la page)
+            token = (getattr(up, 'file_id', None) or f'{up.name}:{up.size}', source.name,
+                     repr(sorted((k, v) for k, v in params.items() if k != upload)))
+            if st.session_state.get(f'{side_key}_upload') != token:
+                st.session_state[f'{side_key}_upload'] = token
+                data = up.getvalue()
+                _start_load(side_key, label, source, {**params, upload: data}, target=up.name, data=data)
+    elif all(params.get(f.name) for f in source.fields if f.required) and \
+            st.button(f"Exécuter {label} ({source.label})", key=f'{side_key}_exec_{source.name}'):
+        _start_load(side_key, label, source, params)
+    _load_status(side_key, label, source)
+
 
 colA, colB = st.columns(2)
 with colA:
@@ -177,6 +307,17 @@ with colB:
 st.divider()
 keys_input = st.text_input('Colonnes clé (optionnel, séparées par des virgules)')
 float_tol = st.number_input('Tolérance flottants', value=1e-9, min_value=0.0, format='%f')
+tol1, tol2, tol3 = st.columns([1, 1, 2])
+abs_tol = tol1.number_input('Tolérance absolue (numériques)', value=0.0, min_value=0.0, format='%g')
+rel_tol = tol2.number_input('Tolérance relative (numériques)', value=0.0, min_value=0.0, format='%g')
+column_tol_input = tol3.text_input('Tolérances par colonne (colonne=abs ou colonne=abs;rel, séparées par des virgules)')
+st.checkbox('Encoder les colonnes texte (dictionnaire partagé, moins de mémoire)', value=True, key='encode_strings')
+st.selectbox('Moteur de comparaison', ['pandas', 'duckdb'] if DUCKDB_AVAILABLE else ['pandas'], key='backend',
+             help='duckdb : jointures et différences en SQL, multi-thread, avec débordement sur disque')
+exp1, exp2 = st.columns(2)
+exp1.checkbox('Exporter toutes les différences (fichiers complets à télécharger)', value=False, key='export_full')
+exp2.selectbox("Format d'export", [f for f in FORMATS if PARQUET_AVAILABLE or f != 'parquet'], key='export_format')
+st.checkbox('Profiler les étapes (temps, lignes, pic mémoire des chargements et de la comparaison)', key='profile_stages')
 
 dfA = st.session_state.get('A_df')
 dfB = st.session_state.get('B_df')
@@ -186,41 +327,66 @@ if st.button('Comparer', type='primary'):
         st.error('Veuillez charger les deux sources (A et B) avant de lancer la comparaison.')
     else:
         keys = [k.strip() for k in keys_input.split(',') if k.strip()] if keys_input else None
-        with st.spinner('Comparaison en cours...'):
-            res = compare_dataframes(dfA, dfB, keys=keys, float_tol=float_tol)
-        st.success('Comparaison terminée')
-        m1, m2, m3 = st.columns(3)
-        with m1:
-            st.metric('Lignes A', res['left_count'])
-        with m2:
-            st.metric('Lignes B', res['right_count'])
-        with m3:
-            st.metric('Volumétrie identique', '✅' if res['row_count_equal'] else '❌')
-        st.metric('Colonnes identiques', '✅' if res['columns_equal'] else '❌')
-        st.metric('Données identiques', '✅' if res['data_equal'] else '❌')
-        diffs = res.get('differences', {})
-        if 'only_in_left_sample' in diffs:
-            st.subheader('Lignes uniquement dans A (échantillon)')
-            df_only_left = pd.DataFrame(diffs['only_in_left_sample'])
-            st.dataframe(df_only_left)
-            st.download_button('Télécharger (CSV)', df_only_left.to_csv(index=False).encode('utf-8'), file_name='only_in_left_sample.csv')
-        if 'only_in_right_sample' in diffs:
-            st.subheader('Lignes uniquement dans B (échantillon)')
-            df_only_right = pd.DataFrame(diffs['only_in_right_sample'])
-            st.dataframe(df_only_right)
-            st.download_button('Télécharger (CSV)', df_only_right.to_csv(index=False).encode('utf-8'), file_name='only_in_right_sample.csv')
-        if 'mismatched_rows_sample' in diffs:
-            st.subheader('Lignes divergentes (sur clés) – Échantillon')
-            flat = []
-            for item in diffs['mismatched_rows_sample']:
-                row = {}
-                for k, v in item.get('keys', {}).items():
-                    row[f'key_{k}'] = v
-                cols = item.get('columns', [])
-                for c in cols:
-                    row[f'left_{c}'] = item['left_values'].get(c)
-                    row[f'right_{c}'] = item['right_values'].get(c)
-                flat.append(row)
-            df_mis = pd.DataFrame(flat)
-            st.dataframe(df_mis)
-            st.download_button('Télécharger (CSV)', df_mis.to_csv(index=False).encode('utf-8'), file_name='mismatched_rows_sample.csv')
+        try:
+            column_tolerances = _column_tolerances(column_tol_input)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        previous = _job('compare_job')
+        if previous is not None:
+            previous.cancel()
+        sink = _diff_sink(st.session_state.get('export_format', 'csv')) if st.session_state.get('export_full', False) else None
+        options = dict(keys=keys, float_tol=float_tol,
+                       profile=bool(st.session_state.get('profile_stages')),
+                       encode_strings=st.session_state.get('encode_strings', True),
+                       tolerance=(abs_tol, rel_tol) if abs_tol or rel_tol else None,
+                       column_tolerances=column_tolerances or None,
+                       backend=st.session_state.get('backend', 'pandas'))
+
+        def work(progress, dfA=dfA, dfB=dfB):
+            try:
+                res = compare_dataframes(dfA, dfB, on_difference=sink, on_progress=progress, **options)
+            finally:
+                files = sink.close() if sink is not None else {}
+            return {'res': res, 'files': files, 'keys': keys}
+
+        st.session_state['compare_read_at'] = {side: st.session_state.get(f'{side}_read_at') for side in ('A', 'B')}
+
+        st.session_state['compare_job'] = _submit('Comparaison', work, 'compare').id
+
+# Comparaison en arrière-plan : rattachée à chaque rerun, en cours ou terminée
+compare_job = _job('compare_job')
+if compare_job is not None:
+    if not compare_job.done:
+        _job_progress(compare_job, 'Comparaison en cours')
+    elif compare_job.state == 'failed':
+        st.error(f"Erreur de comparaison – {compare_job.error}")
+    elif compare_job.state == 'cancelled':
+        st.warning('Comparaison annulée')
+    else:
+        _data_age_note(st.session_state.get('compare_read_at') or {})
+        _show_results(**compare_job.result)
+
+# Cache des chargements (rendu en fin de script pour afficher les compteurs à jour)
+with st.sidebar:
+    st.header('Cache des chargements')
+    st.checkbox('Utiliser le cache pour les fichiers (sinon rechargement forcé)', value=True, key='use_cache')
+    st.checkbox(f'Mettre en cache les résultats de requêtes ({QUERY_TTL_SECONDS // 60} min)', value=False,
+                key='cache_queries', help='Désactivé par défaut : une comparaison doit porter sur des données à jour')
+    cache = get_default_cache()
+    stats = cache.stats
+    c1, c2 = st.columns(2)
+    c1.metric('Succès', stats['hits'])
+    c2.metric('Échecs', stats['misses'])
+    c1.metric('Temps de chargement', f"{stats['load_seconds']:.1f}s")
+    c2.metric('Temps économisé', f"{stats['saved_seconds']:.1f}s")
+    entries = cache.entries()
+    st.caption(f"{len(entries)} entrées – {sum(e['bytes'] for e in entries) / 1024 ** 2:.1f} Mo – {cache.directory}")
+    if st.button('Vider le cache'):
+        cache.clear()
+        st.rerun()
+
+# Rafraîchissement de la page tant qu'un chargement ou une comparaison tourne
+if any(job is not None and not job.done for job in map(_job, ('A_job', 'B_job', 'compare_job'))):
+    time.sleep(POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,56 @@
+"""Scaling of compare_parallel from 1 to N workers on synthetic frames.
+
+    python -m benchmarks.bench_parallel --rows 2000000 --max-workers 32
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.parallel import compare_parallel
+
+
+def make_frames(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    left = pd.DataFrame({
+        'id': np.arange(rows).astype(str),
+        'code': rng.choice(['A', 'B', 'C', 'D'], rows),
+        'qty': rng.integers(0, 1000, rows),
+        'price': rng.random(rows).round(4),
+        'label': rng.choice(['alpha', 'beta', 'gamma', ' delta '], rows),
+    })
+    right = left.copy()
+    changed = rng.choice(rows, max(rows // 100, 1), replace=False)
+    right.loc[changed, 'qty'] += 1
+    right = right.drop(index=right.index[:rows // 200]).reset_index(drop=True)
+    return left, right
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    left, right = make_frames(args.rows)
+    counts = sorted({1, args.max_workers} | {w for w in (2, 4, 8, 16, 32, 64) if w < args.max_workers})
+    print(f'{args.rows} lignes, {os.cpu_count()} cœurs')
+    for label, keys in (('avec clés', ['id']), ('sans clé', None)):
+        base = _timed(lambda: compare_dataframes(left, right, keys=keys))
+        print(f'\n{label}: compare_dataframes {base:.2f}s')
+        print(f"{'workers':>8} {'temps (s)':>10} {'accélération':>13}")
+        for w in counts:
+            t = _timed(lambda: compare_parallel(left, right, keys=keys, workers=w))
+            print(f'{w:>8} {t:>10.2f} {base / t:>12.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Peak memory of compare_partition vs. the pickled size of the partition pair
+(the _MEMORY_EXPANSION factor of src/compare/partitioned.py).
+
+    python -m benchmarks.bench_partition_memory --rows 200000
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import tracemalloc
+from src.compare.partitioned import _MEMORY_EXPANSION, SpillWriter, compare_partition, partition_ids
+from benchmarks.bench_parallel import make_frames
+
+CHUNK = 50_000
+
+
+def frames(kind: str, rows: int):
+    """Typed frames, all-object text (CSV-like) or pandas string dtype (loaders)."""
+    left, right = make_frames(rows)
+    if kind in ('text', 'string'):
+        left, right = left.astype(str), right.astype(str)
+    if kind == 'string':
+        left, right = left.astype('string'), right.astype('string')
+    return left, right
+
+
+def measure(kind: str, keys, rows: int):
+    left, right = frames(kind, rows)
+    cols = sorted(left.columns)
+    with tempfile.TemporaryDirectory() as directory:
+        spills = []
+        for side, df in (('left', left), ('right', right)):
+            spill = SpillWriter(directory, side, 1)
+            for start in range(0, len(df), CHUNK):
+                chunk = df.iloc[start:start + CHUNK]
+                spill.write(chunk, partition_ids(chunk, keys, cols, 1, 1e-9))
+            spill.close()
+            spills.append(spill)
+        size = spills[0].size(0) + spills[1].size(0)
+        tracemalloc.start()
+        compare_partition(spills[0].paths, spills[1].paths, left.iloc[:0], right.iloc[:0], keys, cols, 1e-9, 50)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return size, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+    print(f'{args.rows} lignes par côté, facteur actuel {_MEMORY_EXPANSION}')
+    print(f"{'données':>8} {'clés':>5} {'pickle (Mo)':>12} {'pic (Mo)':>9} {'facteur':>8}")
+    for kind in ('typed', 'text', 'string'):
+        for keys in (['id'], None):
+            size, peak = measure(kind, keys, args.rows)
+            print(f"{kind:>8} {'oui' if keys else 'non':>5} {size / 2 ** 20:>12.1f} {peak / 2 ** 20:>9.1f} {peak / size:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Synthetic, reproducible data for the benchmarks."""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+DTYPES = ('int', 'float', 'str', 'code', 'date', 'bool')
+
+
+@dataclass
+class DataSpec:
+    rows: int = 100_000
+    # One entry per non-key column, cycled: int, float, str (free text),
+    # code (zero-padded identifiers), date, bool
+    dtypes: List[str] = field(default_factory=lambda: ['int', 'float', 'str', 'code', 'date'])
+    columns: int = 5
+    null_rate: float = 0.0
+    duplicate_rate: float = 0.0       # share of rows that repeat another row
+    mismatch_rate: float = 0.01       # share of rows altered on the right side
+    missing_rate: float = 0.005       # share of rows dropped from the right side
+    key_cardinality: Optional[int] = None  # distinct key values (default: rows)
+    as_string: bool = False           # all columns as text, like as_string loaders
+    seed: int = 0
+
+
+def _column(kind: str, n: int, rng: np.random.Generator) -> pd.Series:
+    if kind == 'int':
+        return pd.Series(rng.integers(0, 1_000_000, n))
+    if kind == 'float':
+        return pd.Series(rng.random(n).round(4) * 1000)
+    if kind == 'str':
+        words = np.array(['alpha', 'beta', 'gamma', 'delta', ' epsilon ', 'zeta', 'eta', 'theta'])
+        return pd.Series(rng.choice(words, n)).str.cat(rng.integers(0, 1000, n).astype(str), sep='-')
+    if kind == 'code':
+        return pd.Series(np.char.zfill(rng.integers(0, 10 ** 8, n).astype(str), 10))
+    if kind == 'date':
+        return pd.Series(pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 3 * 10 ** 8, n), unit='s'))
+    if kind == 'bool':
+        return pd.Series(rng.random(n) < 0.5)
+    raise ValueError(f"Type de colonne inconnu: {kind} (attendu: {', '.join(DTYPES)})")
+
+
+def make_frame(spec: DataSpec, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    rng = rng if rng is not None else np.random.default_rng(spec.seed)
+    n = spec.rows
+    cardinality = spec.key_cardinality or n
+    keys = np.arange(n) if cardinality >= n else rng.integers(0, cardinality, n)
+    df = pd.DataFrame({'id': keys})
+    for i in range(spec.columns):
+        kind = spec.dtypes[i % len(spec.dtypes)]
+        col = _column(kind, n, rng)
+        if spec.null_rate:
+            col = col.astype(object if kind in ('int', 'bool') else col.dtype)
+            col[rng.random(n) < spec.null_rate] = None
+        df[f'{kind}_{i}'] = col
+    if spec.duplicate_rate:
+        dup = rng.random(n) < spec.duplicate_rate
+        src = rng.integers(0, n, int(dup.sum()))
+        df.iloc[np.flatnonzero(dup)] = df.iloc[src].to_numpy()
+    if spec.as_string:
+        df = df.astype('string')
+    return df
+
+
+def make_pair(spec: DataSpec) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(left, right): right is left shuffled, with ``mismatch_rate`` of rows
+    altered in one column and ``missing_rate`` of rows dropped."""
+    rng = np.random.default_rng(spec.seed)
+    left = make_frame(spec, rng)
+    right = left.copy()
+    n = len(right)
+    value_cols = [c for c in right.columns if c != 'id']
+    if value_cols and spec.mismatch_rate:
+        changed = np.flatnonzero(rng.random(n) < spec.mismatch_rate)
+        col = value_cols[0]
+        values = right[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = values.copy()
+            values.iloc[changed] = values.iloc[changed] + 1
+        else:
+            values = values.astype(object)
+            values.iloc[changed] = values.iloc[changed].astype(str) + 'x'
+            if spec.as_string:
+                values = values.astype('string')
+        right[col] = values
+    if spec.missing_rate:
+        right = right[rng.random(n) >= spec.missing_rate]
+    right = right.sample(frac=1.0, random_state=spec.seed).reset_index(drop=True)
+    return left, right
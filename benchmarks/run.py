@@ -0,0 +1,160 @@
+"""Benchmark suite: comparisons, normalization and loaders on synthetic data.
+
+    python -m benchmarks.run --rows 200000 --out bench.json
+    python -m benchmarks.run --rows 200000 --baseline bench.json     # flags regressions
+    python -m benchmarks.run --compare old.json new.json
+
+Each case reports the best wall time over ``--repeat`` runs, rows/s and the
+peak Python heap (tracemalloc, measured on a separate run so that tracing does
+not skew the timings). With ``--baseline``, a case slower than the baseline by
+more than ``--threshold`` is a regression and the exit code is 1.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Tuple
+import pandas as pd
+from benchmarks.datagen import DataSpec, make_frame, make_pair
+from src.compare.dataframe_compare import compare_dataframes
+from src.loaders.csv_loader import load_from_csv
+from src.loaders.sql_loader import load_from_sql
+from src.utils.normalize import apply_smart_string, canonical_row, normalize_object_columns
+
+Case = Tuple[str, int, Callable[[], Any]]
+
+
+def build_cases(spec: DataSpec, workdir: str, only: List[str]) -> List[Case]:
+    left, right = make_pair(spec)
+    text_left = make_frame(DataSpec(**dict(asdict(spec), as_string=True)))
+    n = len(left)
+    cases: List[Case] = [
+        ('compare_keyed', n, lambda: compare_dataframes(left, right, keys=['id'])),
+        ('compare_keyless', n, lambda: compare_dataframes(left, right)),
+        ('normalize_object_columns', n, lambda: normalize_object_columns(left)),
+        ('apply_smart_string', n, lambda: apply_smart_string(left)),
+        ('apply_smart_string_text', n, lambda: apply_smart_string(text_left)),
+    ]
+    # canonical_row is per-row Python: time a slice and report rows/s on it
+    small = left.head(min(n, 20_000))
+    cols = list(small.columns)
+    cases.append(('canonical_row', len(small),
+                  lambda: [canonical_row(row, cols) for _, row in small.iterrows()]))
+
+    db = os.path.join(workdir, 'bench.db')
+    with sqlite3.connect(db) as conn:
+        left.to_sql('t', conn, index=False, if_exists='replace')
+    url = f'sqlite:///{db}'
+    cases.append(('load_from_sql', n, lambda: load_from_sql(url, 'SELECT * FROM t', chunksize=None)))
+    cases.append(('load_from_sql_raw', n, lambda: load_from_sql(url, 'SELECT * FROM t', chunksize=None, as_string=False)))
+    cases.append(('load_from_sql_chunked', n, lambda: load_from_sql(url, 'SELECT * FROM t', chunksize=50_000)))
+    csv_path = os.path.join(workdir, 'bench.csv')
+    left.to_csv(csv_path, index=False)
+    cases.append(('load_from_csv', n, lambda: load_from_csv(csv_path)))
+    return [c for c in cases if not only or c[0] in only]
+
+
+def measure(fn: Callable[[], Any], rows: int, repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best = min(times)
+    return {
+        'rows': rows,
+        'wall_s': best,
+        'median_s': sorted(times)[len(times) // 2],
+        'rows_per_s': rows / best if best > 0 else 0.0,
+        'peak_mb': peak / 1024 ** 2,
+    }
+
+
+def run(spec: DataSpec, repeat: int, only: List[str]) -> Dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        for name, rows, fn in build_cases(spec, workdir, only):
+            results[name] = measure(fn, rows, repeat)
+            r = results[name]
+            print(f"{name:<28} {r['wall_s']:>8.3f}s {r['rows_per_s']:>14,.0f} lignes/s {r['peak_mb']:>9.1f} Mo")
+    return {
+        'spec': asdict(spec),
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__,
+                        'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'results': results,
+    }
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of the cases slower than the baseline by more than ``threshold``."""
+    if baseline.get('spec') != current.get('spec'):
+        print('Attention: paramètres de données différents de la référence')
+    regressions = []
+    print(f"{'cas':<28} {'référence':>10} {'actuel':>10} {'écart':>8}")
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = cur['wall_s'] / base['wall_s'] - 1 if base['wall_s'] > 0 else 0.0
+        flag = ''
+        if ratio > threshold:
+            regressions.append(name)
+            flag = '  RÉGRESSION'
+        print(f"{name:<28} {base['wall_s']:>9.3f}s {cur['wall_s']:>9.3f}s {ratio:>+7.0%}{flag}")
+    return regressions
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--columns', type=int, default=5)
+    parser.add_argument('--dtypes', default='int,float,str,code,date', help='types cyclés: ' + ','.join(
+        ('int', 'float', 'str', 'code', 'date', 'bool')))
+    parser.add_argument('--null-rate', type=float, default=0.0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--mismatch-rate', type=float, default=0.01)
+    parser.add_argument('--key-cardinality', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='', help='cas à exécuter, séparés par des virgules')
+    parser.add_argument('--out', help='fichier JSON de résultats')
+    parser.add_argument('--baseline', help='JSON de référence pour détecter les régressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='ralentissement toléré (0.15 = 15 %%)')
+    parser.add_argument('--compare', nargs=2, metavar=('REFERENCE', 'ACTUEL'), help='compare deux JSON existants')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare_runs(_load(args.compare[0]), _load(args.compare[1]), args.threshold) else 0
+    spec = DataSpec(rows=args.rows, columns=args.columns, dtypes=args.dtypes.split(','),
+                    null_rate=args.null_rate, duplicate_rate=args.duplicate_rate,
+                    mismatch_rate=args.mismatch_rate, key_cardinality=args.key_cardinality, seed=args.seed)
+    only = [c.strip() for c in args.only.split(',') if c.strip()]
+    report = run(spec, args.repeat, only)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        return 1 if compare_runs(_load(args.baseline), report, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Headless batch comparison of many table pairs.
+
+    python -m src.batch.runner jobs.yaml --out summary.json --workers 8
+    python -m src.batch.runner jobs.json --max-per-server 2 --export-dir diffs
+    python -m src.batch.runner jobs.json --check          # validate the spec only
+
+Jobs (see src/batch/spec.py) run on a pool of worker threads; loads against
+one database server are capped (``server_limits`` / ``--max-per-server``) and
+a scheduler prefers jobs whose servers have a free slot. Loads failing with a
+transient error (lost connection, timeout, OperationalError...) are retried
+with exponential backoff. The JSON summary holds every compare_dataframes
+result plus timings; the exit code is 0 when all pairs are identical, 1 when
+differences were found and 2 when jobs failed.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+from ..compare.dataframe_compare import compare_dataframes
+from ..compare.diff_sink import DiffSink, PARQUET_AVAILABLE
+from .spec import Job, SourceSpec, parse_jobs, read_spec
+
+DEFAULT_WORKERS = 4
+DEFAULT_PER_SERVER = 4
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_DELAY = 2.0
+_TRANSIENT_NAMES = ('OperationalError', 'InterfaceError')
+_STATUS_LABELS = {'equal': 'identique', 'different': 'différences', 'error': 'erreur'}
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Errors worth retrying: connection loss, timeouts, DB-API operational errors."""
+    if isinstance(exc, (FileNotFoundError, PermissionError, IsADirectoryError, NotADirectoryError)):
+        return False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    sa_exc = sys.modules.get('sqlalchemy.exc')  # loaded if and only if a SQLAlchemy source ran
+    if sa_exc is not None and isinstance(exc, sa_exc.DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (sa_exc.OperationalError, sa_exc.InterfaceError))
+    # DB-API drivers (pytds, mssql-python) name their exceptions after PEP 249
+    return any(cls.__name__ in _TRANSIENT_NAMES for cls in type(exc).__mro__)
+
+
+class ServerLimiter:
+    """Caps the number of concurrent loads per database server. ``limits``
+    maps a server ('mssql://SQLHOST') or a bare host ('SQLHOST') to its cap."""
+
+    def __init__(self, default_limit: int = DEFAULT_PER_SERVER, limits: Optional[Dict[str, int]] = None):
+        self.default_limit = max(1, int(default_limit))
+        self.limits = {k: max(1, int(v)) for k, v in (limits or {}).items()}
+        self.active: Dict[str, int] = defaultdict(int)
+        self._cond = threading.Condition()
+
+    def limit(self, server: str) -> int:
+        host = server.split('://', 1)[-1]
+        return self.limits.get(server, self.limits.get(host, self.default_limit))
+
+    def has_capacity(self, server: Optional[str]) -> bool:
+        with self._cond:
+            return server is None or self.active[server] < self.limit(server)
+
+    @contextmanager
+    def slot(self, server: Optional[str]) -> Iterator[None]:
+        if server is None:
+            yield
+            return
+        with self._cond:
+            while self.active[server] >= self.limit(server):
+                self._cond.wait()
+            self.active[server] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active[server] -= 1
+                self._cond.notify_all()
+
+
+def load_with_retry(source: SourceSpec, limiter: ServerLimiter, retries: int, retry_delay: float,
+                    sleep: Callable[[float], None] = time.sleep):
+    """(frame, attempts, seconds) for one source; transient errors are retried
+    ``retries`` times with a doubling delay, others are raised at once."""
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            with limiter.slot(source.server):
+                df = source.load()
+            return df, attempt + 1, time.perf_counter() - start
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                e.attempts = attempt + 1
+                raise
+            sleep(retry_delay * 2 ** attempt)
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^\w.-]+', '_', name).strip('._') or 'job'
+
+
+def run_job(job: Job, limiter: ServerLimiter, retries: int = DEFAULT_RETRIES,
+            retry_delay: float = DEFAULT_RETRY_DELAY, export_dir: Optional[str] = None,
+            export_format: str = 'parquet') -> Dict[str, Any]:
+    """Load both sides and compare them; never raises (errors go in the record)."""
+    record: Dict[str, Any] = {'name': job.name, 'left': job.left.label, 'right': job.right.label,
+                              'status': 'error', 'attempts': {}, 'seconds': {}, 'error': None}
+    start = time.perf_counter()
+    side = 'left'
+    try:
+        left, record['attempts']['left'], record['seconds']['left_load'] = \
+            load_with_retry(job.left, limiter, retries, retry_delay)
+        side = 'right'
+        right, record['attempts']['right'], record['seconds']['right_load'] = \
+            load_with_retry(job.right, limiter, retries, retry_delay)
+        side = 'compare'
+        sink = None
+        if export_dir and job.export:
+            sink = DiffSink(os.path.join(export_dir, _safe_name(job.name)), export_format)
+        t = time.perf_counter()
+        res = compare_dataframes(left, right, on_difference=sink, **job.options)
+        del left, right
+        record['seconds']['compare'] = time.perf_counter() - t
+        if sink is not None:
+            record['exports'] = sink.close()
+        record['status'] = 'equal' if res['data_equal'] else 'different'
+        record['result'] = res
+    except Exception as e:
+        record['error'] = f'{side}: {type(e).__name__}: {e}'
+        if side in ('left', 'right'):
+            record['attempts'][side] = getattr(e, 'attempts', 1)
+    record['seconds']['total'] = time.perf_counter() - start
+    return record
+
+
+class BatchScheduler:
+    """Runs jobs on ``workers`` threads, taking first the pending jobs whose
+    servers have a free slot so that one saturated server does not idle the pool."""
+
+    def __init__(self, jobs: List[Job], limiter: ServerLimiter, workers: int = DEFAULT_WORKERS,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None, **job_options):
+        self.jobs = list(jobs)
+        self.limiter = limiter
+        self.workers = max(1, min(int(workers), len(self.jobs) or 1))
+        self.on_result = on_result
+        self.job_options = job_options
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._pending = list(self.jobs)
+        self._lock = threading.Lock()
+
+    def _take(self) -> Optional[Job]:
+        with self._lock:
+            if not self._pending:
+                return None
+            for i, job in enumerate(self._pending):
+                if self.limiter.has_capacity(job.left.server) and self.limiter.has_capacity(job.right.server):
+                    return self._pending.pop(i)
+            return self._pending.pop(0)
+
+    def _work(self) -> None:
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            record = run_job(job, self.limiter, **self.job_options)
+            with self._lock:
+                self.results[job.name] = record
+                if self.on_result is not None:
+                    self.on_result(record)
+
+    def run(self) -> List[Dict[str, Any]]:
+        threads = [threading.Thread(target=self._work, name=f'batch-{i}', daemon=True) for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return [self.results[job.name] for job in self.jobs]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, workers: int, started: datetime) -> Dict[str, Any]:
+    counts = {s: sum(1 for r in results if r['status'] == s) for s in _STATUS_LABELS}
+    return {
+        'started': started.isoformat(timespec='seconds'),
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_seconds': elapsed,
+        'workers': workers,
+        'jobs': len(results),
+        **counts,
+        'tables_per_hour': len(results) / elapsed * 3600 if elapsed > 0 else 0.0,
+        'results': results,
+    }
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def run_batch(spec: Dict[str, Any], workers: Optional[int] = None, max_per_server: Optional[int] = None,
+              retries: Optional[int] = None, retry_delay: Optional[float] = None, export_dir: Optional[str] = None,
+              export_format: str = 'parquet', only: Optional[List[str]] = None,
+              on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+              base_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Run every job of a parsed spec; arguments override the spec's settings."""
+    jobs = parse_jobs(spec, base_dir)
+    if only:
+        unknown = sorted(set(only) - {j.name for j in jobs})
+        if unknown:
+            raise ValueError(f"Jobs inconnus: {unknown}")
+        jobs = [j for j in jobs if j.name in only]
+    limits = dict(spec.get('server_limits') or {})
+    default_limit = max_per_server or limits.pop('default', DEFAULT_PER_SERVER)
+    workers = workers or spec.get('workers', DEFAULT_WORKERS)
+    scheduler = BatchScheduler(
+        jobs, ServerLimiter(default_limit, limits), workers, on_result,
+        retries=spec.get('retries', DEFAULT_RETRIES) if retries is None else retries,
+        retry_delay=spec.get('retry_delay', DEFAULT_RETRY_DELAY) if retry_delay is None else retry_delay,
+        export_dir=export_dir or spec.get('export_dir'), export_format=export_format)
+    started, start = datetime.now(), time.perf_counter()
+    results = scheduler.run()
+    return summarize(results, time.perf_counter() - start, scheduler.workers, started)
+
+
+def _reporter(total: int) -> Callable[[Dict[str, Any]], None]:
+    done = [0]
+
+    def report(record: Dict[str, Any]) -> None:
+        done[0] += 1
+        s = record['seconds']
+        detail = ', '.join(f"{label} {s[k]:.1f}s" for k, label in
+                           (('left_load', 'A'), ('right_load', 'B'), ('compare', 'comparaison')) if k in s)
+        line = f"[{done[0]}/{total}] {record['name']}: {_STATUS_LABELS[record['status']]} – {s['total']:.1f}s"
+        if detail:
+            line += f' ({detail})'
+        if record['error']:
+            line += f" – {record['error'].splitlines()[0]}"
+        print(line, file=sys.stderr, flush=True)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('spec', help='fichier de jobs (JSON ou YAML)')
+    parser.add_argument('--out', default='batch_summary.json', help='résumé JSON (défaut: batch_summary.json)')
+    parser.add_argument('--workers', type=int, help='jobs en parallèle')
+    parser.add_argument('--max-per-server', type=int, help='chargements simultanés par serveur')
+    parser.add_argument('--retries', type=int, help='nouvelles tentatives après une erreur transitoire')
+    parser.add_argument('--retry-delay', type=float, help='délai initial entre tentatives (s), doublé à chaque essai')
+    parser.add_argument('--export-dir', help='exporter les différences complètes des jobs marqués export: true')
+    parser.add_argument('--export-format', choices=['parquet', 'csv'],
+                        default='parquet' if PARQUET_AVAILABLE else 'csv')
+    parser.add_argument('--only', default='', help='noms de jobs à exécuter, séparés par des virgules')
+    parser.add_argument('--check', action='store_true', help='valider la spécification sans rien exécuter')
+    args = parser.parse_args(argv)
+
+    spec = read_spec(args.spec)
+    base_dir = os.path.dirname(os.path.abspath(args.spec))
+    only = [n.strip() for n in args.only.split(',') if n.strip()]
+    if args.check:
+        jobs = parse_jobs(spec, base_dir)
+        print(f"{len(jobs)} jobs valides", file=sys.stderr)
+        return 0
+    total = len(only) if only else len(spec['jobs'])
+    summary = run_batch(spec, workers=args.workers, max_per_server=args.max_per_server, retries=args.retries,
+                        retry_delay=args.retry_delay, export_dir=args.export_dir,
+                        export_format=args.export_format, only=only, on_result=_reporter(total), base_dir=base_dir)
+    summary['spec'] = os.path.abspath(args.spec)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False, default=_json_default)
+    print(f"{summary['jobs']} jobs en {summary['elapsed_seconds']:.1f}s – {summary['tables_per_hour']:.0f} tables/heure – "
+          f"{summary['equal']} identiques, {summary['different']} avec différences, {summary['error']} en erreur",
+          file=sys.stderr)
+    return 2 if summary['error'] else 1 if summary['different'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
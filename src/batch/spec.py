@@ -0,0 +1,146 @@
+from __future__ import annotations
+import inspect
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from ..loaders.registry import get_source, source_types
+
+try:
+    import yaml
+except ImportError:  # optional: JSON specs only
+    yaml = None
+
+# Job spec of the batch runner (JSON or YAML):
+#
+#   workers: 8                      # parallel jobs
+#   server_limits: {default: 4, SQLHOST: 2}   # concurrent loads per server
+#   retries: 2                      # extra attempts after a transient failure
+#   connections:                    # reusable source definitions
+#     old: {type: sql, conn: "mssql+pyodbc://...", as_string: true}
+#     new: {type: pytds, host: SQLHOST2, database: CRM, user: u, password: "${CRM_PWD}"}
+#   defaults: {keys: [id], tolerance: {abs: 0.01}, sample_size: 50}
+#   jobs:
+#     - name: clients
+#       left: {connection: old, query: "SELECT * FROM dbo.Clients"}
+#       right: {type: csv, path: exports/clients.csv, sep: ";"}
+#       keys: [id]
+#       column_tolerances: {taux: {rel: 1.0e-6}}
+#
+# Source fields are the loader parameters (``conn``/``query`` are accepted for
+# the SQLAlchemy loader); ``${VAR}`` in strings is read from the environment
+# and relative CSV paths are taken from the spec file's directory.
+
+SOURCE_TYPES = tuple(source_types())
+COMPARE_OPTIONS = ('keys', 'float_tol', 'sample_size', 'ignore_column_order', 'encode_strings', 'precheck',
+                   'tolerance', 'column_tolerances', 'backend', 'backend_options')
+
+
+@dataclass
+class SourceSpec:
+    type: str
+    params: Dict[str, Any]
+
+    @property
+    def server(self) -> Optional[str]:
+        """Database server the source connects to (None for files)."""
+        if self.type == 'sql':
+            from sqlalchemy.engine import make_url
+            url = make_url(self.params['conn_str'])
+            return f'{url.get_backend_name()}://{url.host or url.database or ""}'
+        if self.type in ('pytds', 'mssql'):
+            return f"mssql://{self.params.get('host')}"
+        return None
+
+    @property
+    def label(self) -> str:
+        target = self.params.get('path') or self.server or self.type
+        return f'{self.type}:{target}'
+
+    def load(self, **extra):
+        return get_source(self.type).load(**self.params, **extra)
+
+
+@dataclass
+class Job:
+    name: str
+    left: SourceSpec
+    right: SourceSpec
+    options: Dict[str, Any] = field(default_factory=dict)
+    export: bool = False
+
+
+def _expand(value):
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _expand(v) for k, v in value.items()}
+    return value
+
+
+def read_spec(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith(('.yaml', '.yml')):
+        if yaml is None:
+            raise ImportError("Les fichiers YAML nécessitent PyYAML (pip install pyyaml) ; utilisez un fichier JSON.")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise ValueError("Spécification invalide: liste 'jobs' attendue")
+    return spec
+
+
+def parse_source(definition: Dict[str, Any], connections: Dict[str, Dict[str, Any]], where: str,
+                 base_dir: Optional[str] = None) -> SourceSpec:
+    definition = dict(definition)
+    name = definition.pop('connection', None)
+    if name is not None:
+        if name not in connections:
+            raise ValueError(f"{where}: connexion inconnue '{name}'")
+        definition = {**connections[name], **definition}
+    source_type = definition.pop('type', None)
+    if source_type not in SOURCE_TYPES:
+        raise ValueError(f"{where}: type de source inconnu '{source_type}' (attendu: {', '.join(SOURCE_TYPES)})")
+    source = get_source(source_type)
+    aliases = source.aliases
+    params = {aliases.get(k, k): v for k, v in _expand(definition).items()}
+    if source_type == 'csv' and base_dir and isinstance(params.get('path'), str) and not os.path.isabs(params['path']):
+        params['path'] = os.path.join(base_dir, params['path'])
+    accepted = inspect.signature(source.loader).parameters
+    unknown = sorted(set(params) - set(accepted))
+    if unknown:
+        raise ValueError(f"{where}: paramètres inconnus pour '{source_type}': {unknown}")
+    missing = [p.name for p in accepted.values() if p.default is inspect.Parameter.empty and p.name not in params]
+    if missing:
+        raise ValueError(f"{where}: paramètres manquants pour '{source_type}': {missing}")
+    return SourceSpec(source_type, params)
+
+
+def parse_jobs(spec: Dict[str, Any], base_dir: Optional[str] = None) -> List[Job]:
+    """Validated jobs of a spec (errors name the job and side at fault)."""
+    connections = spec.get('connections') or {}
+    defaults = spec.get('defaults') or {}
+    jobs, names = [], set()
+    for i, entry in enumerate(spec['jobs']):
+        name = str(entry.get('name') or f'job-{i + 1}')
+        if name in names:
+            raise ValueError(f"Nom de job en double: {name}")
+        names.add(name)
+        for side in ('left', 'right'):
+            if not isinstance(entry.get(side), dict):
+                raise ValueError(f"{name}: source '{side}' manquante")
+        options = {k: v for k, v in {**defaults, **entry}.items() if k in COMPARE_OPTIONS}
+        if isinstance(options.get('keys'), str):
+            options['keys'] = [k.strip() for k in options['keys'].split(',') if k.strip()]
+        jobs.append(Job(
+            name=name,
+            left=parse_source(entry['left'], connections, f'{name}.left', base_dir),
+            right=parse_source(entry['right'], connections, f'{name}.right', base_dir),
+            options=options,
+            export=bool(entry.get('export', defaults.get('export', False))),
+        ))
+    return jobs
@@ -2,9 +2,94 @@
 from __future__ import annotations
 import pandas as pd
 import numpy as np
-from typing import List, Optional, Dict, Any
-from collections import Counter
-from ..utils.normalize import canonical_row, normalize_object_columns
+from typing import List, Optional, Dict, Any, Callable, Union
+from ..utils.normalize import decode_categoricals, encode_string_columns, float_digits, normalize_object_columns
+from ..utils.profiling import Profiler, as_profiler
+from ..utils.progress import ProgressCallback, StageProgress
+from .digest import compare_digests, table_digest
+from .fingerprint import hash_sum, row_fingerprints, multiset_difference
+from .tolerance import (ToleranceLike, match_within_tolerance, numeric_columns, resolve_tolerances,
+                        tolerant_fingerprints)
+
+# on_difference receives the differences in frames of at most this many rows
+DIFF_BATCH_ROWS = 100_000
+# comparison engines: pandas (default) or an in-process DuckDB database (duckdb_backend.py)
+BACKENDS = ('pandas', 'duckdb')
+
+def _batches(n: int):
+    for start in range(0, n, DIFF_BATCH_ROWS):
+        yield slice(start, min(start + DIFF_BATCH_ROWS, n))
+
+def round_float_columns(df: pd.DataFrame, float_tol: float) -> pd.DataFrame:
+    df2 = df.copy()
+    for c in df2.columns:
+        if pd.api.types.is_float_dtype(df2[c]):
+            df2[c] = df2[c].round(float_digits(float_tol))
+    return df2
+
+def diff_mask(left: pd.DataFrame, right: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Cell-level inequality of two aligned frames (NA vs NA counts as equal)."""
+    mask = {}
+    for c in columns:
+        both_na = left[c].isna().to_numpy() & right[c].isna().to_numpy()
+        equal = left[c].eq(right[c]).to_numpy(dtype=bool, na_value=False)
+        mask[c] = ~(equal | both_na)
+    return pd.DataFrame(mask, index=left.index, columns=list(columns))
+
+def mismatches_long(left: pd.DataFrame, right: pd.DataFrame, diff: pd.DataFrame) -> pd.DataFrame:
+    """Long-format (keys..., column, left, right) frame of every differing cell,
+    built column by column from the boolean mask, in row then column order."""
+    parts = []
+    for c in diff.columns:
+        m = diff[c].to_numpy()
+        if m.any():
+            rows = np.flatnonzero(m)
+            parts.append(pd.DataFrame({
+                '_row': rows,
+                'column': c,
+                'left': left[c].iloc[rows].to_numpy(dtype=object),
+                'right': right[c].iloc[rows].to_numpy(dtype=object),
+            }, index=left.index[rows]))
+    if not parts:
+        return pd.DataFrame(columns=list(left.index.names) + ['_row', 'column', 'left', 'right'])
+    return pd.concat(parts).sort_values('_row', kind='stable').reset_index()
+
+def mismatch_records(left: pd.DataFrame, right: pd.DataFrame, diff: pd.DataFrame,
+                     keys: List[str], positions: np.ndarray) -> List[Dict[str, Any]]:
+    """Materialize result dicts for the given row positions only."""
+    long = mismatches_long(left.iloc[positions], right.iloc[positions], diff.iloc[positions])
+    key_index = diff.index[positions]
+    records: List[Dict[str, Any]] = []
+    for row, grp in long.groupby('_row', sort=True):
+        idx = key_index[row]
+        key_vals = idx if isinstance(idx, tuple) else (idx,)
+        cols = grp['column'].tolist()
+        records.append({
+            'keys': dict(zip(keys, key_vals)),
+            'columns': cols,
+            'left_values': dict(zip(cols, grp['left'])),
+            'right_values': dict(zip(cols, grp['right'])),
+        })
+    return records
+
+def _aligned_values(index: pd.Index, common_idx: pd.Index, aligned: pd.Index,
+                    arrays: List[np.ndarray]) -> List[np.ndarray]:
+    """Reorder arrays given in ``index`` order like ``frame.loc[common_idx].sort_index()``
+    (whose index is ``aligned``)."""
+    if index.is_unique:
+        pos = index.get_indexer(aligned)
+    else:
+        pos = pd.Series(np.arange(len(index)), index=index).loc[common_idx].sort_index().to_numpy()
+    return [a[pos] for a in arrays]
+
+def harmonize_keys(left_n: pd.DataFrame, right_n: pd.DataFrame, keys: List[str]) -> List[str]:
+    """Cast keys whose dtypes differ between sides to stripped strings (in
+    place, on normalized frames) and return the common non-key columns."""
+    for k in keys:
+        if left_n[k].dtype != right_n[k].dtype:
+            left_n[k] = left_n[k].astype('string').str.strip()
+            right_n[k] = right_n[k].astype('string').str.strip()
+    return [c for c in left_n.columns if c in set(right_n.columns) and c not in keys]
 
 def compare_dataframes(
     left: pd.DataFrame,
@@ -13,7 +98,138 @@ def compare_dataframes(
     ignore_column_order: bool = True,
     float_tol: float = 1e-9,
     sample_size: int = 50,
+    on_difference: Optional[Callable[[str, pd.DataFrame], None]] = None,
+    profile: Union[bool, Profiler] = False,
+    on_stage: Optional[ProgressCallback] = None,
+    encode_strings: bool = False,
+    precheck: bool = True,
+    tolerance: Optional[ToleranceLike] = None,
+    column_tolerances: Optional[Dict[str, ToleranceLike]] = None,
+    backend: str = 'pandas',
+    backend_options: Optional[Dict[str, Any]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Compare two frames, by key or as multisets of rows when no key is given.
+
+    ``on_difference(kind, frame)``, when given, receives every difference and
+    not just the samples, in frames of at most DIFF_BATCH_ROWS rows:
+    ``'left_only'``/``'right_only'`` with the rows (or keyed rows) found on one
+    side only, ``'mismatch'`` with the long-format (keys..., column, left,
+    right) frame of differing cells. DiffSink (diff_sink.py) writes them to files.
+
+    ``profile=True`` (or a shared Profiler, or an ``on_stage`` callback) adds
+    a ``'profile'`` entry: per-stage wall time, rows and peak memory.
+
+    ``encode_strings=True`` compares text columns as integer codes over a
+    dictionary shared by both sides (encode_string_columns) instead of copying
+    them as stripped strings; values are decoded only for the reported rows.
+    The result is the same.
+
+    ``precheck=True`` first compares whole-table digests (digest.py): equal
+    tables return without the multiset difference or the key alignment, and
+    with keys only the columns whose digests differ are compared cell by
+    cell. ``res['precheck']`` holds the verdict and those columns.
+
+    ``tolerance`` (global default) and ``column_tolerances`` ({column: ...})
+    compare numeric columns within an absolute and/or relative tolerance
+    (tolerance.py: a number is absolute, or (abs, rel), or {'abs', 'rel'})
+    instead of rounding to ``float_tol``; numeric-looking text columns are
+    parsed once. Without keys, rows left over by the exact multiset difference
+    are paired greedily within tolerance (``matched_within_tolerance``).
+
+    ``backend='duckdb'`` runs the multiset difference (EXCEPT ALL) and the key
+    join (FULL OUTER JOIN) in DuckDB, multi-threaded and spilling to disk;
+    ``backend_options`` are passed to duckdb_backend.connect (``memory_limit``,
+    ``spill_dir``, ``threads``). The result is the same as with pandas.
+
+    ``on_progress`` receives an event at the end of each stage: 'stage',
+    'rows' (rows processed by the stages so far), 'rows_per_sec' and
+    'step'/'steps' out of the stages planned for this run, then a last event
+    with ``done=True``. An exception raised by the callback stops the
+    comparison (cancellation of background jobs, utils/jobs.py).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur de comparaison inconnu: {backend} (attendu: {', '.join(BACKENDS)})")
+    if backend == 'duckdb':
+        from .duckdb_backend import require_duckdb
+        require_duckdb()
+    prof = as_profiler(profile, on_stage)
+    report = prof.enabled
+    tracker = None
+    if on_progress is not None:
+        if not prof.enabled:
+            prof = Profiler(memory=None)  # stage boundaries only, not reported
+        tracker = StageProgress(on_progress, _planned_stages(
+            keys, tolerance is not None or bool(column_tolerances), precheck, on_difference is not None, backend))
+        previous = prof.on_stage
+        prof.on_stage = tracker if previous is None else lambda record: (previous(record), tracker(record))
+    try:
+        res = _compare(left, right, keys, ignore_column_order, float_tol, sample_size, on_difference, prof,
+                       encode_strings, precheck, tolerance, column_tolerances, backend, backend_options or {})
+    finally:
+        if tracker is not None:
+            prof.on_stage = previous
+    if tracker is not None:
+        tracker.finish()
+    if report:
+        res['profile'] = prof.report()
+    return res
+
+def _planned_stages(keys, tolerant: bool, precheck: bool, export: bool, backend: str) -> int:
+    """Number of distinct stages of a complete run (early exits skip some), for progress."""
+    if not keys:
+        steps = 4 + 2 * tolerant  # normalize, fingerprint, multiset difference, samples (+ numeric, tolerance_match)
+    elif backend == 'duckdb':
+        steps = 5 + tolerant      # normalize, harmonize_keys, column_hashes, full_outer_join, mismatch_records
+    else:
+        steps = 6 + tolerant      # normalize, set_index, key_difference, align, diff_mask, mismatch_records
+    return steps + precheck + export
+
+def precheck_dataframes(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    keys: Optional[List[str]] = None,
+    ignore_column_order: bool = True,
+    float_tol: float = 1e-9,
 ) -> Dict[str, Any]:
+    """Cheap "are these equal?": digests of both sides, no merge nor alignment.
+    ``'equal'`` is True/False as compare_dataframes' ``data_equal`` would be,
+    or None when only the detailed comparison can tell (duplicate or float
+    keys, mixed-type columns). See compare_digests for the other entries."""
+    left_n = normalize_object_columns(left)
+    right_n = normalize_object_columns(right)
+    columns_equal = set(left_n.columns) == set(right_n.columns)
+    if keys:
+        if any(k not in left_n.columns or k not in right_n.columns for k in keys):
+            return {'equal': False, 'rows_equal': len(left) == len(right), 'columns_equal': columns_equal,
+                    'keys_equal': False, 'differing_columns': [], 'null_counts': {}}
+        cols = harmonize_keys(left_n, right_n, keys)
+    elif not columns_equal:
+        return {'equal': False, 'rows_equal': len(left) == len(right), 'columns_equal': False,
+                'keys_equal': None, 'differing_columns': [], 'null_counts': {}}
+    else:
+        cols = sorted(left_n.columns) if ignore_column_order else list(left_n.columns)
+    shared: Dict[int, np.ndarray] = {}
+    check = compare_digests(table_digest(left_n, keys, cols, float_tol, shared),
+                            table_digest(right_n, keys, cols, float_tol, shared))
+    check['columns_equal'] = columns_equal
+    if not columns_equal:
+        check['equal'] = False
+    return check
+
+def tables_equal(left: pd.DataFrame, right: pd.DataFrame, keys: Optional[List[str]] = None,
+                 ignore_column_order: bool = True, float_tol: float = 1e-9) -> bool:
+    """precheck_dataframes' verdict, falling back to compare_dataframes when the digests cannot decide."""
+    equal = precheck_dataframes(left, right, keys, ignore_column_order, float_tol)['equal']
+    if equal is None:
+        equal = compare_dataframes(left, right, keys, ignore_column_order, float_tol, sample_size=0,
+                                   precheck=False)['data_equal']
+    return bool(equal)
+
+def _compare(left, right, keys, ignore_column_order, float_tol, sample_size, on_difference,
+             prof: Profiler, encode_strings: bool = False, precheck: bool = True,
+             tolerance=None, column_tolerances=None, backend: str = 'pandas',
+             backend_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     res: Dict[str, Any] = {}
     res['left_count'] = int(len(left))
     res['right_count'] = int(len(right))
@@ -24,8 +240,14 @@ def compare_dataframes(
     res['data_equal'] = False
     res['differences'] = {}
 
-    left_n = normalize_object_columns(left)
-    right_n = normalize_object_columns(right)
+    with prof.stage('encode' if encode_strings else 'normalize', rows=len(left) + len(right)):
+        if encode_strings:
+            left_n, right_n = encode_string_columns(left, right, sorted_columns=keys or ())
+        else:
+            left_n = normalize_object_columns(left)
+            right_n = normalize_object_columns(right)
+    tolerances = resolve_tolerances([c for c in left_n.columns if c in right_n.columns and c not in (keys or ())],
+                                    tolerance, column_tolerances)
 
     if not keys:
         if not res['columns_equal']:
@@ -33,73 +255,155 @@ def compare_dataframes(
             res['differences']['missing_in_right'] = list(set(res['left_columns']) - set(res['right_columns']))
             return res
         cols = sorted(left_n.columns) if ignore_column_order else list(left_n.columns)
-        left_fps = [canonical_row(r, cols, float_tol=float_tol, ignore_column_order=False) for _, r in left_n[cols].iterrows()]
-        right_fps = [canonical_row(r, cols, float_tol=float_tol, ignore_column_order=False) for _, r in right_n[cols].iterrows()]
-        c_left = Counter(left_fps)
-        c_right = Counter(right_fps)
-        res['data_equal'] = (c_left == c_right)
-        only_left_counter = c_left - c_right
-        only_right_counter = c_right - c_left
-        res['differences']['only_in_left_count'] = sum(only_left_counter.values())
-        res['differences']['only_in_right_count'] = sum(only_right_counter.values())
-        # anti-join samples: cast to str for join keys to avoid dtype mismatches
-        left_s = left_n[cols].copy()
-        right_s = right_n[cols].copy()
-        for c in cols:
-            left_s[c] = left_s[c].astype(str)
-            right_s[c] = right_s[c].astype(str)
-        merged_lr = left_s.merge(right_s, how='outer', indicator=True, on=cols)
-        only_left_df = merged_lr[merged_lr['_merge'] == 'left_only'][cols]
-        only_right_df = merged_lr[merged_lr['_merge'] == 'right_only'][cols]
-        res['differences']['only_in_left_sample'] = only_left_df.head(sample_size).to_dict(orient='records')
-        res['differences']['only_in_right_sample'] = only_right_df.head(sample_size).to_dict(orient='records')
+        numeric = {}
+        if tolerances:
+            with prof.stage('numeric', rows=len(left_n) + len(right_n)):
+                numeric = numeric_columns(left_n, right_n, tolerances)
+        with prof.stage('fingerprint', rows=len(left_n) + len(right_n)):
+            shared: Dict[int, np.ndarray] = {}  # shared dictionaries are hashed once
+            if numeric:
+                # exact values here; groups (non-numeric columns) for the tolerance pass
+                left_fps, left_groups = tolerant_fingerprints(
+                    left_n, cols, {c: v[0] for c, v in numeric.items()}, float_tol, shared)
+                right_fps, right_groups = tolerant_fingerprints(
+                    right_n, cols, {c: v[1] for c, v in numeric.items()}, float_tol, shared)
+            else:
+                left_fps = row_fingerprints(left_n, cols, float_tol=float_tol, category_hashes=shared)
+                right_fps = row_fingerprints(right_n, cols, float_tol=float_tol, category_hashes=shared)
+        if precheck and res['row_count_equal']:
+            with prof.stage('digest', rows=len(left_fps) + len(right_fps)):
+                equal = hash_sum(left_fps) == hash_sum(right_fps)
+            res['precheck'] = {'equal': equal, 'differing_columns': None}
+            if equal:
+                res['data_equal'] = True
+                res['differences'].update(only_in_left_count=0, only_in_right_count=0,
+                                          only_in_left_sample=[], only_in_right_sample=[])
+                return res
+        if backend == 'duckdb':
+            from .duckdb_backend import connect, multiset_difference_sql  # imported on demand: duckdb is optional
+            with prof.stage('except_all', rows=len(left_fps) + len(right_fps)), connect(**backend_options) as con:
+                only_left_pos, only_right_pos = multiset_difference_sql(con, left_fps, right_fps)
+        else:
+            with prof.stage('multiset_difference', rows=len(left_fps) + len(right_fps)):
+                only_left_pos, only_right_pos = multiset_difference(left_fps, right_fps)
+        if numeric:
+            matched = 0
+            if len(only_left_pos) and len(only_right_pos):
+                with prof.stage('tolerance_match', rows=len(only_left_pos) + len(only_right_pos)):
+                    names = list(numeric)
+                    ml, mr = match_within_tolerance(
+                        np.column_stack([numeric[c][0][only_left_pos] for c in names]),
+                        np.column_stack([numeric[c][1][only_right_pos] for c in names]),
+                        [numeric[c][2] for c in names], left_groups[only_left_pos], right_groups[only_right_pos])
+                    only_left_pos = np.delete(only_left_pos, ml)
+                    only_right_pos = np.delete(only_right_pos, mr)
+                    matched = len(ml)
+            res['differences']['matched_within_tolerance'] = int(matched)
+        res['data_equal'] = len(only_left_pos) == 0 and len(only_right_pos) == 0
+        res['differences']['only_in_left_count'] = int(len(only_left_pos))
+        res['differences']['only_in_right_count'] = int(len(only_right_pos))
+        # rebuild full rows only for the sampled differences (values cast to str for display)
+        with prof.stage('samples', rows=min(len(only_left_pos), sample_size) + min(len(only_right_pos), sample_size)):
+            only_left_df = left_n.iloc[only_left_pos[:sample_size]][cols].astype(str)
+            only_right_df = right_n.iloc[only_right_pos[:sample_size]][cols].astype(str)
+            res['differences']['only_in_left_sample'] = only_left_df.to_dict(orient='records')
+            res['differences']['only_in_right_sample'] = only_right_df.to_dict(orient='records')
+        if on_difference is not None:
+            with prof.stage('on_difference', rows=len(only_left_pos) + len(only_right_pos)):
+                for kind, frame, pos in (('left_only', left_n, only_left_pos), ('right_only', right_n, only_right_pos)):
+                    for part in _batches(len(pos)):
+                        on_difference(kind, decode_categoricals(frame.iloc[pos[part]][cols]))
         return res
     else:
         for k in keys:
             if k not in left_n.columns or k not in right_n.columns:
                 res['differences']['missing_key'] = f"Colonne clé manquante: {k}"
                 return res
-        # Harmonize dtypes of keys by casting to string
-        for k in keys:
-            if left_n[k].dtype != right_n[k].dtype:
-                left_n[k] = left_n[k].astype('string').str.strip()
-                right_n[k] = right_n[k].astype('string').str.strip()
-        non_key_cols = [c for c in set(left_n.columns).intersection(set(right_n.columns)) if c not in keys]
-        left_k = left_n.set_index(keys)
-        right_k = right_n.set_index(keys)
-        left_only_keys = left_k.index.difference(right_k.index)
-        right_only_keys = right_k.index.difference(left_k.index)
+        n_rows = len(left_n) + len(right_n)
+        with prof.stage('set_index' if backend == 'pandas' else 'harmonize_keys', rows=n_rows):
+            non_key_cols = harmonize_keys(left_n, right_n, keys)
+            if backend == 'pandas':
+                left_k = left_n.set_index(keys)
+                right_k = right_n.set_index(keys)
+        res['columns_equal'] = set(left_n.columns) == set(right_n.columns)
+        numeric = {}
+        if tolerances:
+            with prof.stage('numeric', rows=n_rows):
+                numeric = numeric_columns(left_n, right_n, tolerances)
+        check = None
+        if precheck and res['row_count_equal']:
+            with prof.stage('digest', rows=n_rows):
+                shared: Dict[int, np.ndarray] = {}
+                exact_cols = [c for c in non_key_cols if c not in numeric]
+                check = compare_digests(table_digest(left_n, keys, exact_cols, float_tol, shared),
+                                        table_digest(right_n, keys, exact_cols, float_tol, shared))
+            if numeric:
+                # columns compared within tolerance always go through the detailed stage
+                check['differing_columns'] = [c for c in non_key_cols if c in numeric or c in check['differing_columns']]
+                check['equal'] = None if check['equal'] is not False else False
+            res['precheck'] = {'equal': check['equal'] and res['columns_equal'],
+                               'differing_columns': check['differing_columns'] if check['keys_equal'] else None}
+        keys_equal = check is not None and check['keys_equal']
+        if keys_equal:
+            # same unique keys: nothing on one side only, and matching columns need no cell comparison
+            non_key_cols = check['differing_columns']
+            if not non_key_cols:
+                res['differences'].update(left_only_keys_count=0, right_only_keys_count=0,
+                                          mismatched_rows_count=0, mismatched_rows_sample=[])
+                res['data_equal'] = res['columns_equal']
+                return res
+        if backend == 'duckdb':
+            from .duckdb_backend import column_hashes_sql
+            with prof.stage('column_hashes', rows=n_rows):
+                hashes = column_hashes_sql(left_n, right_n, [c for c in non_key_cols if c not in numeric], float_tol)
+            out = None if hashes is None else _compare_keyed_sql(
+                res, left_n, right_n, keys, non_key_cols, hashes, numeric, float_tol, sample_size, on_difference,
+                prof, backend_options)
+            if out is not None:
+                return out
+            # a column mixing types (no exact hash) or duplicate keys: pandas alignment
+            with prof.stage('set_index', rows=n_rows):
+                left_k = left_n.set_index(keys)
+                right_k = right_n.set_index(keys)
+        if keys_equal:
+            left_only_keys = right_only_keys = left_k.index[:0]
+            common_idx = left_k.index
+        else:
+            with prof.stage('key_difference', rows=n_rows):
+                left_only_keys = left_k.index.difference(right_k.index)
+                right_only_keys = right_k.index.difference(left_k.index)
+                common_idx = left_k.index.intersection(right_k.index)
         res['differences']['left_only_keys_count'] = int(len(left_only_keys))
         res['differences']['right_only_keys_count'] = int(len(right_only_keys))
-        common_idx = left_k.index.intersection(right_k.index)
-        left_common = left_k.loc[common_idx, non_key_cols].sort_index()
-        right_common = right_k.loc[common_idx, non_key_cols].sort_index()
-        def round_floats(df):
-            df2 = df.copy()
-            for c in df2.columns:
-                if pd.api.types.is_float_dtype(df2[c]):
-                    df2[c] = df2[c].round(int(abs(np.log10(float_tol))) if float_tol > 0 else 9)
-            return df2
-        left_common_r = round_floats(left_common)
-        right_common_r = round_floats(right_common)
-        equal_mask = left_common_r.eq(right_common_r)
-        mismatch_rows = ~equal_mask.all(axis=1)
-        mismatches = []
-        for idx in left_common_r.index[mismatch_rows]:
-            row_left = left_common_r.loc[idx]
-            row_right = right_common_r.loc[idx]
-            diff_cols = [c for c in non_key_cols if (pd.isna(row_left[c]) != pd.isna(row_right[c])) or (row_left[c] != row_right[c])]
-            if diff_cols:
-                key_vals = idx if isinstance(idx, tuple) else (idx,)
-                mismatches.append({
-                    'keys': dict(zip(keys, key_vals)),
-                    'columns': diff_cols,
-                    'left_values': {c: row_left[c] for c in diff_cols},
-                    'right_values': {c: row_right[c] for c in diff_cols},
-                })
-        res['differences']['mismatched_rows_count'] = len(mismatches)
-        res['differences']['mismatched_rows_sample'] = mismatches[:sample_size]
-        res['columns_equal'] = set(left_n.columns) == set(right_n.columns)
+        tolerant = [c for c in non_key_cols if c in numeric]
+        with prof.stage('align', rows=2 * len(common_idx)):
+            left_common = left_k.loc[common_idx, non_key_cols].sort_index()
+            right_common = right_k.loc[common_idx, non_key_cols].sort_index()
+            left_common_r = round_float_columns(left_common, float_tol)
+            right_common_r = round_float_columns(right_common, float_tol)
+            if tolerant:
+                # parsed values, aligned the same way (the frames keep the original ones for display)
+                left_num = _aligned_values(left_k.index, common_idx, left_common.index, [numeric[c][0] for c in tolerant])
+                right_num = _aligned_values(right_k.index, common_idx, right_common.index, [numeric[c][1] for c in tolerant])
+        with prof.stage('diff_mask', rows=len(common_idx)):
+            diff = diff_mask(left_common_r, right_common_r, [c for c in non_key_cols if c not in numeric])
+            for i, c in enumerate(tolerant):
+                diff[c] = ~numeric[c][2].close(left_num[i], right_num[i])
+            diff = diff[non_key_cols]
+            mismatch_pos = np.flatnonzero(diff.any(axis=1).to_numpy())
+        res['differences']['mismatched_rows_count'] = int(len(mismatch_pos))
+        with prof.stage('mismatch_records', rows=min(len(mismatch_pos), sample_size)):
+            res['differences']['mismatched_rows_sample'] = mismatch_records(
+                left_common_r, right_common_r, diff, keys, mismatch_pos[:sample_size])
+        if on_difference is not None:
+            with prof.stage('on_difference', rows=len(left_only_keys) + len(right_only_keys) + len(mismatch_pos)):
+                for kind, frame, only in (('left_only', left_k, left_only_keys), ('right_only', right_k, right_only_keys)):
+                    for part in _batches(len(only)):
+                        on_difference(kind, decode_categoricals(frame.loc[only[part]].reset_index()))
+                for part in _batches(len(mismatch_pos)):
+                    rows = mismatch_pos[part]
+                    long = mismatches_long(left_common_r.iloc[rows], right_common_r.iloc[rows], diff.iloc[rows])
+                    on_difference('mismatch', decode_categoricals(long.drop(columns='_row')))
         res['data_equal'] = (
             res['columns_equal'] and
             res['differences']['left_only_keys_count'] == 0 and
@@ -107,3 +411,47 @@ def compare_dataframes(
             res['differences']['mismatched_rows_count'] == 0
         )
         return res
+
+def _compare_keyed_sql(res, left_n, right_n, keys, non_key_cols, hashes, numeric, float_tol, sample_size,
+                       on_difference, prof: Profiler, backend_options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Keyed comparison with the DuckDB backend: the join gives row positions,
+    the reported rows are rebuilt from them as the pandas path builds them.
+    None (nothing filled in) when keys are not unique."""
+    from .duckdb_backend import connect, keyed_difference_sql
+    tolerant = [c for c in non_key_cols if c in numeric]
+    with prof.stage('full_outer_join', rows=len(left_n) + len(right_n)), connect(**backend_options) as con:
+        kd = keyed_difference_sql(con, left_n, right_n, keys, hashes, {c: numeric[c] for c in tolerant})
+    if kd is None:
+        return None
+    res['differences']['left_only_keys_count'] = kd.left_only_keys
+    res['differences']['right_only_keys_count'] = kd.right_only_keys
+    res['differences']['mismatched_rows_count'] = int(len(kd.mismatch_left_pos))
+
+    def pairs(part):
+        lpos, rpos = kd.mismatch_left_pos[part], kd.mismatch_right_pos[part]
+        left_r = round_float_columns(left_n.iloc[lpos].set_index(keys)[non_key_cols], float_tol)
+        right_r = round_float_columns(right_n.iloc[rpos].set_index(keys)[non_key_cols], float_tol)
+        right_r.index = left_r.index  # same keys, row by row
+        diff = diff_mask(left_r, right_r, [c for c in non_key_cols if c not in numeric])
+        for c in tolerant:
+            diff[c] = ~numeric[c][2].close(numeric[c][0][lpos], numeric[c][1][rpos])
+        return left_r, right_r, diff[non_key_cols]
+
+    with prof.stage('mismatch_records', rows=min(len(kd.mismatch_left_pos), sample_size)):
+        left_r, right_r, diff = pairs(slice(0, sample_size))
+        res['differences']['mismatched_rows_sample'] = mismatch_records(left_r, right_r, diff, keys,
+                                                                        np.arange(len(diff)))
+    if on_difference is not None:
+        with prof.stage('on_difference', rows=len(kd.left_only_pos) + len(kd.right_only_pos) + len(kd.mismatch_left_pos)):
+            for kind, frame, pos in (('left_only', left_n, kd.left_only_pos), ('right_only', right_n, kd.right_only_pos)):
+                columns = keys + [c for c in frame.columns if c not in keys]  # keys first, as reset_index puts them
+                for part in _batches(len(pos)):
+                    on_difference(kind, decode_categoricals(frame.iloc[pos[part]][columns].reset_index(drop=True)))
+            for part in _batches(len(kd.mismatch_left_pos)):
+                long = mismatches_long(*pairs(part))
+                on_difference('mismatch', decode_categoricals(long.drop(columns='_row')))
+    res['data_equal'] = (
+        res['columns_equal'] and
+        kd.left_only_keys == 0 and kd.right_only_keys == 0 and len(kd.mismatch_left_pos) == 0
+    )
+    return res
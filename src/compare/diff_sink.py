@@ -0,0 +1,153 @@
+from __future__ import annotations
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV output only
+    pa = None
+
+# Complete diff export. A DiffSink is an ``on_difference(kind, frame)``
+# callback (compare_dataframes, compare_sorted_streams, compare_partitioned):
+# every left-only, right-only and mismatched row is appended to one file per
+# kind as it is found, in batches of ``batch_rows`` rows, so the full diff
+# never has to be held in memory. Values are written as text (NA kept as
+# null / empty), which gives every batch of a kind the same schema whatever
+# the dtypes of the chunk it came from.
+
+KINDS = ('left_only', 'right_only', 'mismatch')
+FORMATS = ('parquet', 'csv')
+PARQUET_AVAILABLE = pa is not None
+EXPORT_PREFIX = 'comparateur-diff-'
+EXPORT_TTL_SECONDS = 24 * 3600
+
+
+class DiffSink:
+    """Streams differences to ``{prefix}{kind}.parquet`` / ``.csv`` files in ``directory``."""
+
+    def __init__(self, directory: str, fmt: str = 'parquet', batch_rows: int = 100_000, prefix: str = ''):
+        if fmt not in FORMATS:
+            raise ValueError(f"Format d'export inconnu: {fmt} (attendu: parquet ou csv)")
+        if fmt == 'parquet' and not PARQUET_AVAILABLE:
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow) ; utilisez fmt='csv'.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.prefix = prefix
+        self.rows: Dict[str, int] = {k: 0 for k in KINDS}
+        self._columns: Dict[str, List[str]] = {}
+        self._pending: Dict[str, List[pd.DataFrame]] = {k: [] for k in KINDS}
+        self._pending_rows: Dict[str, int] = {k: 0 for k in KINDS}
+        self._writers: Dict[str, Any] = {}
+        self.closed = False
+
+    def path(self, kind: str) -> str:
+        return os.path.join(self.directory, f'{self.prefix}{kind}.{self.fmt}')
+
+    def __call__(self, kind: str, frame: pd.DataFrame) -> None:
+        if kind not in KINDS:
+            raise ValueError(f"Type de différence inconnu: {kind}")
+        if self.closed:
+            raise ValueError('DiffSink déjà fermé')
+        if len(frame) == 0:
+            return
+        columns = [str(c) for c in frame.columns]
+        expected = self._columns.setdefault(kind, columns)
+        if columns != expected:
+            raise ValueError(f"Colonnes incohérentes pour '{kind}': {columns} au lieu de {expected}")
+        self.rows[kind] += len(frame)
+        # small frames (streamed chunks) are grouped, large ones written in slices
+        for start in range(0, len(frame), self.batch_rows):
+            part = frame.iloc[start:start + self.batch_rows]
+            self._pending[kind].append(part)
+            self._pending_rows[kind] += len(part)
+            if self._pending_rows[kind] >= self.batch_rows:
+                self._flush(kind)
+
+    def _flush(self, kind: str) -> None:
+        if not self._pending[kind]:
+            return
+        parts = self._pending[kind]
+        frame = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        self._pending[kind], self._pending_rows[kind] = [], 0
+        text = frame.astype('string').reset_index(drop=True)
+        text.columns = self._columns[kind]
+        if self.fmt == 'csv':
+            first = kind not in self._writers
+            if first:
+                self._writers[kind] = open(self.path(kind), 'w', encoding='utf-8', newline='')
+            text.to_csv(self._writers[kind], header=first, index=False)
+            return
+        schema = pa.schema([(c, pa.string()) for c in self._columns[kind]])
+        if kind not in self._writers:
+            self._writers[kind] = pq.ParquetWriter(self.path(kind), schema)
+        self._writers[kind].write_table(pa.Table.from_pandas(text, schema=schema, preserve_index=False))
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """Flush and close the files; returns {kind: {'path', 'rows'}} for the
+        kinds that had differences."""
+        if not self.closed:
+            for kind in KINDS:
+                self._flush(kind)
+            for writer in self._writers.values():
+                writer.close()
+            self.closed = True
+        return self.files
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        return {k: {'path': self.path(k), 'rows': self.rows[k]} for k in KINDS if k in self._writers}
+
+    def __enter__(self) -> 'DiffSink':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_diff(path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+    """Load (the first ``nrows`` rows of) an exported diff file."""
+    if path.endswith('.parquet'):
+        if nrows is None:
+            return pd.read_parquet(path)
+        reader = pq.ParquetFile(path)
+        batch = next(reader.iter_batches(batch_size=nrows), None)
+        return batch.to_pandas() if batch is not None else reader.schema_arrow.empty_table().to_pandas()
+    return pd.read_csv(path, dtype='string', keep_default_na=False, na_values=[''], nrows=nrows)
+
+
+def export_dir() -> str:
+    """New private temporary directory for one comparison's diff files."""
+    return tempfile.mkdtemp(prefix=EXPORT_PREFIX)
+
+
+def remove_stale_exports(max_age: float = EXPORT_TTL_SECONDS, directory: Optional[str] = None) -> List[str]:
+    """Remove the export directories (export_dir) of ``directory`` (default:
+    the system temp dir) not written to for ``max_age`` seconds, e.g. left
+    behind by sessions that ended or crashed. Returns the removed paths."""
+    directory = directory or tempfile.gettempdir()
+    now = time.time()
+    removed = []
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith(EXPORT_PREFIX)]
+    except OSError:
+        return removed
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            if not os.path.isdir(path) or os.path.islink(path):
+                continue
+            # last write: the directory itself or any file it holds
+            last = max([os.path.getmtime(path)] + [e.stat().st_mtime for e in os.scandir(path)])
+        except OSError:
+            continue  # removed meanwhile
+        if now - last > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
@@ -0,0 +1,117 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .fingerprint import EXACT_NA, NA_HASH, column_hashes, combine_hashes, exact_column_hashes, hash_sum, mix_hashes
+
+# Whole-table digests: an order-independent summary of a frame (row count,
+# sum of mixed row hashes, per-column null counts and value digests) that two
+# sides can be checked against before any merge or alignment.
+#   - without keys, rows are the canonical fingerprints of row_fingerprints, so
+#     equal digests mean equal multisets of rows (the keyless comparison);
+#   - with keys, each column digest sums the hashes of its (key, column, value)
+#     triples (exact_column_hashes), so once the key sets match, the columns
+#     whose digests match are equal row by row and need no detailed comparison.
+# Like the row fingerprints, digests are 64-bit: a collision is possible in
+# theory and would make two different tables look equal.
+
+
+@dataclass
+class TableDigest:
+    rows: int
+    columns: List[str]
+    keys: List[str]
+    digest: Optional[int]                     # None: some column has no exact hash
+    key_digest: Optional[int]                 # keyed digests only
+    unique_keys: bool
+    null_counts: Dict[str, int]
+    column_digests: Dict[str, Optional[int]]  # None: compared in detail only
+
+
+def _key_hashes(df: pd.DataFrame, keys: List[str], category_hashes) -> Optional[np.ndarray]:
+    parts = []
+    for k in keys:
+        # index lookups do not round floats, so float keys are left to the detailed stage
+        h = None if pd.api.types.is_float_dtype(df[k].dtype) else exact_column_hashes(df[k], category_hashes=category_hashes)
+        if h is None:
+            return None
+        parts.append(h)
+    return combine_hashes(parts, len(df))
+
+
+def table_digest(df: pd.DataFrame, keys: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+                 float_tol: float = 1e-9, category_hashes: Optional[Dict[int, np.ndarray]] = None) -> TableDigest:
+    """Digest of ``df[columns]`` (all non-key columns by default). Frames are
+    expected normalized as compare_dataframes does (stripped text, harmonized keys)."""
+    keys = list(keys or [])
+    columns = [c for c in (df.columns if columns is None else columns) if c not in keys]
+    n = len(df)
+    if not keys:
+        hashes = [column_hashes(df[c], float_tol=float_tol, category_hashes=category_hashes) for c in columns]
+        # nulls are read off the hashes ('<<NA>>' strings count, as canonical_cell confuses them)
+        return TableDigest(n, columns, [], hash_sum(combine_hashes(hashes, n)), None, True,
+                           {c: int((h == NA_HASH).sum()) for c, h in zip(columns, hashes)},
+                           {c: hash_sum(h) for c, h in zip(columns, hashes)})
+    null_counts: Dict[str, int] = {}
+    key_h = _key_hashes(df, keys, category_hashes)
+    if key_h is None:
+        return TableDigest(n, columns, keys, None, None, False, {c: int(df[c].isna().sum()) for c in columns},
+                           dict.fromkeys(columns))
+    exact_memo: Dict[int, np.ndarray] = {}
+    row_acc = np.zeros(n, dtype='uint64')
+    column_digests: Dict[str, Optional[int]] = {}
+    for c in columns:
+        h = exact_column_hashes(df[c], float_tol=float_tol, category_hashes=exact_memo)
+        if h is None:
+            null_counts[c] = int(df[c].isna().sum())
+            column_digests[c] = None
+            continue
+        null_counts[c] = int((h == EXACT_NA).sum())
+        # the column name is part of the triple: values swapped between columns change the row hash
+        name = pd.util.hash_array(np.array([str(c)], dtype=object), categorize=False)[0]
+        pair = mix_hashes(combine_hashes([key_h, h, name], n))
+        column_digests[c] = int(pair.sum(dtype='uint64'))
+        row_acc += pair
+    complete = all(d is not None for d in column_digests.values())
+    return TableDigest(n, columns, keys, hash_sum(row_acc) if complete else None, hash_sum(key_h),
+                       bool(pd.Index(key_h).is_unique), null_counts, column_digests)
+
+
+def compare_digests(left: TableDigest, right: TableDigest) -> Dict[str, Any]:
+    """Verdict of two digests. ``'equal'`` is True or False when the digests
+    decide, None when only the detailed comparison can (duplicate or float keys,
+    columns without exact hash). ``'keys_equal'`` (keyed digests) tells that
+    both sides hold the same unique keys; ``'differing_columns'`` lists the
+    common columns whose digests differ or are unknown."""
+    right_cols = set(right.columns)
+    common = [c for c in left.columns if c in right_cols]
+    rows_equal = left.rows == right.rows
+    columns_equal = set(left.columns) == right_cols
+    unknown = {c for c in common if left.column_digests[c] is None or right.column_digests[c] is None}
+    differing = [c for c in common if c in unknown or left.column_digests[c] != right.column_digests[c]]
+    out: Dict[str, Any] = {
+        'rows_equal': rows_equal,
+        'columns_equal': columns_equal,
+        'keys_equal': None,
+        'differing_columns': differing,
+        'null_counts': {c: (left.null_counts[c], right.null_counts[c]) for c in common
+                        if left.null_counts[c] != right.null_counts[c]},
+    }
+    if not left.keys:
+        out['equal'] = rows_equal and columns_equal and left.digest == right.digest
+        return out
+    unique = left.unique_keys and right.unique_keys
+    out['keys_equal'] = unique and rows_equal and left.key_digest is not None and left.key_digest == right.key_digest
+    if not columns_equal:
+        out['equal'] = False
+    elif not unique:
+        out['equal'] = None
+    elif not out['keys_equal']:
+        # unique keys but different key sets: some key is on one side only
+        out['equal'] = False if left.key_digest is not None else None
+    elif unknown:
+        out['equal'] = None if unknown.issuperset(differing) else False
+    else:
+        out['equal'] = not differing
+    return out
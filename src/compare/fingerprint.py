@@ -0,0 +1,243 @@
+from __future__ import annotations
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from ..utils.normalize import float_digits, isoformat_datetimes
+
+# Columnar equivalent of canonical_row/canonical_cell: every cell is reduced to
+# a 64-bit hash of its canonical value, then cells are combined per row.
+# Canonical classes (same equalities as the tuples built by canonical_row):
+#   - NA (and the literal '<<NA>>' string, which canonical_cell confuses with NA)
+#   - integers, bools and integer-valued floats -> hashed as int64
+#   - other floats (rounded to float_tol)        -> hashed as float64 bits
+#   - everything else                            -> hashed as stripped string
+
+_FLOAT_TAG = np.uint64(0xC2B2AE3D27D4EB4F)
+# exact_column_hashes: text and datetimes never equal numbers; NA only equals NA
+_TEXT_TAG = np.uint64(0x9E3779B97F4A7C15)
+_DATETIME_TAG = np.uint64(0xD6E8FEB86659FD93)
+EXACT_NA = np.uint64(0x5851F42D4C957F2D)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_BIGINT_KEY = '0123456789abcdef'
+_INT64_BOUND = 2.0 ** 63
+# ASCII spellings of what canonical_cell turns into int / float; no leading-zero codes
+_INT_RE = r'^(?:0|-?[1-9][0-9]{0,17}|-0[0-9]{0,17})$'
+_FLOAT_RE = r'^[-+]?(?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+(?=[eE]))(?:[eE][-+]?[0-9]+)?$'
+_EXOTIC_RE = r'[^\x00-\x7f]|_|[0-9]{19}'
+
+
+def _hash_strings(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+NA_HASH = _hash_strings(['<<NA>>'])[0]
+
+
+def _hash_ints(values: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(values.astype('int64', copy=False))
+
+
+def _hash_floats(values: np.ndarray, float_tol: float) -> np.ndarray:
+    """Round like canonical_cell, then hash integer-valued results as ints.
+    np.round may differ from Python's round() on exact .5 ties at the last
+    decimal; every other value lands in the same class as canonical_cell.
+    """
+    r = np.round(values.astype('float64', copy=False), float_digits(float_tol))
+    with np.errstate(invalid='ignore'):
+        integral = np.isfinite(r) & (r == np.trunc(r)) & (np.abs(r) < _INT64_BOUND)
+    out = np.empty(len(r), dtype='uint64')
+    out[integral] = _hash_ints(r[integral])
+    if not integral.all():
+        out[~integral] = pd.util.hash_array(r[~integral]) ^ _FLOAT_TAG
+    return out
+
+
+def _hash_pyint(value: int) -> np.uint64:
+    if -2 ** 63 <= value < 2 ** 63:
+        return _hash_ints(np.array([value], dtype='int64'))[0]
+    if float(value) == value:
+        return (pd.util.hash_array(np.array([float(value)])) ^ _FLOAT_TAG)[0]
+    return pd.util.hash_array(np.array([str(value)], dtype=object), hash_key=_BIGINT_KEY, categorize=False)[0]
+
+
+def _hash_scalar(value, float_tol: float) -> np.uint64:
+    """Per-value fallback mirroring canonical_cell, for odd objects only."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return NA_HASH
+    if isinstance(value, (bool, np.bool_)):
+        return _hash_pyint(int(value))
+    if isinstance(value, (np.integer, int)):
+        return _hash_pyint(int(value))
+    if isinstance(value, (np.floating, float)):
+        return _hash_floats(np.array([float(value)]), float_tol)[0]
+    if isinstance(value, pd.Timestamp):
+        return _hash_strings([value.isoformat()])[0]
+    s = str(value).strip()
+    has_leading_zero = len(s) > 1 and s[0] == '0' and s[1:].isdigit()
+    if s and not has_leading_zero:
+        try:
+            if '.' in s or 'e' in s.lower():
+                return _hash_floats(np.array([float(s)]), float_tol)[0]
+            if s.lstrip('-').isdigit():
+                return _hash_pyint(int(s))
+        except Exception:
+            pass
+    return _hash_strings([s])[0]
+
+
+def _hash_string_values(values: np.ndarray, float_tol: float) -> np.ndarray:
+    """Vectorized canonical_cell for an array of distinct Python strings."""
+    s = pd.Series(values, dtype=object).str.strip()
+    out = _hash_strings(s.to_numpy())
+    is_int = s.str.match(_INT_RE).to_numpy(dtype=bool)
+    if is_int.any():
+        out[is_int] = _hash_ints(s[is_int].to_numpy().astype('int64'))
+    rest = s[~is_int]
+    is_float = rest.str.match(_FLOAT_RE).to_numpy(dtype=bool)
+    if is_float.any():
+        out[np.flatnonzero(~is_int)[is_float]] = _hash_floats(rest[is_float].to_numpy().astype('float64'), float_tol)
+    # Spellings Python accepts but the regexes do not ('1_000', unicode digits, huge ints...)
+    rest = rest[~is_float]
+    exotic = rest.str.contains(_EXOTIC_RE).to_numpy(dtype=bool)
+    if exotic.any():
+        out[np.flatnonzero(~is_int)[~is_float][exotic]] = [_hash_scalar(v, float_tol) for v in rest[exotic]]
+    return out
+
+
+def _hash_unique_values(uniques, float_tol: float) -> np.ndarray:
+    if isinstance(uniques, pd.DatetimeIndex) and uniques.tz is None:
+        return _hash_strings(isoformat_datetimes(uniques.to_numpy()))
+    values = np.asarray(uniques, dtype=object)
+    is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    out = np.empty(len(values), dtype='uint64')
+    if is_str.any():
+        out[is_str] = _hash_string_values(values[is_str], float_tol)
+    if not is_str.all():
+        out[~is_str] = [_hash_scalar(v, float_tol) for v in values[~is_str]]
+    return out
+
+
+def column_hashes(col: pd.Series, float_tol: float = 1e-9,
+                  category_hashes: Optional[Dict[int, np.ndarray]] = None) -> np.ndarray:
+    """One uint64 per cell; equal hashes <=> equal canonical_cell values.
+    ``category_hashes`` memoizes the hashes of categorical dictionaries (by
+    identity) across calls on frames that share a CategoricalDtype."""
+    dtype = col.dtype
+    if pd.api.types.is_bool_dtype(dtype) or (pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_unsigned_integer_dtype(dtype)):
+        na = col.isna().to_numpy()
+        out = _hash_ints(col.to_numpy(dtype='int64', na_value=0))
+    elif pd.api.types.is_float_dtype(dtype):
+        values = col.to_numpy(dtype='float64', na_value=np.nan)
+        na = np.isnan(values)
+        out = _hash_floats(np.where(na, 0.0, values), float_tol)
+    elif isinstance(dtype, pd.CategoricalDtype):
+        # dictionary-encoded: hash each category once, then gather by code
+        codes = col.cat.codes.to_numpy()
+        na = codes < 0
+        cats = dtype.categories
+        memo = category_hashes if category_hashes is not None else {}
+        if id(cats) not in memo:
+            memo[id(cats)] = _hash_unique_values(cats, float_tol) if len(cats) else np.zeros(1, dtype='uint64')
+        out = memo[id(cats)][np.where(na, 0, codes)]
+    else:
+        codes, uniques = pd.factorize(col, sort=False)
+        na = codes < 0
+        out = _hash_unique_values(uniques, float_tol)[np.where(na, 0, codes)] if len(uniques) else np.zeros(len(col), dtype='uint64')
+    out[na] = NA_HASH
+    return out
+
+
+def combine_hashes(arrays: List[np.ndarray], n: int) -> np.ndarray:
+    """Order-sensitive combination of per-column hashes (tuple-hash style)."""
+    out = np.full(n, 0x345678, dtype='uint64')
+    mult = np.uint64(1000003)
+    for i, a in enumerate(arrays):
+        out ^= a
+        out *= mult
+        mult += np.uint64(82520 + 2 * (len(arrays) - i))
+    out += np.uint64(97531)
+    return out
+
+
+def exact_column_hashes(col: pd.Series, float_tol: float = 1e-9,
+                        category_hashes: Optional[Dict[int, np.ndarray]] = None) -> Optional[np.ndarray]:
+    """One uint64 per cell; equal hashes <=> cells equal for diff_mask once
+    floats are rounded (NA == NA, 1 == 1.0, but '1' != 1 and '1' != '1.0').
+    None for columns without such a hash (mixed objects, other types)."""
+    dtype = col.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_float_dtype(dtype) or \
+            (pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_unsigned_integer_dtype(dtype)):
+        # numbers compare by value whatever their dtype, as column_hashes hashes them
+        na = col.isna().to_numpy()
+        out = column_hashes(col, float_tol=float_tol)
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        try:
+            idx = pd.DatetimeIndex(col).as_unit('ns')
+        except (TypeError, ValueError):
+            return None
+        na = np.asarray(idx.isna())
+        out = _hash_ints(idx.asi8) ^ _hash_strings([str(idx.tz)])[0] ^ _DATETIME_TAG
+    elif isinstance(dtype, pd.CategoricalDtype):
+        cats = dtype.categories
+        memo = category_hashes if category_hashes is not None else {}
+        if id(cats) not in memo:
+            if len(cats) and pd.api.types.infer_dtype(cats, skipna=True) != 'string':
+                return None
+            memo[id(cats)] = _hash_strings(cats) ^ _TEXT_TAG if len(cats) else np.zeros(1, dtype='uint64')
+        codes = col.cat.codes.to_numpy()
+        na = codes < 0
+        out = memo[id(cats)][np.where(na, 0, codes)]
+    elif pd.api.types.is_string_dtype(dtype):
+        codes, uniques = pd.factorize(col, sort=False)
+        if dtype == 'object' and pd.api.types.infer_dtype(uniques, skipna=True) not in ('string', 'empty'):
+            return None
+        na = codes < 0
+        out = (_hash_strings(uniques) ^ _TEXT_TAG)[np.where(na, 0, codes)] if len(uniques) else np.zeros(len(col), dtype='uint64')
+    else:
+        return None
+    out[na] = EXACT_NA
+    return out
+
+
+def mix_hashes(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads the bits of each hash before they are summed."""
+    z = h ^ (h >> np.uint64(30))
+    z *= _MIX1
+    z ^= z >> np.uint64(27)
+    z *= _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_sum(h: np.ndarray) -> int:
+    """Order-independent digest of a hash array (sum of mixed hashes modulo 2**64)."""
+    return int(mix_hashes(h).sum(dtype='uint64'))
+
+
+def row_fingerprints(df: pd.DataFrame, columns: List[str], float_tol: float = 1e-9,
+                     category_hashes: Optional[Dict[int, np.ndarray]] = None) -> np.ndarray:
+    """64-bit fingerprint of canonical_row(...) for every row of ``df[columns]``."""
+    return combine_hashes([column_hashes(df[c], float_tol=float_tol, category_hashes=category_hashes)
+                           for c in columns], len(df))
+
+
+def multiset_difference(left_h: np.ndarray, right_h: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the rows in excess on each side (Counter subtraction).
+    Within a group of identical fingerprints, the first occurrences are
+    considered matched and the later ones are the surplus.
+    """
+    lc = pd.Series(left_h, copy=False).value_counts(sort=False)
+    rc = pd.Series(right_h, copy=False).value_counts(sort=False)
+    return _surplus_positions(left_h, lc, rc), _surplus_positions(right_h, rc, lc)
+
+
+def _surplus_positions(h: np.ndarray, own: pd.Series, other: pd.Series) -> np.ndarray:
+    balance = own.sub(other.reindex(own.index, fill_value=0))
+    surplus = balance.index[balance.to_numpy() > 0]
+    if len(surplus) == 0:
+        return np.empty(0, dtype='int64')
+    pos = np.flatnonzero(pd.Index(surplus).get_indexer(h) >= 0)
+    cand = h[pos]
+    occurrence = pd.Series(cand).groupby(cand, sort=False).cumcount().to_numpy()
+    matched = other.reindex(cand, fill_value=0).to_numpy()
+    return pos[occurrence >= matched]
@@ -0,0 +1,306 @@
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Dict, Any, Callable, Tuple
+from ..loaders.connections import get_engine
+from ..utils.normalize import format_loaded_frame, normalize_object_columns
+from ..utils.sql import as_subquery
+from .dataframe_compare import compare_dataframes, harmonize_keys
+
+# Incremental keyed comparison. After each run a snapshot keeps, per key, an
+# exact hash of each side's raw row, whether the key is present on each side,
+# and the mismatch record when the row differs. On the next run only keys
+# whose hash or presence changed on either side go through compare_dataframes
+# (which normalizes them); every other key keeps its previous outcome, so
+# counts and samples are those of a full comparison. Raw values are hashed so
+# that unchanged rows are never normalized: a raw change that normalization
+# would erase (' a' -> 'a') only costs a re-comparison.
+#
+# Watermark mode: ``left``/``right`` hold only the rows changed since the last
+# run (e.g. ``WHERE updated_at > :last``, see changed_since_query),
+# ``left_keys``/``right_keys`` list every current key (to detect deletions) and
+# ``fetch_left``/``fetch_right`` load the rows of given keys when a key changed
+# on the other side only (see sql_key_fetcher).
+
+_SNAPSHOT_VERSION = 1
+Fetcher = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+class SnapshotStore:
+    """Pickled snapshots, one file per comparison name."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f'snapshot-{digest}.pkl')
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(name), 'rb') as f:
+                snap = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return snap if snap.get('version') == _SNAPSHOT_VERSION else None
+
+    def save(self, name: str, snapshot: Dict[str, Any]) -> None:
+        tmp = f'{self.path(name)}.tmp-{os.getpid()}'
+        with open(tmp, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path(name))
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def watermark(self, name: str, side: str):
+        """Highest watermark value seen on ``side`` ('left'/'right'), or None."""
+        snap = self.load(name)
+        return snap['watermarks'].get(side) if snap else None
+
+
+def _key_index(df: pd.DataFrame, keys: List[str]) -> pd.Index:
+    if len(keys) == 1:
+        return pd.Index(df[keys[0]], name=keys[0])
+    return pd.MultiIndex.from_frame(df[keys])
+
+
+def _row_hashes(df: pd.DataFrame, index: pd.Index, cols: List[str]) -> pd.Series:
+    """Exact (dtype-aware, not canonical) hash of the raw compared values of
+    each row: '1' and '1.0' must differ since the keyed path compares them as
+    different values."""
+    h = pd.util.hash_pandas_object(df[cols], index=False).to_numpy() if cols else np.zeros(len(df), dtype='uint64')
+    return pd.Series(h, index=index)
+
+
+def _normalized_keys(left: pd.DataFrame, right: pd.DataFrame, keys: List[str]) -> Tuple[pd.Index, pd.Index]:
+    """Key indexes as compare_dataframes builds them (normalized, harmonized)."""
+    lk = normalize_object_columns(left[keys])
+    rk = normalize_object_columns(right[keys])
+    harmonize_keys(lk, rk, keys)
+    return _key_index(lk, keys), _key_index(rk, keys)
+
+
+def _record_key(record: Dict[str, Any], keys: List[str]) -> tuple:
+    return tuple(record['keys'][k] for k in keys)
+
+
+def _sorted_keys(items: List[tuple]) -> List[tuple]:
+    try:
+        return sorted(items)
+    except TypeError:
+        return sorted(items, key=lambda t: tuple(str(v) for v in t))
+
+
+def _as_tuple(key) -> tuple:
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _rows_for(df_n: pd.DataFrame, index: pd.Index, wanted: pd.Index) -> pd.DataFrame:
+    return df_n[index.isin(wanted)]
+
+
+def _fetch_missing(df: pd.DataFrame, df_n_index: pd.Index, wanted: pd.Index, fetch: Optional[Fetcher],
+                   keys: List[str], side: str) -> pd.DataFrame:
+    missing = wanted.difference(df_n_index)
+    if len(missing) == 0:
+        return df.iloc[:0]
+    if fetch is None:
+        raise ValueError(f"Lignes {side} manquantes pour {len(missing)} clé(s) modifiée(s) de l'autre côté: "
+                         f"fournissez fetch_{side}")
+    key_frame = missing.to_frame(index=False) if isinstance(missing, pd.MultiIndex) \
+        else pd.DataFrame({keys[0]: missing.to_numpy()})
+    return fetch(key_frame)
+
+
+def compare_incremental(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    keys: List[str],
+    store: SnapshotStore,
+    name: str,
+    float_tol: float = 1e-9,
+    sample_size: int = 50,
+    left_keys: Optional[pd.DataFrame] = None,
+    right_keys: Optional[pd.DataFrame] = None,
+    fetch_left: Optional[Fetcher] = None,
+    fetch_right: Optional[Fetcher] = None,
+    watermark_column: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Keyed compare_dataframes that only re-compares keys changed since the
+    snapshot ``name`` of ``store`` (full comparison when there is none), then
+    updates the snapshot. The result dict is the one of a full comparison.
+
+    Watermark mode (see module comment) is enabled by ``left_keys``/``right_keys``;
+    ``watermark_column`` records the highest value seen per side, read back
+    with ``store.watermark(name, side)``.
+    """
+    if not keys:
+        raise ValueError('La comparaison incrémentale nécessite des colonnes clé')
+    partial = left_keys is not None or right_keys is not None
+    if partial and (left_keys is None or right_keys is None):
+        raise ValueError('left_keys et right_keys doivent être fournis ensemble')
+    snap = store.load(name)
+    if partial and snap is None:
+        raise ValueError(f"Aucun snapshot '{name}': lancez d'abord une comparaison complète")
+    full_left = left_keys if partial else left
+    full_right = right_keys if partial else right
+    for k in keys:
+        if k not in full_left.columns or k not in full_right.columns or k not in left.columns or k not in right.columns:
+            return compare_dataframes(left, right, keys=keys, float_tol=float_tol, sample_size=sample_size)
+
+    watermarks = dict(snap['watermarks']) if snap else {}
+    if watermark_column:
+        for side, df in (('left', left), ('right', right)):
+            if watermark_column in df.columns and df[watermark_column].notna().any():
+                seen = df[watermark_column].max()
+                watermarks[side] = seen if watermarks.get(side) is None else max(watermarks[side], seen)
+
+    non_key_cols = [c for c in left.columns if c in set(right.columns) and c not in keys]
+    signature = (list(keys), non_key_cols, float_tol)
+    if snap is not None and snap['signature'] != signature:
+        if partial:
+            raise ValueError(f"Snapshot '{name}' incompatible (colonnes ou tolérance modifiées): "
+                             "relancez une comparaison complète")
+        snap = None
+    left_index, right_index = _normalized_keys(left, right, keys)
+    left_h = _row_hashes(left, left_index, non_key_cols)
+    right_h = _row_hashes(right, right_index, non_key_cols)
+    if partial:
+        left_present, right_present = _normalized_keys(left_keys, right_keys, keys)
+    else:
+        left_present, right_present = left_h.index, right_h.index
+    if not (left_present.is_unique and right_present.is_unique):
+        if partial:
+            raise ValueError('Clés dupliquées: la comparaison incrémentale nécessite des clés uniques')
+        store.delete(name)
+        return compare_dataframes(left, right, keys=keys, float_tol=float_tol, sample_size=sample_size)
+
+    # Current per-key state; hashes of unchanged rows come from the snapshot in watermark mode
+    index = left_present.union(right_present)
+    lp, rp = index.isin(left_present), index.isin(right_present)
+    lh, rh = np.zeros(len(index), dtype='uint64'), np.zeros(len(index), dtype='uint64')
+    lh[index.get_indexer(left_h.index)] = left_h.to_numpy()
+    rh[index.get_indexer(right_h.index)] = right_h.to_numpy()
+    if snap is None:
+        changed = index
+    else:
+        prev = snap['state']
+        pos = prev.index.get_indexer(index)
+        known = pos >= 0
+        take = np.where(known, pos, 0)
+        prev_lp = known & prev['lp'].to_numpy()[take]
+        prev_rp = known & prev['rp'].to_numpy()[take]
+        prev_lh = prev['lh'].to_numpy()[take]
+        prev_rh = prev['rh'].to_numpy()[take]
+        if partial:
+            fill_l = lp & ~index.isin(left_h.index)
+            fill_r = rp & ~index.isin(right_h.index)
+            lh[fill_l] = prev_lh[fill_l]
+            rh[fill_r] = prev_rh[fill_r]
+        same = (known & (lp == prev_lp) & (rp == prev_rp) &
+                (~lp | (lh == prev_lh)) & (~rp | (rh == prev_rh)))
+        changed = index[~same]
+    state = pd.DataFrame({'lp': lp, 'rp': rp, 'lh': lh, 'rh': rh}, index=index)
+
+    # Full value comparison of the changed keys only
+    l_rows = _rows_for(left, left_h.index, changed)
+    r_rows = _rows_for(right, right_h.index, changed)
+    if partial:
+        l_extra = _fetch_missing(left, left_h.index, changed.intersection(left_present), fetch_left, keys, 'left')
+        r_extra = _fetch_missing(right, right_h.index, changed.intersection(right_present), fetch_right, keys, 'right')
+        l_rows = pd.concat([l_rows, l_extra], ignore_index=True) if len(l_extra) else l_rows
+        r_rows = pd.concat([r_rows, r_extra], ignore_index=True) if len(r_extra) else r_rows
+    part = compare_dataframes(l_rows, r_rows, keys=keys, float_tol=float_tol, sample_size=len(changed))
+    new_records = {_record_key(r, keys): r for r in part['differences'].get('mismatched_rows_sample', [])}
+
+    records: Dict[tuple, Dict[str, Any]] = {}
+    if snap is not None:
+        changed_set = set(map(_as_tuple, changed))
+        records = {k: r for k, r in snap['records'].items()
+                   if k not in changed_set and (k[0] if len(keys) == 1 else k) in index}
+    records.update(new_records)
+
+    res: Dict[str, Any] = {}
+    res['left_count'] = int(len(left_present))
+    res['right_count'] = int(len(right_present))
+    res['row_count_equal'] = res['left_count'] == res['right_count']
+    res['left_columns'] = list(left.columns)
+    res['right_columns'] = list(right.columns)
+    res['columns_equal'] = set(res['left_columns']) == set(res['right_columns'])
+    diffs = res['differences'] = {}
+    diffs['left_only_keys_count'] = int((lp & ~rp).sum())
+    diffs['right_only_keys_count'] = int((rp & ~lp).sum())
+    diffs['mismatched_rows_count'] = int(len(records))
+    diffs['mismatched_rows_sample'] = [records[k] for k in _sorted_keys(list(records))[:sample_size]]
+    res['data_equal'] = (
+        res['columns_equal'] and
+        diffs['left_only_keys_count'] == 0 and
+        diffs['right_only_keys_count'] == 0 and
+        diffs['mismatched_rows_count'] == 0
+    )
+    store.save(name, {
+        'version': _SNAPSHOT_VERSION,
+        'signature': signature,
+        'state': state,
+        'records': records,
+        'watermarks': watermarks,
+    })
+    return res
+
+
+def _param(value):
+    """Plain Python value for a DBAPI bound parameter."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def changed_since_query(query: str, column: str, since, conn_str: str):
+    """``query`` as a SQLAlchemy text clause keeping only rows with ``column``
+    greater than ``since`` (None: no filter, i.e. first run), for load_from_sql /
+    iter_sql_chunks. ``since`` is a bound parameter and ``column`` is quoted for
+    the dialect of ``conn_str``; a trailing ORDER BY is dropped from the
+    filtered query (see as_subquery)."""
+    from sqlalchemy import text
+    if since is None:
+        return text(query.strip().rstrip(';'))
+    query = as_subquery(query)
+    quoted = get_engine(conn_str).dialect.identifier_preparer.quote(column)
+    return text(f'SELECT * FROM ({query}) src WHERE src.{quoted} > :since').bindparams(since=_param(since))
+
+
+def sql_key_fetcher(conn_str: str, query: str, keys: List[str], as_string: bool = True,
+                    batch_size: int = 500) -> Fetcher:
+    """Fetcher loading the rows of ``query`` whose keys are in a given frame
+    (bound parameters, ``batch_size`` keys per statement)."""
+    from sqlalchemy import text
+    query = as_subquery(query)
+
+    def fetch(key_frame: pd.DataFrame) -> pd.DataFrame:
+        engine = get_engine(conn_str)
+        quoted = [engine.dialect.identifier_preparer.quote(k) for k in keys]
+        frames = []
+        rows = list(key_frame[keys].itertuples(index=False, name=None))
+        with engine.connect() as conn:
+            for start in range(0, len(rows), batch_size):
+                params: Dict[str, Any] = {}
+                clauses = []
+                for i, row in enumerate(rows[start:start + batch_size]):
+                    parts = []
+                    for j, (k, v) in enumerate(zip(quoted, row)):
+                        params[f'k{i}_{j}'] = _param(v)
+                        parts.append(f'src.{k} = :k{i}_{j}')
+                    clauses.append('(' + ' AND '.join(parts) + ')')
+                sql = f"SELECT * FROM ({query}) src WHERE {' OR '.join(clauses)}"
+                frames.append(pd.read_sql_query(text(sql), conn, params=params))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=keys)
+        return format_loaded_frame(df, as_string)
+    return fetch
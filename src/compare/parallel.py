@@ -0,0 +1,122 @@
+from __future__ import annotations
+import multiprocessing
+import os
+import tempfile
+import threading
+import pandas as pd
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
+from .partitioned import (
+    SpillWriter, compare_partition, merge_partials, partition_ids, result_skeleton, spill_path,
+)
+
+# Multi-core comparison of two in-memory frames, in two parallel phases:
+#   1. map: each worker hash-partitions a slice of rows (by key, or by canonical
+#      row fingerprint) and spills it to per-partition files;
+#   2. reduce: each worker compares one partition pair (compare_partition).
+# Workers are forked, so they read the slices from the parent's memory (copy on
+# write) instead of receiving pickled frames; spill files go to /dev/shm when
+# available so that phase 2 reads them from RAM. Forking a process that runs
+# other threads (Streamlit, job registry, connection pools) can copy a lock
+# held by one of them and deadlock the child, so fork is only used from a
+# single-threaded process: otherwise, as where fork is unavailable, workers are
+# started by a forkserver (or spawned) and the slices are pickled to them.
+
+_SHARED: Dict[str, pd.DataFrame] = {}
+
+
+def _default_spill_dir() -> Optional[str]:
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+
+def _spill_slice(side: str, start: int, stop: int, part: int, directory: str,
+                 keys: Optional[List[str]], cols: List[str], num_partitions: int,
+                 float_tol: float, frame: Optional[pd.DataFrame] = None) -> None:
+    # ``frame`` is the already sliced rows when they cannot be shared by fork
+    chunk = frame if frame is not None else _SHARED[side].iloc[start:stop]
+    spill = SpillWriter(directory, side, num_partitions, part=part, first_row=start)
+    spill.write(chunk, partition_ids(chunk, keys, cols, num_partitions, float_tol))
+    spill.close()
+
+
+def _start_method(workers: int) -> Optional[str]:
+    """Start method of the worker processes (None: run in-process)."""
+    if workers <= 1:
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and threading.active_count() == 1:
+        return 'fork'
+    return 'forkserver' if 'forkserver' in methods else 'spawn'
+
+
+def _slices(n: int, count: int) -> List[Tuple[int, int]]:
+    step = max(1, -(-n // count))
+    return [(start, min(start + step, n)) for start in range(0, n, step)]
+
+
+def compare_parallel(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    keys: Optional[List[str]] = None,
+    ignore_column_order: bool = True,
+    float_tol: float = 1e-9,
+    sample_size: int = 50,
+    workers: Optional[int] = None,
+    num_partitions: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """compare_dataframes on ``workers`` processes (default: all cores).
+    Same result dict as compare_dataframes; ``workers=1`` runs the same
+    partitioned plan in-process. Safe to call from threaded code (e.g. a
+    background job): workers are then not forked but started by a forkserver,
+    and the frames are pickled to them, which costs a copy of the data."""
+    workers = workers or os.cpu_count() or 1
+    num_partitions = num_partitions or workers * 4
+    res, stop = result_skeleton(list(left.columns), list(right.columns), keys)
+    res['left_count'] = int(len(left))
+    res['right_count'] = int(len(right))
+    res['row_count_equal'] = res['left_count'] == res['right_count']
+    if stop:
+        return res
+    cols = sorted(left.columns) if ignore_column_order else list(left.columns)
+    templates = {'left': left.iloc[:0], 'right': right.iloc[:0]}
+
+    with tempfile.TemporaryDirectory(prefix='compare-par-', dir=spill_dir or _default_spill_dir()) as directory:
+        method = _start_method(workers)
+        use_fork = method == 'fork'
+        pool: Optional[Executor] = None
+        if method is not None:
+            if use_fork:
+                _SHARED.update(left=left, right=right)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        try:
+            parts: Dict[str, int] = {}
+            jobs = []
+            for side, df in (('left', left), ('right', right)):
+                slices = _slices(len(df), workers)
+                parts[side] = len(slices)
+                for part, (start, stop_) in enumerate(slices):
+                    args = (side, start, stop_, part, directory, keys, cols, num_partitions, float_tol)
+                    if use_fork:
+                        jobs.append(pool.submit(_spill_slice, *args))
+                    elif pool is None:
+                        _spill_slice(*args, frame=df.iloc[start:stop_])
+                    else:
+                        jobs.append(pool.submit(_spill_slice, *args, frame=df.iloc[start:stop_]))
+            for job in jobs:
+                job.result()
+
+            def paths(side: str, p: int) -> List[str]:
+                return [spill_path(directory, side, p, part) for part in range(parts[side])]
+
+            tasks = [(paths('left', p), paths('right', p), templates['left'], templates['right'],
+                      keys, cols, float_tol, sample_size) for p in range(num_partitions)]
+            if pool is None:
+                partials = [compare_partition(*t) for t in tasks]
+            else:
+                partials = [f.result() for f in [pool.submit(compare_partition, *t) for t in tasks]]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            _SHARED.clear()
+    return merge_partials(res, partials, keys, sample_size)
@@ -0,0 +1,369 @@
+from __future__ import annotations
+import os
+import pickle
+import tempfile
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+from ..utils.normalize import normalize_object_columns
+from .dataframe_compare import compare_dataframes
+from .fingerprint import combine_hashes, row_fingerprints, multiset_difference
+
+# Out-of-core comparison: both sources are streamed in chunks, rows are
+# hash-partitioned to spill files (by key, or by canonical row fingerprint when
+# there are no keys) and partitions are then compared one group at a time with
+# the compare_dataframes semantics. Equal keys / equal canonical rows always
+# land in the same partition, so per-partition results simply add up.
+
+# Peak Python heap while comparing a partition pair vs. its pickled size
+# (normalized copies, hashes, alignment). Measured with
+# benchmarks/bench_partition_memory.py: 5.5 (typed, keyless) to 10.2 (string
+# dtype, keyed) on 200 000-row pairs.
+_MEMORY_EXPANSION = 10
+# A partition still over the budget is split again on the next digits of its
+# row hashes, at most this many times (rows sharing one key, or identical rows
+# without keys, can never be split and are compared whole).
+_MAX_SPLITS = 4
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Slice an in-memory DataFrame into chunks (for tests or mixed sources)."""
+    for start in range(0, max(len(df), 1), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def partition_ids(df: pd.DataFrame, keys: Optional[List[str]], cols: List[str],
+                  num_partitions: int, float_tol: float, level: int = 0) -> np.ndarray:
+    """Partition number of every row of a (raw, not normalized) chunk.
+    ``level`` picks the base-``num_partitions`` digit of the row hash: rows of
+    one partition are spread over ``num_partitions`` sub-partitions by level + 1."""
+    if keys:
+        # Keys are compared as stripped strings when dtypes differ between
+        # sides, so hash that representation: it is stable across sides.
+        hashes = [pd.util.hash_array(df[k].astype(str).str.strip().to_numpy(dtype=object)) for k in keys]
+        h = combine_hashes(hashes, len(df))
+    else:
+        h = row_fingerprints(normalize_object_columns(df[cols]), cols, float_tol=float_tol)
+    if level:
+        h = h // np.uint64(num_partitions ** level)
+    return (h % np.uint64(num_partitions)).astype('int64')
+
+
+def spill_path(directory: str, side: str, partition: int, part: int = 0) -> str:
+    return os.path.join(directory, f'{side}-{partition:05d}-{part:05d}.pkl')
+
+
+class SpillWriter:
+    """Append-only pickle files, one per partition, for one side. ``part``
+    distinguishes writers spilling the same side concurrently and
+    ``first_row`` is the original row number of the first row written."""
+
+    def __init__(self, directory: str, side: str, num_partitions: int, part: int = 0, first_row: int = 0):
+        self.paths = [spill_path(directory, side, p, part) for p in range(num_partitions)]
+        self.files: Dict[int, Any] = {}
+        self.template: Optional[pd.DataFrame] = None
+        self.first_row = first_row
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame, pids: np.ndarray, row_ids: Optional[np.ndarray] = None) -> None:
+        """Append the rows of ``chunk`` to their partitions; ``row_ids`` (original
+        row numbers) default to the next numbers of this writer."""
+        if self.template is None:
+            self.template = chunk.iloc[:0]
+        if row_ids is None:
+            start = self.first_row + self.rows
+            row_ids = np.arange(start, start + len(chunk), dtype='int64')
+        order = np.argsort(pids, kind='stable')
+        bounds = np.flatnonzero(np.diff(pids[order])) + 1
+        for idx in np.split(order, bounds):
+            if len(idx) == 0:
+                continue
+            p = int(pids[idx[0]])
+            f = self.files.get(p)
+            if f is None:
+                f = self.files[p] = open(self.paths[p], 'ab')
+            pickle.dump((row_ids[idx], chunk.iloc[idx]), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def size(self, p: int) -> int:
+        return os.path.getsize(self.paths[p]) if os.path.exists(self.paths[p]) else 0
+
+
+def iter_pieces(paths: List[str]) -> Iterator[Tuple[np.ndarray, pd.DataFrame]]:
+    """(original row numbers, rows) of every piece spilled to ``paths``."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    break
+
+
+def read_partitions(paths: List[str], template: pd.DataFrame) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Load and concatenate spilled pieces, ordered by original row number."""
+    ids, frames = [], []
+    for row_ids, frame in iter_pieces(paths):
+        ids.append(row_ids)
+        frames.append(frame)
+    if not frames:
+        return np.empty(0, dtype='int64'), template
+    row_ids = np.concatenate(ids)
+    order = np.argsort(row_ids, kind='stable')
+    df = pd.concat(frames, ignore_index=True)
+    return row_ids[order], df.iloc[order].reset_index(drop=True)
+
+
+def compare_partition(
+    left_paths: List[str],
+    right_paths: List[str],
+    left_template: pd.DataFrame,
+    right_template: pd.DataFrame,
+    keys: Optional[List[str]],
+    cols: List[str],
+    float_tol: float,
+    sample_size: int,
+    on_difference: Optional[Callable[[str, pd.DataFrame], None]] = None,
+) -> Dict[str, Any]:
+    """Compare one group of partitions; returns partial differences only."""
+    left_ids, left = read_partitions(left_paths, left_template)
+    right_ids, right = read_partitions(right_paths, right_template)
+    if keys:
+        return compare_dataframes(left, right, keys=keys, float_tol=float_tol, sample_size=sample_size,
+                                  on_difference=on_difference)['differences']
+    left_n = normalize_object_columns(left[cols])
+    right_n = normalize_object_columns(right[cols])
+    only_left_pos, only_right_pos = multiset_difference(
+        row_fingerprints(left_n, cols, float_tol=float_tol),
+        row_fingerprints(right_n, cols, float_tol=float_tol))
+    if on_difference is not None:
+        for kind, frame, pos in (('left_only', left_n, only_left_pos), ('right_only', right_n, only_right_pos)):
+            if len(pos):
+                on_difference(kind, frame.iloc[pos])
+    return {
+        'only_in_left_count': int(len(only_left_pos)),
+        'only_in_right_count': int(len(only_right_pos)),
+        # (original row number, record) so that samples can be merged in row order
+        'only_in_left_sample': list(zip(left_ids[only_left_pos[:sample_size]].tolist(),
+                                        left_n.iloc[only_left_pos[:sample_size]].astype(str).to_dict(orient='records'))),
+        'only_in_right_sample': list(zip(right_ids[only_right_pos[:sample_size]].tolist(),
+                                         right_n.iloc[only_right_pos[:sample_size]].astype(str).to_dict(orient='records'))),
+    }
+
+
+def _key_order(item: Dict[str, Any], keys: List[str]):
+    return tuple(item['keys'][k] for k in keys)
+
+
+def merge_partials(res: Dict[str, Any], partials: Iterable[Dict[str, Any]],
+                   keys: Optional[List[str]], sample_size: int) -> Dict[str, Any]:
+    """Add up per-partition differences into a compare_dataframes-style result.
+    Samples are re-sorted (by key, or by original row number) so they match
+    what the in-memory comparison returns."""
+    diffs = res['differences']
+    if keys:
+        counts = ('left_only_keys_count', 'right_only_keys_count', 'mismatched_rows_count')
+        samples = {'mismatched_rows_sample': []}
+    else:
+        counts = ('only_in_left_count', 'only_in_right_count')
+        samples = {'only_in_left_sample': [], 'only_in_right_sample': []}
+    for c in counts:
+        diffs[c] = 0
+    for part in partials:
+        for c in counts:
+            diffs[c] += int(part.get(c, 0))
+        for s in samples:
+            samples[s].extend(part.get(s, []))
+    for s, items in samples.items():
+        if keys:
+            try:
+                items.sort(key=lambda item: _key_order(item, keys))
+            except TypeError:
+                items.sort(key=lambda item: tuple(str(v) for v in _key_order(item, keys)))
+            diffs[s] = items[:sample_size]
+        else:
+            items.sort(key=lambda item: item[0])
+            diffs[s] = [rec for _, rec in items[:sample_size]]
+    res['data_equal'] = res['columns_equal'] and all(diffs[c] == 0 for c in counts)
+    return res
+
+
+def group_partitions(sizes: List[int], budget_bytes: int) -> List[List[int]]:
+    """Pack consecutive partitions into groups whose estimated footprint stays
+    under the budget. A single oversized partition gets its own group (see
+    budget_groups for its split)."""
+    groups: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for p, size in enumerate(sizes):
+        if size == 0:
+            continue
+        cost = size * _MEMORY_EXPANSION
+        if current and used + cost > budget_bytes:
+            groups.append(current)
+            current, used = [], 0
+        current.append(p)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def split_partition(left_paths: List[str], right_paths: List[str], directory: str,
+                    keys: Optional[List[str]], cols: List[str], num_partitions: int,
+                    float_tol: float, level: int) -> Tuple[SpillWriter, SpillWriter]:
+    """Re-spill the rows of one partition pair into ``num_partitions``
+    sub-partitions of ``directory``, by digit ``level`` of their row hashes.
+    Reads one spilled piece at a time and removes the parent files."""
+    os.makedirs(directory)
+    spills = []
+    for side, paths in (('left', left_paths), ('right', right_paths)):
+        spill = SpillWriter(directory, side, num_partitions)
+        for row_ids, frame in iter_pieces(paths):
+            spill.write(frame, partition_ids(frame, keys, cols, num_partitions, float_tol, level), row_ids)
+        spill.close()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        spills.append(spill)
+    return spills[0], spills[1]
+
+
+def budget_groups(left_paths: List[List[str]], right_paths: List[List[str]], directory: str,
+                  keys: Optional[List[str]], cols: List[str], num_partitions: int, float_tol: float,
+                  budget_bytes: int, level: int = 1) -> Iterator[Tuple[List[str], List[str]]]:
+    """(left files, right files) of each group of partitions to compare at
+    once; ``left_paths[p]``/``right_paths[p]`` are the files of partition p.
+    A partition whose estimated footprint exceeds the budget is split again
+    (split_partition) and its sub-partitions grouped the same way, at most
+    _MAX_SPLITS times; one that the split cannot spread is compared whole."""
+    sizes = [sum(os.path.getsize(f) for f in left_paths[p] + right_paths[p] if os.path.exists(f))
+             for p in range(len(left_paths))]
+    for group in group_partitions(sizes, budget_bytes):
+        p = group[0]
+        if len(group) == 1 and sizes[p] * _MEMORY_EXPANSION > budget_bytes and level <= _MAX_SPLITS \
+                and num_partitions > 1 and num_partitions ** level < 2 ** 64:
+            subdir = os.path.join(directory, f'split-{p:05d}')
+            left, right = split_partition(left_paths[p], right_paths[p], subdir, keys, cols,
+                                          num_partitions, float_tol, level)
+            sub_sizes = [left.size(q) + right.size(q) for q in range(num_partitions)]
+            if max(sub_sizes) < sum(sub_sizes):
+                yield from budget_groups([[f] for f in left.paths], [[f] for f in right.paths], subdir, keys, cols,
+                                         num_partitions, float_tol, budget_bytes, level + 1)
+            else:
+                # one key (or one row, without keys) repeated: no split can spread it
+                q = int(np.argmax(sub_sizes))
+                yield [left.paths[q]], [right.paths[q]]
+            continue
+        yield [f for q in group for f in left_paths[q]], [f for q in group for f in right_paths[q]]
+
+
+def result_skeleton(left_columns: List[str], right_columns: List[str],
+                    keys: Optional[List[str]]) -> Tuple[Dict[str, Any], bool]:
+    """Column-level part of the compare_dataframes result; the flag tells
+    whether the comparison stops there (missing key / keyless column mismatch)."""
+    res: Dict[str, Any] = {}
+    res['left_columns'] = left_columns
+    res['right_columns'] = right_columns
+    res['columns_equal'] = set(left_columns) == set(right_columns)
+    res['data_equal'] = False
+    res['differences'] = {}
+    if keys:
+        for k in keys:
+            if k not in left_columns or k not in right_columns:
+                res['differences']['missing_key'] = f"Colonne clé manquante: {k}"
+                return res, True
+    elif not res['columns_equal']:
+        res['differences']['missing_in_left'] = list(set(right_columns) - set(left_columns))
+        res['differences']['missing_in_right'] = list(set(left_columns) - set(right_columns))
+        return res, True
+    return res, False
+
+
+def spill_sources(
+    left_chunks: Iterable[pd.DataFrame],
+    right_chunks: Iterable[pd.DataFrame],
+    directory: str,
+    keys: Optional[List[str]],
+    ignore_column_order: bool,
+    float_tol: float,
+    num_partitions: int,
+) -> Tuple[Dict[str, Any], Optional[SpillWriter], Optional[SpillWriter], List[str]]:
+    """Stream both sides to partition files. Returns the result skeleton, the
+    two spills (None when the comparison ends before spilling) and the columns."""
+    left_it, right_it = iter(left_chunks), iter(right_chunks)
+    first_left = next(left_it, pd.DataFrame())
+    first_right = next(right_it, pd.DataFrame())
+    res, stop = result_skeleton(list(first_left.columns), list(first_right.columns), keys)
+    cols = sorted(first_left.columns) if ignore_column_order else list(first_left.columns)
+
+    spills = []
+    for side, first, rest in (('left', first_left, left_it), ('right', first_right, right_it)):
+        spill = SpillWriter(directory, side, num_partitions)
+        expected = list(first.columns)
+        for chunk in _chain(first, rest):
+            if list(chunk.columns) != expected:
+                raise ValueError(f"Colonnes incohérentes entre les blocs de la source {side}")
+            if stop:
+                spill.rows += len(chunk)
+            elif len(chunk):
+                spill.write(chunk, partition_ids(chunk, keys, cols, num_partitions, float_tol))
+        spill.close()
+        if spill.template is None:
+            spill.template = first.iloc[:0]
+        spills.append(spill)
+    res['left_count'] = spills[0].rows
+    res['right_count'] = spills[1].rows
+    res['row_count_equal'] = res['left_count'] == res['right_count']
+    if stop:
+        return res, None, None, cols
+    return res, spills[0], spills[1], cols
+
+
+def _chain(first: pd.DataFrame, rest: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    yield first
+    yield from rest
+
+
+def compare_partitioned(
+    left_chunks: Iterable[pd.DataFrame],
+    right_chunks: Iterable[pd.DataFrame],
+    keys: Optional[List[str]] = None,
+    ignore_column_order: bool = True,
+    float_tol: float = 1e-9,
+    sample_size: int = 50,
+    num_partitions: int = 64,
+    memory_budget_mb: float = 512,
+    spill_dir: Optional[str] = None,
+    on_difference: Optional[Callable[[str, pd.DataFrame], None]] = None,
+) -> Dict[str, Any]:
+    """Disk-spilling equivalent of compare_dataframes for inputs larger than memory.
+
+    ``left_chunks``/``right_chunks`` are iterables of DataFrames (e.g.
+    ``pd.read_csv(..., chunksize=...)``). Peak memory is one input chunk during
+    the spill phase, then roughly ``memory_budget_mb`` per compared group of
+    partitions: partitions over the budget are split again on their row
+    hashes, except rows sharing one key (or identical rows, without keys),
+    which are always compared together. Counts and samples are the same as the in-memory comparison;
+    ``on_difference`` receives every difference, partition by partition.
+    """
+    with tempfile.TemporaryDirectory(prefix='compare-spill-', dir=spill_dir) as directory:
+        res, left, right, cols = spill_sources(
+            left_chunks, right_chunks, directory, keys, ignore_column_order, float_tol, num_partitions)
+        if left is None:
+            return res
+        groups = budget_groups([[f] for f in left.paths], [[f] for f in right.paths], directory, keys, cols,
+                               num_partitions, float_tol, memory_budget_mb * 1024 * 1024)
+        partials = (
+            compare_partition(left_paths, right_paths, left.template, right.template, keys, cols,
+                              float_tol, sample_size, on_difference)
+            for left_paths, right_paths in groups
+        )
+        return merge_partials(res, partials, keys, sample_size)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+import datetime
+import hashlib
+import pandas as pd
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from typing import List, Optional, Dict, Any, Tuple
+from ..loaders.connections import get_engine
+from ..utils.normalize import format_loaded_frame
+from ..utils.sql import as_subquery
+from .dataframe_compare import compare_dataframes
+
+# Checksum pushdown: each database computes, per bucket of key hash, the row
+# count and an order-independent checksum (sums of 48-bit row hashes over the
+# canonicalized columns). Only buckets whose summaries differ are subdivided
+# and, once small enough, fetched and compared locally with compare_dataframes.
+# A row hash mismatch only costs an extra fetch: the final decision is always
+# taken by compare_dataframes on the fetched rows, so results match a full load.
+
+_SEP = 31          # ASCII unit separator between columns
+_NULL = '<<NA>>'
+_HALF = 16777216   # 2**24: the 48-bit hash is summed as two 24-bit halves
+_HASH_SPACE = 2 ** 48
+
+
+class _Dialect:
+    """SQL snippets for one backend. ``expr`` arguments are SQL expressions."""
+
+    concat = ' || '
+
+    def __init__(self, engine: Engine, utf8: bool = False):
+        self.quote = engine.dialect.identifier_preparer.quote
+        self.utf8 = utf8
+
+    def as_text(self, column: str, pytype=None) -> str:
+        return f"COALESCE(CAST({self.quote(column)} AS TEXT), '{_NULL}')"
+
+    def sep(self) -> str:
+        return f'chr({_SEP})'
+
+    def hash48(self, expr: str) -> str:
+        return f"('x' || substr(md5({expr}), 1, 12))::bit(48)::bigint"
+
+    def source(self, query: str) -> str:
+        return f'({query}) src'
+
+
+class _SqliteDialect(_Dialect):
+    # md5_48() is registered on every connection (see _engine)
+    def sep(self) -> str:
+        return f'char({_SEP})'
+
+    def hash48(self, expr: str) -> str:
+        return f'md5_48({expr})'
+
+
+class _MssqlDialect(_Dialect):
+    concat = ' + '
+
+    def as_text(self, column: str, pytype=None) -> str:
+        # Explicit styles: float -> 17 significant digits, dates -> ISO 8601
+        style = ', 3' if pytype is float else ', 126' if pytype in (datetime.datetime, datetime.date, datetime.time) else ''
+        target = 'VARCHAR(MAX)' if self.utf8 else 'NVARCHAR(MAX)'
+        expr = f'CONVERT({target}, {self.quote(column)}{style})'
+        if self.utf8:
+            # SQL Server 2019+: hash the UTF-8 bytes, like PostgreSQL does
+            expr = f'{expr} COLLATE Latin1_General_100_BIN2_UTF8'
+        return f"COALESCE({expr}, '{_NULL}')"
+
+    def sep(self) -> str:
+        return f'CHAR({_SEP})'
+
+    def hash48(self, expr: str) -> str:
+        return f"CONVERT(BIGINT, SUBSTRING(HASHBYTES('MD5', {expr}), 1, 6))"
+
+
+def _md5_48(value) -> Optional[int]:
+    if value is None:
+        return None
+    return int(hashlib.md5(str(value).encode('utf-8')).hexdigest()[:12], 16)
+
+
+def _register_md5_48(dbapi_conn, _record) -> None:
+    dbapi_conn.create_function('md5_48', 1, _md5_48, deterministic=True)
+
+
+def _engine(conn_str: str) -> Engine:
+    engine = get_engine(conn_str)
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', _register_md5_48):
+        event.listen(engine, 'connect', _register_md5_48)
+        # Connections pooled before the listener existed lack the function
+        engine.dispose()
+    return engine
+
+
+def _dialect(engine: Engine, mssql_utf8: bool) -> _Dialect:
+    name = engine.dialect.name
+    if name == 'postgresql':
+        return _Dialect(engine)
+    if name == 'mssql':
+        return _MssqlDialect(engine, utf8=mssql_utf8)
+    if name == 'sqlite':
+        return _SqliteDialect(engine)
+    raise ValueError(f"Dialecte non supporté pour la comparaison par checksums: {name}")
+
+
+class _Source:
+    def __init__(self, conn_str: str, query: str, mssql_utf8: bool):
+        self.engine = _engine(conn_str)
+        self.dialect = _dialect(self.engine, mssql_utf8)
+        self.query = as_subquery(query)
+        with self.engine.connect() as conn:
+            result = conn.execute(text(f'SELECT * FROM {self.dialect.source(self.query)} WHERE 1=0'))
+            description = result.cursor.description or []
+        self.columns = [d[0] for d in description]
+        self.types = {d[0]: d[1] if isinstance(d[1], type) else None for d in description}
+
+    def _row_text(self, columns: List[str]) -> str:
+        d = self.dialect
+        parts = [d.as_text(c, self.types.get(c)) for c in columns]
+        return d.concat.join(p if i == 0 else f'{d.sep()}{d.concat}{p}' for i, p in enumerate(parts))
+
+    def key_hash(self, keys: List[str]) -> str:
+        return self.dialect.hash48(self._row_text(keys))
+
+    def bucket_summaries(self, keys: List[str], columns: List[str], modulus: int,
+                         parent_modulus: Optional[int], parents: Optional[List[int]]) -> Dict[int, Tuple[int, int, int]]:
+        kh = self.key_hash(keys)
+        rh = self.dialect.hash48(self._row_text(columns))
+        where = ''
+        if parents is not None:
+            where = f" WHERE ({kh}) % {parent_modulus} IN ({', '.join(str(int(p)) for p in parents)})"
+        sql = (
+            f'SELECT t.b, COUNT(*), SUM(t.h % {_HALF}), SUM(t.h / {_HALF}) FROM ('
+            f'SELECT ({kh}) % {modulus} AS b, {rh} AS h FROM {self.dialect.source(self.query)}{where}'
+            f') t GROUP BY t.b'
+        )
+        with self.engine.connect() as conn:
+            return {int(b): (int(n), int(lo), int(hi)) for b, n, lo, hi in conn.execute(text(sql))}
+
+    def fetch(self, keys: List[str], modulus: int, buckets: List[int], as_string: bool) -> pd.DataFrame:
+        kh = self.key_hash(keys)
+        ids = ', '.join(str(int(b)) for b in buckets)
+        sql = f'SELECT * FROM {self.dialect.source(self.query)} WHERE ({kh}) % {modulus} IN ({ids})'
+        with self.engine.connect() as conn:
+            df = pd.read_sql_query(text(sql), conn)
+        return format_loaded_frame(df, as_string)
+
+
+def compare_pushdown(
+    left_conn: str,
+    left_query: str,
+    right_conn: str,
+    right_query: str,
+    keys: List[str],
+    columns: Optional[List[str]] = None,
+    float_tol: float = 1e-9,
+    sample_size: int = 50,
+    buckets: int = 64,
+    fetch_threshold: int = 50_000,
+    max_depth: int = 4,
+    as_string: bool = True,
+    mssql_utf8: bool = False,
+) -> Dict[str, Any]:
+    """Keyed comparison of two SQL queries that only transfers divergent slices.
+
+    Supported backends: SQL Server, PostgreSQL (and SQLite, for local tests).
+    ``columns`` limits the checksummed columns (default: common columns).
+    Buckets larger than ``fetch_threshold`` rows are split ``buckets`` ways,
+    at most ``max_depth`` times. Checksums are computed on the text rendering
+    of each value, so comparing two different engines only saves transfer
+    when both render values alike (set ``mssql_utf8=True`` on SQL Server
+    2019+ to hash UTF-8 bytes like PostgreSQL); otherwise every bucket is
+    reported divergent and the comparison degrades to a full fetch.
+    """
+    if not keys:
+        raise ValueError('La comparaison par checksums nécessite des colonnes clé')
+    left = _Source(left_conn, left_query, mssql_utf8)
+    right = _Source(right_conn, right_query, mssql_utf8)
+    res: Dict[str, Any] = {}
+    res['left_columns'] = left.columns
+    res['right_columns'] = right.columns
+    res['columns_equal'] = set(left.columns) == set(right.columns)
+    res['data_equal'] = False
+    res['differences'] = {}
+    for k in keys:
+        if k not in left.columns or k not in right.columns:
+            res['differences']['missing_key'] = f"Colonne clé manquante: {k}"
+            return res
+    if columns is None:
+        columns = sorted(c for c in set(left.columns) & set(right.columns) if c not in keys)
+    columns = list(keys) + [c for c in columns if c not in keys]
+
+    to_fetch: List[Tuple[int, List[int]]] = []
+    modulus, parent_modulus, parents = buckets, None, None
+    depth = 0
+    while True:
+        ls = left.bucket_summaries(keys, columns, modulus, parent_modulus, parents)
+        rs = right.bucket_summaries(keys, columns, modulus, parent_modulus, parents)
+        if depth == 0:
+            res['left_count'] = sum(v[0] for v in ls.values())
+            res['right_count'] = sum(v[0] for v in rs.values())
+            res['row_count_equal'] = res['left_count'] == res['right_count']
+        divergent = sorted(b for b in set(ls) | set(rs) if ls.get(b) != rs.get(b))
+        last_level = depth >= max_depth or modulus * buckets > _HASH_SPACE
+        small = [b for b in divergent
+                 if last_level or max(ls.get(b, (0,))[0], rs.get(b, (0,))[0]) <= fetch_threshold]
+        if small:
+            to_fetch.append((modulus, small))
+        large = [b for b in divergent if b not in set(small)]
+        if not large:
+            break
+        parent_modulus, parents = modulus, large
+        modulus *= buckets
+        depth += 1
+
+    res['differences']['divergent_buckets'] = sum(len(b) for _, b in to_fetch)
+    left_parts = [left.fetch(keys, m, b, as_string) for m, b in to_fetch]
+    right_parts = [right.fetch(keys, m, b, as_string) for m, b in to_fetch]
+    left_df = pd.concat(left_parts, ignore_index=True) if left_parts else pd.DataFrame(columns=left.columns)
+    right_df = pd.concat(right_parts, ignore_index=True) if right_parts else pd.DataFrame(columns=right.columns)
+    detail = compare_dataframes(left_df, right_df, keys=keys, float_tol=float_tol, sample_size=sample_size)
+    res['differences'].update(detail['differences'])
+    res['data_equal'] = (
+        res['columns_equal'] and
+        res['differences']['left_only_keys_count'] == 0 and
+        res['differences']['right_only_keys_count'] == 0 and
+        res['differences']['mismatched_rows_count'] == 0
+    )
+    return res
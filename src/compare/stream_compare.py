@@ -0,0 +1,181 @@
+from __future__ import annotations
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator
+from .dataframe_compare import compare_dataframes
+from .partitioned import result_skeleton
+
+# Single-pass keyed comparison of two key-ordered streams (merge join).
+# Each side is buffered only until the other side has caught up: every row whose
+# key is below the smaller of the two buffers' last keys can no longer get a
+# partner, so it is resolved with compare_dataframes and dropped. Memory stays
+# around one chunk per side (plus rows sharing the frontier key).
+
+
+def _chain(first: pd.DataFrame, rest: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    yield first
+    yield from rest
+
+
+def _align_numeric_keys(lpart: pd.DataFrame, rpart: pd.DataFrame, keys: List[str]) -> None:
+    # int64 on one side and float64 on the other would otherwise be compared as text
+    for k in keys:
+        if k in lpart and k in rpart and lpart[k].dtype != rpart[k].dtype \
+                and pd.api.types.is_numeric_dtype(lpart[k]) and pd.api.types.is_numeric_dtype(rpart[k]):
+            lpart[k] = lpart[k].astype('float64')
+            rpart[k] = rpart[k].astype('float64')
+
+
+class _Side:
+    def __init__(self, name: str, chunks: Iterable[pd.DataFrame], keys: List[str]):
+        self.name = name
+        self.it: Iterator[pd.DataFrame] = iter(chunks)
+        self.keys = keys
+        self.numeric_keys: List[str] = []
+        self.first = self._peek()
+        self.buf: Optional[pd.DataFrame] = None
+        self.columns: Optional[List[str]] = None
+        self.done = False
+        self.rows = 0
+        self.last_key = None
+
+    def _peek(self) -> Optional[pd.DataFrame]:
+        first = next(self.it, None)
+        if first is not None:
+            self.it = _chain(first, self.it)
+        return first
+
+    def pull(self) -> None:
+        chunk = next(self.it, None)
+        if chunk is None:
+            self.done = True
+            return
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        self.rows += len(chunk)
+        if len(chunk) == 0:
+            return
+        chunk = self._order_keys(chunk)
+        idx = self.index(chunk)
+        if not idx.is_monotonic_increasing or (self.last_key is not None and idx[0] < self.last_key):
+            raise ValueError(
+                f"Flux {self.name} non trié sur les clés {self.keys} (vers la ligne {self.rows - len(chunk) + 1}). "
+                "Ajoutez ORDER BY sur les clés (collation binaire pour les textes)."
+            )
+        self.last_key = idx[-1]
+        self.buf = chunk if self.buf is None or len(self.buf) == 0 else pd.concat([self.buf, chunk], ignore_index=True)
+
+    def _order_keys(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Cast keys to the representation used for ordering and matching:
+        numbers for numeric keys, stripped strings otherwise."""
+        chunk = chunk.copy()
+        for k in self.keys:
+            if k in self.numeric_keys:
+                values = pd.to_numeric(chunk[k])
+                if pd.api.types.is_float_dtype(values) and values.notna().all() and (values == np.trunc(values)).all():
+                    values = values.astype('int64')
+                chunk[k] = values
+            else:
+                chunk[k] = chunk[k].astype(str).str.strip()
+        return chunk
+
+    def index(self, df: pd.DataFrame) -> pd.Index:
+        if len(self.keys) == 1:
+            return pd.Index(df[self.keys[0]])
+        return pd.MultiIndex.from_frame(df[self.keys])
+
+    def take_below(self, frontier) -> pd.DataFrame:
+        """Remove and return buffered rows with key < frontier (all if None)."""
+        if self.buf is None:
+            return pd.DataFrame(columns=self.columns or self.keys)
+        if frontier is None:
+            out, self.buf = self.buf, self.buf.iloc[:0]
+            return out
+        pos = self.index(self.buf).get_slice_bound(frontier, side='left')
+        out, self.buf = self.buf.iloc[:pos], self.buf.iloc[pos:]
+        return out
+
+    def pending(self) -> bool:
+        return self.buf is not None and len(self.buf) > 0
+
+
+def compare_sorted_streams(
+    left_chunks: Iterable[pd.DataFrame],
+    right_chunks: Iterable[pd.DataFrame],
+    keys: List[str],
+    float_tol: float = 1e-9,
+    sample_size: int = 50,
+    numeric_keys: Optional[List[str]] = None,
+    on_difference: Optional[Callable[[str, pd.DataFrame], None]] = None,
+) -> Dict[str, Any]:
+    """Keyed comparison of two streams already sorted on ``keys`` (e.g. queries
+    with ``ORDER BY`` on the keys, read with iter_sql_chunks).
+
+    Text keys are compared as Python strings, so the SQL ordering must be
+    binary (``COLLATE Latin1_General_BIN2`` on SQL Server, ``COLLATE "C"`` on
+    PostgreSQL). Keys listed in ``numeric_keys`` (or with a numeric dtype) are
+    ordered as numbers, which is needed when an integer key was loaded as text.
+    Out-of-order input raises ValueError. Differences are pushed to
+    ``on_difference`` as they are found; the result has the same shape as the
+    keyed compare_dataframes result (``missing_key`` when a key column is
+    absent from the first chunk of a side, after counting the rows).
+    """
+    if not keys:
+        raise ValueError('La comparaison en flux nécessite des colonnes clé')
+    left = _Side('A', left_chunks, keys)
+    right = _Side('B', right_chunks, keys)
+    res, stop = result_skeleton(list(getattr(left.first, 'columns', [])), list(getattr(right.first, 'columns', [])),
+                                keys)
+    if stop:
+        res['left_count'] = sum(len(chunk) for chunk in left.it)
+        res['right_count'] = sum(len(chunk) for chunk in right.it)
+        res['row_count_equal'] = res['left_count'] == res['right_count']
+        return res
+    # A key is ordered as a number if requested, or if either side delivers it numeric
+    numeric = set(numeric_keys or [])
+    for first in (left.first, right.first):
+        if first is not None:
+            numeric.update(k for k in keys if k in first.columns and pd.api.types.is_numeric_dtype(first[k]))
+    left.numeric_keys = right.numeric_keys = [k for k in keys if k in numeric]
+    totals = {'left_only_keys_count': 0, 'right_only_keys_count': 0, 'mismatched_rows_count': 0}
+    sample: List[Dict[str, Any]] = []
+
+    def resolve(frontier) -> None:
+        lpart, rpart = left.take_below(frontier), right.take_below(frontier)
+        if len(lpart) == 0 and len(rpart) == 0:
+            return
+        lpart, rpart = lpart.copy(), rpart.copy()
+        _align_numeric_keys(lpart, rpart, keys)
+        part = compare_dataframes(lpart, rpart, keys=keys, float_tol=float_tol,
+                                  sample_size=max(sample_size - len(sample), 0), on_difference=on_difference)
+        for c in totals:
+            totals[c] += part['differences'][c]
+        sample.extend(part['differences']['mismatched_rows_sample'])
+
+    while not (left.done and right.done):
+        # Pull from the side(s) lagging behind (empty buffer or smaller last key)
+        for side, other in ((left, right), (right, left)):
+            if side.done:
+                continue
+            if not side.pending() or other.done or not other.pending() or side.last_key <= other.last_key:
+                side.pull()
+        running = [s for s in (left, right) if not s.done]
+        if not running or any(s.last_key is None for s in running):
+            continue
+        # Rows below the smallest last key of a running stream are final
+        resolve(min(s.last_key for s in running))
+    resolve(None)
+
+    left_columns = left.columns or []
+    right_columns = right.columns or []
+    res: Dict[str, Any] = {}
+    res['left_count'] = left.rows
+    res['right_count'] = right.rows
+    res['row_count_equal'] = res['left_count'] == res['right_count']
+    res['left_columns'] = left_columns
+    res['right_columns'] = right_columns
+    res['columns_equal'] = set(left_columns) == set(right_columns)
+    res['differences'] = dict(totals)
+    res['differences']['mismatched_rows_sample'] = sample[:sample_size]
+    res['data_equal'] = res['columns_equal'] and all(v == 0 for v in totals.values())
+    return res
@@ -0,0 +1,205 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from .fingerprint import NA_HASH, _FLOAT_RE, _INT_RE, column_hashes, combine_hashes
+
+# Tolerance-aware numeric comparison. A column with a tolerance is compared on
+# float64 arrays: a and b are equal when |a - b| <= max(abs_tol, rel_tol *
+# max(|a|, |b|)) (NA only equals NA), instead of rounding both to float_tol
+# digits. Text columns whose values all look like numbers (the all-string
+# frames of the loaders) are parsed once per distinct value; columns that are
+# not numeric on both sides keep the exact comparison.
+
+# Spellings of NA in normalized text columns (str() of None / NaN / pd.NA)
+_NA_SPELLINGS = ('', 'nan', 'NaN', 'None', '<NA>', 'NaT', 'NULL', 'null')
+_NUMBER_RE = f'(?:{_INT_RE})|(?:{_FLOAT_RE})'
+
+ToleranceLike = Union['Tolerance', float, int, Tuple[float, float], List[float], Dict[str, float]]
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    abs_tol: float = 0.0
+    rel_tol: float = 0.0
+
+    def __post_init__(self):
+        if self.abs_tol < 0 or self.rel_tol < 0:
+            raise ValueError(f"Tolérance négative: abs={self.abs_tol}, rel={self.rel_tol}")
+
+    def close(self, a, b) -> np.ndarray:
+        """Element-wise equality within tolerance (NaN == NaN, inf == inf)."""
+        a = np.asarray(a, dtype='float64')
+        b = np.asarray(b, dtype='float64')
+        with np.errstate(invalid='ignore'):
+            bound = np.maximum(self.abs_tol, self.rel_tol * np.maximum(np.abs(a), np.abs(b)))
+            return (np.abs(a - b) <= bound) | (a == b) | (np.isnan(a) & np.isnan(b))
+
+    def window(self, value: float) -> float:
+        """Largest |value - b| for any b close to value."""
+        if self.rel_tol >= 1:
+            return np.inf
+        return max(self.abs_tol, self.rel_tol * abs(value) / (1 - self.rel_tol))
+
+
+def as_tolerance(value: ToleranceLike) -> Tolerance:
+    """Tolerance from a number (absolute), an (abs, rel) pair or an {'abs', 'rel'} dict."""
+    if isinstance(value, Tolerance):
+        return value
+    if isinstance(value, dict):
+        unknown = set(value) - {'abs', 'rel', 'abs_tol', 'rel_tol'}
+        if unknown:
+            raise ValueError(f"Clés de tolérance inconnues: {sorted(unknown)} (attendu: abs, rel)")
+        return Tolerance(float(value.get('abs', value.get('abs_tol', 0.0))),
+                         float(value.get('rel', value.get('rel_tol', 0.0))))
+    if isinstance(value, (tuple, list)):
+        return Tolerance(*(float(v) for v in value))
+    return Tolerance(float(value))
+
+
+def resolve_tolerances(columns: List[str], tolerance: Optional[ToleranceLike] = None,
+                       column_tolerances: Optional[Dict[str, ToleranceLike]] = None) -> Dict[str, Tolerance]:
+    """Tolerance of each column: ``column_tolerances`` first, then the global
+    ``tolerance``; columns without either are left out (exact comparison)."""
+    per_column = {c: as_tolerance(t) for c, t in (column_tolerances or {}).items()}
+    default = as_tolerance(tolerance) if tolerance is not None else None
+    out = {}
+    for c in columns:
+        t = per_column.get(c, default)
+        if t is not None:
+            out[c] = t
+    return out
+
+
+def numeric_values(col: pd.Series) -> Optional[np.ndarray]:
+    """float64 values of a numeric or numeric-looking text column (NaN for NA),
+    None when some value is not a number. Text is parsed per distinct value;
+    codes with leading zeros ('007') are not numbers, as in canonical_cell."""
+    dtype = col.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return None
+    if pd.api.types.is_numeric_dtype(dtype):
+        return col.to_numpy(dtype='float64', na_value=np.nan)
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes, uniques = col.cat.codes.to_numpy(), dtype.categories
+    elif pd.api.types.is_string_dtype(dtype):
+        codes, uniques = pd.factorize(col, sort=False)
+    else:
+        return None
+    text = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.strip()
+    na = text.isin(_NA_SPELLINGS).to_numpy()
+    rest = text[~na]
+    if not rest.str.match(_NUMBER_RE).all():
+        return None
+    parsed = np.full(len(text) + 1, np.nan)
+    parsed[np.flatnonzero(~na)] = rest.to_numpy().astype('float64')
+    return parsed[np.where(codes < 0, len(text), codes)]
+
+
+def numeric_columns(left: pd.DataFrame, right: pd.DataFrame,
+                    tolerances: Dict[str, Tolerance]) -> Dict[str, Tuple[np.ndarray, np.ndarray, Tolerance]]:
+    """(left values, right values, tolerance) of the columns with a tolerance
+    that are numeric on both sides, in row order of each frame."""
+    out = {}
+    for c, tol in tolerances.items():
+        lv = numeric_values(left[c])
+        rv = numeric_values(right[c]) if lv is not None else None
+        if rv is not None:
+            out[c] = (lv, rv, tol)
+    return out
+
+
+def value_hashes(values: np.ndarray) -> np.ndarray:
+    """Hash of exact float64 values (-0.0 == 0.0, every NaN alike)."""
+    na = np.isnan(values)
+    out = pd.util.hash_array(np.where(na, 0.0, values) + 0.0)
+    out[na] = NA_HASH
+    return out
+
+
+def tolerant_fingerprints(df: pd.DataFrame, columns: List[str], numeric: Dict[str, np.ndarray],
+                          float_tol: float = 1e-9,
+                          category_hashes: Optional[Dict[int, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(row fingerprints, group hashes) of ``df[columns]``: the fingerprints
+    hash the ``numeric`` columns on their exact values, the groups hash the
+    other columns only (rows that can still match within tolerance)."""
+    n = len(df)
+    hashes = {c: value_hashes(numeric[c]) if c in numeric else
+              column_hashes(df[c], float_tol=float_tol, category_hashes=category_hashes) for c in columns}
+    groups = combine_hashes([hashes[c] for c in columns if c not in numeric], n)
+    return combine_hashes([hashes[c] for c in columns], n), groups
+
+
+def match_within_tolerance(left_values: np.ndarray, right_values: np.ndarray, tolerances: List[Tolerance],
+                           left_groups: np.ndarray, right_groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Greedy pairing of residual rows (2-D values, one column per tolerance)
+    within groups of equal non-numeric values; returns the matched positions
+    on each side. Both sides are sorted on (group, column with most distinct
+    values): a sweep pairs each left row with the first free right row of its
+    window on that column, then rows whose pair differs on another column walk
+    their window, in vectorized rounds. Greedy, so a better pairing may exist
+    when windows overlap.
+    """
+    w_col = max(range(left_values.shape[1]), key=lambda j: len(pd.unique(left_values[:, j])))
+    r_order = np.lexsort((right_values[:, w_col], right_groups))
+    l_order = np.lexsort((left_values[:, w_col], left_groups))
+    rv, lv = right_values[r_order], left_values[l_order]
+    # dense (group, value rank) keys so one searchsorted finds every window
+    group_ids = np.unique(np.concatenate([left_groups, right_groups]))
+    r_gid = np.searchsorted(group_ids, right_groups[r_order])
+    l_gid = np.searchsorted(group_ids, left_groups[l_order])
+    x = lv[:, w_col]
+    tol = tolerances[w_col]
+    with np.errstate(invalid='ignore'):
+        w = np.full(len(x), np.inf) if tol.rel_tol >= 1 else \
+            np.maximum(tol.abs_tol, tol.rel_tol * np.abs(x) / (1 - tol.rel_tol))
+        bounds = np.concatenate([rv[:, w_col], x - w, x + w])
+    ranks = np.unique(bounds, return_inverse=True)[1].reshape(-1)  # NaN ranks last, like the sort
+    span = np.int64(ranks.max() + 1)
+    n_right = len(rv)
+    right_key = r_gid * span + ranks[:n_right]
+    lo = np.searchsorted(right_key, l_gid * span + ranks[n_right:n_right + len(x)], 'left')
+    hi = np.searchsorted(right_key, l_gid * span + ranks[n_right + len(x):], 'right')
+    unbounded = np.isinf(x) | np.isinf(w)
+    if unbounded.any():
+        lo[unbounded] = np.searchsorted(r_gid, l_gid[unbounded], 'left')
+        hi[unbounded] = np.searchsorted(r_gid, l_gid[unbounded], 'right')
+    nan_rows = np.isnan(x)
+    if nan_rows.any():  # NaN only matches NaN: the end of the group
+        hi[nan_rows] = np.searchsorted(r_gid, l_gid[nan_rows], 'right')
+
+    # sweep: on the window column alone, the greedy choice of each left row (in
+    # order) is the first right row past the previous match, when still in window
+    partner = np.full(len(lv), -1, dtype='int64')
+    last = -1
+    for i, (start, stop) in enumerate(zip(lo.tolist(), hi.tolist())):
+        j = max(start, last + 1)
+        if j < stop:
+            partner[i] = last = j
+    swept = np.flatnonzero(partner >= 0)
+    ok = np.ones(len(swept), dtype=bool)
+    for j, t in enumerate(tolerances):
+        ok &= t.close(lv[swept, j], rv[partner[swept], j])
+    partner[swept[~ok]] = -1
+    used = np.zeros(n_right, dtype=bool)
+    used[partner[partner >= 0]] = True
+
+    # rows that failed on another column walk their window: one candidate per
+    # row and per round, a right row claimed twice goes to the first left row
+    ptr = lo.copy()
+    active = np.flatnonzero((partner < 0) & (ptr < hi))
+    while len(active):
+        p = ptr[active]
+        ok = ~used[p]
+        for j, t in enumerate(tolerances):
+            ok &= t.close(lv[active, j], rv[p, j])
+        claimed, first = np.unique(p[ok], return_index=True)
+        winners = active[np.flatnonzero(ok)[first]]
+        used[claimed] = True
+        partner[winners] = claimed
+        rest = active[partner[active] < 0]
+        ptr[rest] += 1
+        active = rest[ptr[rest] < hi[rest]]
+    matched = np.flatnonzero(partner >= 0)
+    return l_order[matched], r_order[partner[matched]]
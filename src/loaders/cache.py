@@ -0,0 +1,219 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Persistent cache of loader results, shared by every session and process that
+# points to the same directory. One entry = one Parquet file plus a JSON
+# sidecar; frames Parquet cannot hold (or without pyarrow) are not cached, so
+# nothing is ever unpickled from the directory, which is created private to
+# the user. Entries expire after their TTL (``ttl_seconds``, or the one given
+# to put/load, kept in the sidecar with the creation time) and the least
+# recently used ones (data file mtime, touched on every hit) are evicted once
+# the directory exceeds ``max_bytes``. File contents are part of their key and
+# never go stale; query results do, hence their TTL of minutes.
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+QUERY_TTL_SECONDS = 10 * 60
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+_ENV_DIR = 'COMPARATEUR_CACHE_DIR'
+
+
+def cache_key(source_type: str, target: str, query: Optional[str] = None,
+              content_hash: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
+    """Key of one loader call: source type, connection target (connection
+    string, host/database...), query text or file content hash, loader options."""
+    payload = json.dumps([source_type, target, query, content_hash, options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(source, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """Content hash of a file path, bytes, or binary file-like object."""
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+        return h.hexdigest()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return file_digest(f, chunk_size)
+    pos = source.tell() if hasattr(source, 'tell') else None
+    for block in iter(lambda: source.read(chunk_size), b''):
+        h.update(block)
+    if pos is not None:
+        source.seek(pos)
+    return h.hexdigest()
+
+
+class LoaderCache:
+    """On-disk cache of DataFrames; see the module comment for the policy.
+    ``stats`` counts hits and misses, time spent loading on misses and load
+    time saved by hits (the original load time of each hit entry)."""
+
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get(_ENV_DIR) or os.path.join(
+            os.path.expanduser('~'), '.cache', 'comparateur-donnees', 'loaders')
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        _check_private(self.directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'load_seconds': 0.0, 'saved_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _data_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.parquet')
+
+    def _ttl(self, meta: Dict[str, Any]) -> float:
+        return float(meta.get('ttl_seconds') or self.ttl_seconds)
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+        """(frame, metadata) for a live entry, (None, None) otherwise."""
+        meta = self._read_meta(key)
+        if meta is None:
+            return None, None
+        if time.time() - meta.get('created', 0) > self._ttl(meta):
+            self.invalidate(key)
+            return None, None
+        path = self._data_path(key)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # LRU clock
+        except Exception:
+            # Truncated or concurrently evicted entry: treat as a miss
+            self.invalidate(key)
+            return None, None
+        return df, meta
+
+    def put(self, key: str, df: pd.DataFrame, ttl_seconds: Optional[float] = None, **meta) -> bool:
+        """Store ``df``; False (nothing stored) when Parquet cannot hold it."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        os.close(fd)
+        try:
+            try:
+                df.to_parquet(tmp, index=False)
+            except Exception:
+                # Non-string or duplicate column names, mixed object columns, no pyarrow...
+                self.invalidate(key)
+                return False
+            os.replace(tmp, self._data_path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        meta = dict(meta, created=time.time(), rows=int(len(df)), columns=int(df.shape[1]))
+        if ttl_seconds is not None:
+            meta['ttl_seconds'] = float(ttl_seconds)
+        tmp_meta = f'{self._meta_path(key)}.tmp-{os.getpid()}-{threading.get_ident()}'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, default=str)
+        os.replace(tmp_meta, self._meta_path(key))
+        self.evict()
+        return True
+
+    def load(self, key: str, loader: Callable[[], pd.DataFrame], refresh: bool = False,
+             ttl_seconds: Optional[float] = None, **meta) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Cached result of ``loader()``. Returns the frame and {'hit': bool,
+        'seconds': time of this call, 'load_seconds': original load time,
+        'age_seconds': age of the data (0 when just loaded)}."""
+        start = time.perf_counter()
+        if not refresh:
+            df, stored = self.get(key)
+            if df is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                    self.stats['saved_seconds'] += float(stored.get('load_seconds', 0.0))
+                return df, {'hit': True, 'seconds': time.perf_counter() - start,
+                            'load_seconds': stored.get('load_seconds'),
+                            'age_seconds': max(time.time() - stored.get('created', 0), 0.0)}
+        df = loader()
+        elapsed = time.perf_counter() - start
+        self.put(key, df, ttl_seconds=ttl_seconds, load_seconds=elapsed, **meta)
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['load_seconds'] += elapsed
+        return df, {'hit': False, 'seconds': elapsed, 'load_seconds': elapsed, 'age_seconds': 0.0}
+
+    def invalidate(self, key: str) -> None:
+        # .pkl: entries written by earlier versions, removed but never read
+        legacy = os.path.join(self.directory, f'{key}.pkl')
+        for path in (self._data_path(key), legacy, self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        for key in self.keys():
+            self.invalidate(key)
+
+    def keys(self) -> List[str]:
+        return [name[:-5] for name in os.listdir(self.directory) if name.endswith('.json')]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Metadata of every entry, with its key, size and last use."""
+        out = []
+        for key in self.keys():
+            meta = self._read_meta(key)
+            path = self._data_path(key)
+            if meta is None or not os.path.exists(path):
+                continue
+            st = os.stat(path)
+            out.append(dict(meta, key=key, bytes=st.st_size, last_used=st.st_mtime))
+        return out
+
+    def size(self) -> int:
+        return sum(e['bytes'] for e in self.entries())
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones above max_bytes."""
+        now = time.time()
+        live = []
+        for e in self.entries():
+            if now - e.get('created', 0) > self._ttl(e):
+                self.invalidate(e['key'])
+            else:
+                live.append(e)
+        total = sum(e['bytes'] for e in live)
+        for e in sorted(live, key=lambda e: e['last_used']):
+            if total <= self.max_bytes:
+                break
+            self.invalidate(e['key'])
+            total -= e['bytes']
+
+
+def _check_private(directory: str) -> None:
+    """Refuse a cache directory other users can write to or do not own."""
+    if not hasattr(os, 'getuid'):  # Windows: per-user profile directories
+        return
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Répertoire de cache partagé ou appartenant à un autre utilisateur: {directory} "
+                              f"(attendu: propriétaire courant, droits 700)")
+
+
+_default: Optional[LoaderCache] = None
+
+
+def get_default_cache() -> LoaderCache:
+    """Process-wide cache in $COMPARATEUR_CACHE_DIR (default ~/.cache/comparateur-donnees)."""
+    global _default
+    if _default is None:
+        _default = LoaderCache()
+    return _default
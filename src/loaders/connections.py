@@ -0,0 +1,156 @@
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+# Process-wide connection registry, so that Streamlit reruns and repeated
+# comparisons reuse warm connections instead of paying connect + TLS + login:
+#   - one SQLAlchemy engine (bounded QueuePool, pre-ping) per connection string;
+#   - one pool of raw DB-API connections (pytds, mssql-python) per set of
+#     connection parameters, health-checked on checkout and evicted when idle.
+
+ENGINE_POOL_SIZE = 5
+ENGINE_MAX_OVERFLOW = 5
+ENGINE_POOL_RECYCLE = 1800
+
+_lock = threading.Lock()
+_engines: Dict[Tuple, Engine] = {}
+_pools: Dict[Tuple, 'DbapiPool'] = {}
+
+
+def get_engine(
+    conn_str: str,
+    pool_size: int = ENGINE_POOL_SIZE,
+    max_overflow: int = ENGINE_MAX_OVERFLOW,
+    pool_recycle: int = ENGINE_POOL_RECYCLE,
+) -> Engine:
+    """Shared engine for ``conn_str`` (created on first use; SQLAlchemy is
+    imported here, so DB-API pools and CSV loads do not pay for it)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    key = (conn_str, pool_size, max_overflow, pool_recycle)
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            if make_url(conn_str).get_backend_name() == 'sqlite':
+                # SQLite pools are per file / per thread and take no sizing options
+                engine = create_engine(conn_str)
+            else:
+                engine = create_engine(conn_str, pool_size=pool_size, max_overflow=max_overflow,
+                                       pool_recycle=pool_recycle, pool_pre_ping=True)
+            _engines[key] = engine
+        return engine
+
+
+def _ping(conn) -> bool:
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute('SELECT 1')
+            cur.fetchall()
+        finally:
+            cur.close()
+        return True
+    except Exception:
+        return False
+
+
+def _close(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class DbapiPool:
+    """Warm DB-API connections for one set of connection parameters.
+
+    Idle connections are checked with ``SELECT 1`` before reuse and closed
+    after ``idle_timeout`` seconds; at most ``max_idle`` are kept and at most
+    ``max_size`` are open at the same time (checkout waits for a free slot)."""
+
+    def __init__(self, connect: Callable[[], Any], max_size: int = 8, max_idle: int = 4,
+                 idle_timeout: float = 300.0, checkout_timeout: Optional[float] = 300.0):
+        self.connect = connect
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: List[Tuple[float, Any]] = []
+        self._lock = threading.Lock()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [c for t, c in self._idle if now - t > self.idle_timeout]
+            self._idle = [(t, c) for t, c in self._idle if now - t <= self.idle_timeout]
+        for conn in expired:
+            _close(conn)
+
+    def _checkout(self):
+        self._evict_expired()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                _, conn = self._idle.pop()
+            if _ping(conn):
+                return conn
+            _close(conn)
+        return self.connect()
+
+    def _checkin(self, conn) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((time.monotonic(), conn))
+                return
+        _close(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection; it goes back to the pool unless the block failed
+        (or was abandoned mid-stream), in which case it is closed."""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError('Aucune connexion disponible dans le pool (délai dépassé)')
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                _close(conn)
+                raise
+            self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            _close(conn)
+
+
+def get_dbapi_pool(key: Tuple, connect: Callable[[], Any], **options) -> DbapiPool:
+    """Shared pool for ``key`` (driver name + connection parameters); ``connect``
+    opens a new connection and is only used when the pool is created."""
+    with _lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = DbapiPool(connect, **options)
+        return pool
+
+
+def close_all() -> None:
+    """Dispose every engine and close every idle pooled connection."""
+    with _lock:
+        engines, pools = list(_engines.values()), list(_pools.values())
+        _engines.clear()
+        _pools.clear()
+    for engine in engines:
+        engine.dispose()
+    for pool in pools:
+        pool.close()
@@ -1,21 +1,244 @@
-
 from __future__ import annotations
+import csv
+import io
+import os
 import pandas as pd
-from typing import Optional, Dict
-from ..utils.normalize import apply_smart_string
+from typing import Optional, Dict, Iterator, List
+from ..utils.normalize import format_loaded_frame
+from ..utils.profiling import Profiler, as_profiler
+from ..utils.progress import ProgressCallback, RateMeter
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: falls back to the pandas C parser
+    pa = None
+
+# Single CSV ingestion path (loader functions and the app). With pyarrow, the
+# file is memory-mapped (or wrapped without copy when already in memory),
+# parsed by the multithreaded Arrow reader with every column as text, only the
+# requested columns are converted, and trimming / NA filling is done on Arrow
+# arrays before the conversion to pandas. Same result as
+# read_csv(dtype='string') followed by format_loaded_frame. Arrow rejects rows
+# whose field count differs from the header, which pandas pads with NA (or
+# reads with an index column): such files go through pandas.
+
+# pandas' default NA spellings, so that both parsers agree
+_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+              '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def _source_size(source) -> Optional[int]:
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    return None
+
+
+def _arrow_input(source):
+    """Memory-map local files; wrap in-memory uploads without copying."""
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source), 'r')
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(pa.py_buffer(source))
+    if hasattr(source, 'getbuffer'):
+        return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    return pa.BufferReader(pa.py_buffer(source.read()))
+
+
+def _pandas_input(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _header(source, sep: str, encoding: Optional[str]) -> List[str]:
+    """Column names as pandas would report them (blank cells named 'Unnamed: i',
+    duplicates mangled to 'a.1')."""
+    enc = 'utf-8-sig' if (encoding or 'utf-8').lower().replace('_', '-') in ('utf-8', 'utf8') else encoding
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=enc, newline='') as f:
+            row = next(csv.reader(f, delimiter=sep), None)
+    else:
+        data = source if isinstance(source, (bytes, bytearray, memoryview)) else \
+            source.getbuffer() if hasattr(source, 'getbuffer') else None
+        if data is None:
+            raise TypeError('Source CSV non supportée')
+        head = bytes(data[:1024 * 1024])
+        row = next(csv.reader(io.StringIO(head.decode(enc, errors='replace'), newline=''), delimiter=sep), None)
+    if not row:
+        raise ValueError('Fichier CSV vide')
+    names, seen = [], {}
+    for i, name in enumerate(row):
+        name = name or f'Unnamed: {i}'
+        base, n = name, seen.get(name, 0)
+        while name in seen:
+            n += 1
+            name = f'{base}.{n}'
+        seen[base] = n
+        seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _can_use_arrow(sep: str, dtype) -> bool:
+    return pa is not None and len(sep) == 1 and (dtype is None or dtype == 'string')
+
+
+def _arrow_options(names: List[str], usecols: Optional[List[str]], sep: str, encoding: Optional[str],
+                   na_values: Optional[list], keep_default_na: bool, block_size: int):
+    if usecols is not None:
+        missing = [c for c in usecols if c not in names]
+        if missing:
+            raise ValueError(f"Colonnes absentes du CSV: {missing}")
+    nulls = (list(_NA_VALUES) if keep_default_na else []) + [str(v) for v in (na_values or [])]
+    read = pacsv.ReadOptions(column_names=names, skip_rows=1, use_threads=True,
+                             block_size=block_size, encoding=encoding or 'utf8')
+    parse = pacsv.ParseOptions(delimiter=sep, newlines_in_values=True)
+    convert = pacsv.ConvertOptions(
+        column_types={c: pa.string() for c in names},
+        include_columns=list(usecols) if usecols is not None else None,
+        null_values=nulls, strings_can_be_null=True, quoted_strings_can_be_null=True,
+    )
+    return read, parse, convert
+
+
+def _to_pandas(table, as_string: bool) -> pd.DataFrame:
+    """Trim (and fill NA with '' for as_string) on Arrow, then convert to 'string' columns."""
+    cols = {}
+    for i in range(table.num_columns):
+        col = pc.utf8_trim_whitespace(table.column(i))
+        if as_string:
+            col = pc.fill_null(col, '')
+        cols[i] = pd.Series(pd.StringDtype().__from_arrow__(col))
+    df = pd.DataFrame(cols)
+    df.columns = table.column_names
+    return df
+
+
+def _mb_per_sec(meter: RateMeter, nbytes: Optional[int]) -> Dict[str, float]:
+    if not nbytes:
+        return {}
+    elapsed = meter.elapsed
+    return {'bytes': nbytes, 'mb_per_sec': nbytes / 1024 ** 2 / elapsed if elapsed > 0 else 0.0}
+
 
 def load_from_csv(
-    path: str,
+    path,
     sep: str = ',',
     encoding: Optional[str] = None,
     dtype: Optional[Dict] = None,
     na_values: Optional[list] = None,
     keep_default_na: bool = True,
+    usecols: Optional[List[str]] = None,
+    as_string: bool = True,
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
 ) -> pd.DataFrame:
-    if dtype is None:
-        dtype = 'string'
-    df = pd.read_csv(path, sep=sep, encoding=encoding, dtype=dtype,
-                     na_values=na_values, keep_default_na=keep_default_na)
-    # smart formatting
-    df = apply_smart_string(df)
+    """Read a CSV (path, bytes or in-memory upload) with every column as text.
+
+    ``usecols`` restricts the columns converted. ``as_string=True`` applies
+    the smart string formatting (NA -> ''), otherwise values are only trimmed
+    and NA is kept. ``on_progress`` gets a final 'parse' event with the
+    throughput in MB/s; ``profiler`` records the 'parse' and 'format' stages."""
+    prof = as_profiler(profiler)
+    meter = RateMeter('parse', on_progress)
+    nbytes = _source_size(path)
+    df = None
+    if _can_use_arrow(sep, dtype):
+        names = _header(path, sep, encoding)
+        options = _arrow_options(names, usecols, sep, encoding, na_values, keep_default_na, _BLOCK_SIZE)
+        try:
+            with prof.stage('parse') as st, _arrow_input(path) as f:
+                table = pacsv.read_csv(f, *options)
+                st['rows'] = table.num_rows
+        except pa.ArrowInvalid:  # ragged rows
+            table = None
+        if table is not None:
+            with prof.stage('format', rows=table.num_rows):
+                df = _to_pandas(table, as_string)
+    if df is None:
+        with prof.stage('parse') as st:
+            df = pd.read_csv(_pandas_input(path), sep=sep, encoding=encoding, dtype=dtype or 'string',
+                             usecols=usecols, na_values=na_values, keep_default_na=keep_default_na)
+            st['rows'] = len(df)
+        with prof.stage('format', rows=len(df)):
+            df = format_loaded_frame(df, as_string)
+    meter.rows = len(df)
+    meter.finish(**_mb_per_sec(meter, nbytes))
     return df
+
+
+def _rechunk(reader, chunksize: int) -> Iterator['pa.Table']:
+    """Regroup the reader's record batches into tables of ``chunksize`` rows;
+    a file without data rows gives one empty table."""
+    pending, rows, emitted = [], 0, False
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield table.slice(0, chunksize)
+            emitted = True
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows or not emitted:
+        yield pa.Table.from_batches(pending, schema=reader.schema)
+
+
+def iter_csv_chunks(
+    path,
+    chunksize: int = 200_000,
+    sep: str = ',',
+    encoding: Optional[str] = None,
+    dtype: Optional[Dict] = None,
+    na_values: Optional[list] = None,
+    keep_default_na: bool = True,
+    usecols: Optional[List[str]] = None,
+    as_string: bool = True,
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[pd.DataFrame]:
+    """Same as load_from_csv, yielded in chunks of ``chunksize`` rows
+    (``on_progress`` gets a 'parse' event per chunk)."""
+    prof = as_profiler(profiler)
+    meter = RateMeter('parse', on_progress)
+    nbytes = _source_size(path)
+    emitted = 0
+    if _can_use_arrow(sep, dtype):
+        names = _header(path, sep, encoding)
+        read, parse, convert = _arrow_options(names, usecols, sep, encoding, na_values, keep_default_na,
+                                              min(_BLOCK_SIZE, max(chunksize * 64, 1 << 20)))
+        try:
+            with _arrow_input(path) as f:
+                reader = pacsv.open_csv(f, read_options=read, parse_options=parse, convert_options=convert)
+                for table in prof.iterate('parse', _rechunk(reader, chunksize)):
+                    with prof.stage('format', rows=table.num_rows):
+                        df = _to_pandas(table, as_string)
+                    meter.update(len(df), **_mb_per_sec(meter, f.tell()))
+                    emitted += len(df)
+                    yield df
+            meter.finish(**_mb_per_sec(meter, nbytes))
+            return
+        except pa.ArrowInvalid:  # ragged rows: pandas goes on after the rows already yielded
+            pass
+    with pd.read_csv(_pandas_input(path), sep=sep, encoding=encoding, dtype=dtype or 'string', usecols=usecols,
+                     na_values=na_values, keep_default_na=keep_default_na, chunksize=chunksize) as reader:
+        for chunk in prof.iterate('parse', reader):
+            if emitted:
+                skip = min(emitted, len(chunk))
+                chunk, emitted = chunk.iloc[skip:], emitted - skip
+                if chunk.empty:
+                    continue
+            with prof.stage('format', rows=len(chunk)):
+                chunk = format_loaded_frame(chunk, as_string)
+            meter.update(len(chunk))
+            yield chunk
+    meter.finish(**_mb_per_sec(meter, nbytes))
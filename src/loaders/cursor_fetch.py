@@ -0,0 +1,170 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from typing import Any, Iterator, List, Optional
+from ..utils.progress import ProgressCallback, RateMeter
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: falls back to NumPy-backed frames
+    pa = None
+
+# Batched DB-API fetch. Each fetchmany() batch is transposed and converted
+# column by column to typed Arrow arrays right away, so the Python tuples of a
+# batch are released before the next one is fetched: peak memory is the typed
+# result plus one batch, instead of every cell as a Python object.
+
+DEFAULT_BATCH_SIZE = 50_000
+DTYPE_BACKENDS = ('pyarrow', 'numpy')
+_ARROW_ERRORS = (TypeError, ValueError, OverflowError) if pa is None else (
+    pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError, OverflowError)
+
+
+class _ColumnBuffer:
+    """Typed chunks of one column. Each batch is typed by Arrow inference; a
+    batch of another type widens the column (int -> float, decimal
+    precision...) and a column that cannot be typed at all (mixed objects)
+    is kept as object. Decimals keep the column's declared ``scale``: Arrow
+    would rescale them to the largest scale seen, and their strings would no
+    longer be the driver's ('10.50' -> '10.5000000')."""
+
+    def __init__(self, scale: Optional[int] = None):
+        self.scale = scale
+        self.type = None
+        self.chunks: List[Any] = []
+        self.as_object = False
+
+    def append(self, values: tuple) -> None:
+        if self.as_object:
+            self.chunks.append(_object_array(values))
+            return
+        try:
+            # Inferred per batch: converting to a fixed type would silently
+            # truncate (2.5 -> 2 for an int64 column)
+            arr = pa.array(values)
+            if self.scale is not None and pa.types.is_decimal(arr.type) and arr.type.scale != self.scale:
+                arr = arr.cast(_decimal_type(arr.type, self.scale))
+            if self.type is not None and arr.type != self.type and not pa.types.is_null(arr.type):
+                arr = self._widen(arr)
+        except _ARROW_ERRORS:
+            self.chunks = [_object_array(c.to_pylist()) for c in self.chunks] + [_object_array(values)]
+            self.as_object = True
+            return
+        if self.type is None and not pa.types.is_null(arr.type):
+            self.type = arr.type
+        self.chunks.append(arr)
+
+    def _widen(self, arr):
+        common = pa.unify_schemas([pa.schema([('c', self.type)]), pa.schema([('c', arr.type)])],
+                                  promote_options='permissive').field('c').type
+        self.chunks = [c.cast(common) for c in self.chunks]
+        self.type = common
+        return arr.cast(common)
+
+    def take(self) -> pd.Series:
+        """Return the buffered values as a Series and clear the buffer
+        (the inferred type is kept for the following batches)."""
+        chunks, self.chunks = self.chunks, []
+        if self.as_object:
+            return pd.Series(np.concatenate(chunks) if chunks else np.empty(0, dtype=object), dtype=object)
+        if self.type is None:
+            # Only NULLs so far
+            return pd.Series([None] * sum(len(c) for c in chunks), dtype=object)
+        chunks = [pa.nulls(len(c), self.type) if pa.types.is_null(c.type) else c for c in chunks]
+        return pd.Series(pd.arrays.ArrowExtensionArray(pa.chunked_array(chunks, type=self.type)))
+
+
+def _decimal_type(inferred, scale: int):
+    # Same integer digits, declared fractional digits; a value with more
+    # digits than the declared scale fails the cast and the column stays object
+    precision = min(38, max(inferred.precision - inferred.scale, 1) + scale)
+    return pa.decimal128(precision, scale) if scale <= precision else inferred
+
+
+def _object_array(values) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = list(values)
+    return out
+
+
+def _columns(cur) -> List[str]:
+    return [d[0] for d in cur.description] if cur.description else []
+
+
+def _scales(cur) -> List[Optional[int]]:
+    # DB-API description: (name, type_code, display_size, internal_size, precision, scale, null_ok)
+    return [d[5] if len(d) > 5 and isinstance(d[5], int) else None for d in cur.description or ()]
+
+
+def _check_backend(dtype_backend: str) -> str:
+    if dtype_backend not in DTYPE_BACKENDS:
+        raise ValueError(f"dtype_backend inconnu: {dtype_backend} (attendu: {', '.join(DTYPE_BACKENDS)})")
+    return dtype_backend if pa is not None else 'numpy'
+
+
+def _frame(buffers: List[_ColumnBuffer], cols: List[str]) -> pd.DataFrame:
+    df = pd.DataFrame({i: b.take() for i, b in enumerate(buffers)})
+    df.columns = cols
+    return df
+
+
+def _batches(cur, batch_size: int, meter: RateMeter) -> Iterator[list]:
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        meter.update(len(rows))
+        yield rows
+
+
+def iter_cursor_frames(
+    cur,
+    chunksize: int = DEFAULT_BATCH_SIZE,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield DB-API cursor results as DataFrames of at most ``chunksize`` rows.
+    An empty result still yields one empty frame carrying the column names.
+    ``on_progress`` receives a 'fetch' event (rows, rows_per_sec) per batch."""
+    backend = _check_backend(dtype_backend)
+    cols = _columns(cur)
+    meter = RateMeter('fetch', on_progress)
+    buffers = [_ColumnBuffer(scale) for scale in _scales(cur)]
+    empty = True
+    for rows in _batches(cur, chunksize, meter):
+        empty = False
+        if backend == 'numpy':
+            yield pd.DataFrame(rows, columns=cols)
+            continue
+        for buf, values in zip(buffers, zip(*rows)):
+            buf.append(values)
+        del rows
+        yield _frame(buffers, cols)
+    meter.finish()
+    if empty:
+        yield pd.DataFrame(columns=cols)
+
+
+def fetch_frame(
+    cur,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+) -> pd.DataFrame:
+    """Whole cursor result as one DataFrame, fetched ``batch_size`` rows at a
+    time into typed columns (Arrow-backed dtypes with ``dtype_backend='pyarrow'``,
+    the default when pyarrow is installed)."""
+    backend = _check_backend(dtype_backend)
+    cols = _columns(cur)
+    meter = RateMeter('fetch', on_progress)
+    if backend == 'numpy':
+        frames = [pd.DataFrame(rows, columns=cols) for rows in _batches(cur, batch_size, meter)]
+        meter.finish()
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=cols)
+    buffers = [_ColumnBuffer(scale) for scale in _scales(cur)]
+    for rows in _batches(cur, batch_size, meter):
+        for buf, values in zip(buffers, zip(*rows)):
+            buf.append(values)
+        del rows
+    meter.finish()
+    return _frame(buffers, cols)
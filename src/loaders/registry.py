@@ -0,0 +1,134 @@
+from __future__ import annotations
+import importlib
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Registry of the source types. An entry names its loader module and
+# functions instead of importing them: the module is imported the first time
+# the type is used, and the database driver on its first connection, so
+# comparing two CSV files never loads SQLAlchemy, pytds or mssql-python.
+# Every type has the same interface: load (one frame), stream (chunks) and
+# schema (dtypes of a first small chunk). The app builds its source forms from
+# ``fields``; the batch runner checks specs against the load signature.
+
+# Rows read by schema()
+SCHEMA_ROWS = 100
+
+
+@dataclass(frozen=True)
+class Field:
+    """Loader parameter shown in the app's source form."""
+    name: str
+    label: str
+    kind: str = 'text'  # text, password, int, sql, bool, choice, columns (comma-separated list), file
+    default: Any = None
+    required: bool = False
+    choices: Tuple[Any, ...] = ()  # options of a choice, file extensions of a file
+
+
+@dataclass(frozen=True)
+class SourceType:
+    name: str
+    label: str
+    module: str                                   # relative to this package
+    load_function: str
+    stream_function: str
+    target: Callable[[Dict[str, Any]], str]       # what a load reads (cache key, labels)
+    fields: Tuple[Field, ...] = ()
+    drivers: Tuple[str, ...] = ()                 # driver modules, any one is enough
+    package: Optional[str] = None                 # pip package of the driver
+    query_field: Optional[str] = None
+    aliases: Dict[str, str] = field(default_factory=dict)      # accepted spellings in batch specs
+    app_defaults: Dict[str, Any] = field(default_factory=dict)  # fixed parameters of the app's loads
+
+    def function(self, name: str) -> Callable[..., Any]:
+        return getattr(importlib.import_module(self.module, __package__), name)
+
+    @property
+    def loader(self) -> Callable[..., Any]:
+        return self.function(self.load_function)
+
+    def load(self, **params):
+        return self.loader(**params)
+
+    def stream(self, **params) -> Iterator[Any]:
+        return self.function(self.stream_function)(**params)
+
+    def schema(self, **params) -> Dict[str, str]:
+        """{column: dtype} read from the first SCHEMA_ROWS rows (the query runs, only one chunk is fetched)."""
+        chunks = self.stream(chunksize=SCHEMA_ROWS, **params)
+        try:
+            first = next(chunks, None)
+        finally:
+            chunks.close()
+        return {} if first is None else {str(c): str(t) for c, t in first.dtypes.items()}
+
+    @property
+    def available(self) -> bool:
+        """Whether the driver is installed (looked up without importing it)."""
+        return not self.drivers or any(importlib.util.find_spec(d) is not None for d in self.drivers)
+
+
+_SOURCES: Dict[str, SourceType] = {}
+
+
+def register(source: SourceType) -> SourceType:
+    _SOURCES[source.name] = source
+    return source
+
+
+def source_types() -> List[str]:
+    return list(_SOURCES)
+
+
+def get_source(name: str) -> SourceType:
+    try:
+        return _SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Type de source inconnu: {name} (attendu: {', '.join(_SOURCES)})") from None
+
+
+_SERVER_FIELDS = (
+    Field('host', 'Hôte/IP', required=True),
+    Field('database', 'Base', required=True),
+    Field('user', 'Utilisateur'),
+    Field('password', 'Mot de passe', 'password'),
+    Field('port', 'Port', 'int', 1433),
+    Field('query', 'Requête SQL', 'sql', required=True),
+    Field('as_string', 'Forcer toutes les colonnes en string', 'bool', True),
+)
+
+
+def _server_target(params: Dict[str, Any]) -> str:
+    return f"{params.get('user') or ''}@{params.get('host')}:{int(params.get('port') or 1433)}/{params.get('database')}"
+
+
+register(SourceType(
+    'csv', 'CSV', '.csv_loader', 'load_from_csv', 'iter_csv_chunks',
+    target=lambda p: str(getattr(p.get('path'), 'name', p.get('path'))),
+    fields=(Field('path', 'Charger un CSV', 'file', required=True, choices=('csv',)),
+            Field('sep', 'Délimiteur CSV', 'choice', ',', choices=(',', ';', '\t', '|', ':')),
+            Field('usecols', 'Colonnes à charger (optionnel, séparées par des virgules)', 'columns')),
+    app_defaults={'as_string': False},  # trimmed text, NA kept
+))
+register(SourceType(
+    'sql', 'SQL (SQLAlchemy/ODBC)', '.sql_loader', 'load_from_sql', 'iter_sql_chunks',
+    target=lambda p: p['conn_str'],
+    fields=(Field('conn_str', 'Chaîne de connexion SQLAlchemy', required=True),
+            Field('sql_query', 'Requête SQL', 'sql', required=True),
+            Field('as_string', 'Forcer toutes les colonnes en string', 'bool', True)),
+    drivers=('sqlalchemy',), package='SQLAlchemy', query_field='sql_query',
+    aliases={'conn': 'conn_str', 'query': 'sql_query'},
+))
+register(SourceType(
+    'pytds', 'SQL Server (pytds)', '.sqlserver_pytds', 'load_from_sqlserver_pytds', 'iter_from_sqlserver_pytds',
+    target=_server_target, fields=_SERVER_FIELDS, drivers=('pytds', 'tds'), package='python-tds',
+    query_field='query',
+))
+register(SourceType(
+    'mssql', 'SQL Server (mssql-python)', '.sqlserver_mssqlpy', 'load_from_sqlserver_mssqlpy',
+    'iter_from_sqlserver_mssqlpy',
+    target=_server_target, fields=_SERVER_FIELDS, drivers=('mssql', 'mssql_python', 'mssqlpython'),
+    package='mssql-python', query_field='query',
+))
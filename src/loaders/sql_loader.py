@@ -1,31 +1,70 @@
-
 from __future__ import annotations
 import pandas as pd
-from sqlalchemy import create_engine, text
-from typing import Optional
-from ..utils.normalize import apply_smart_string
+from sqlalchemy import text
+from typing import Iterator, Optional, Union
+from sqlalchemy.sql.elements import TextClause
+from ..utils.normalize import format_loaded_frame
+from ..utils.profiling import Profiler, as_profiler
+from ..utils.progress import ProgressCallback, RateMeter
+from .connections import get_engine
+
+# Rows per chunk of a load: progress events and cancellation (raised from the
+# progress callback) then happen once per chunk instead of once per query
+DEFAULT_CHUNKSIZE = 50_000
+
+def _statement(sql_query):
+    # text clauses (e.g. changed_since_query, with bound parameters) pass through
+    return text(sql_query) if isinstance(sql_query, str) else sql_query
+
+def iter_sql_chunks(
+    conn_str: str,
+    sql_query: Union[str, TextClause],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    as_string: bool = True,
+    profiler: Optional[Profiler] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream a query as DataFrame chunks (server-side cursor where supported).
+    ``profiler`` records the 'connect', 'read_sql' and 'format' stages;
+    ``on_progress`` gets a 'read_sql' event (rows, rows_per_sec) per chunk."""
+    prof = as_profiler(profiler)
+    meter = RateMeter('read_sql', on_progress)
+    with prof.stage('connect'):
+        conn = get_engine(conn_str).connect().execution_options(stream_results=True)
+    with conn:
+        for chunk in prof.iterate('read_sql', pd.read_sql_query(_statement(sql_query), conn, chunksize=chunksize)):
+            with prof.stage('format', rows=len(chunk)):
+                chunk = format_loaded_frame(chunk, as_string)
+            meter.update(len(chunk))
+            yield chunk
+    meter.finish()
 
 def load_from_sql(
     conn_str: str,
-    sql_query: str,
-    chunksize: Optional[int] = None,
+    sql_query: Union[str, TextClause],
+    chunksize: Optional[int] = DEFAULT_CHUNKSIZE,
     as_string: bool = True,
+    profiler: Optional[Profiler] = None,
+    on_progress: Optional[ProgressCallback] = None,
 ) -> pd.DataFrame:
-    engine = create_engine(conn_str)
+    """Query result as one frame, read ``chunksize`` rows at a time through
+    iter_sql_chunks (``on_progress`` gets an event per chunk); with
+    ``chunksize=None``, in one read_sql_query call (one event at the end)."""
+    prof = as_profiler(profiler)
     if chunksize:
-        dfs = []
-        with engine.connect() as conn:
-            for chunk in pd.read_sql_query(text(sql_query), conn, chunksize=chunksize):
-                dfs.append(chunk)
-        df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
-    else:
-        with engine.connect() as conn:
-            df = pd.read_sql_query(text(sql_query), conn)
-    if as_string:
-        df = apply_smart_string(df)
-    else:
-        # minimal trim for object columns
-        for c in df.columns:
-            if pd.api.types.is_string_dtype(df[c]):
-                df[c] = df[c].str.strip()
+        dfs = list(iter_sql_chunks(conn_str, sql_query, chunksize=chunksize, as_string=as_string, profiler=prof,
+                                   on_progress=on_progress))
+        with prof.stage('concat', rows=sum(len(d) for d in dfs)):
+            return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    meter = RateMeter('read_sql', on_progress)
+    with prof.stage('connect'):
+        conn = get_engine(conn_str).connect()
+    with conn:
+        with prof.stage('read_sql') as st:
+            df = pd.read_sql_query(_statement(sql_query), conn)
+            st['rows'] = len(df)
+    with prof.stage('format', rows=len(df)):
+        df = format_loaded_frame(df, as_string)
+    meter.update(len(df))
+    meter.finish()
     return df
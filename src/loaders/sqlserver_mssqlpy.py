@@ -1,9 +1,14 @@
 
 from __future__ import annotations
 import importlib
+from contextlib import ExitStack
 import pandas as pd
-from typing import Optional
-from ..utils.normalize import apply_smart_string
+from typing import Dict, Iterator, Optional
+from ..utils.normalize import format_loaded_frame
+from ..utils.profiling import Profiler, as_profiler
+from ..utils.progress import ProgressCallback
+from .connections import get_dbapi_pool
+from .cursor_fetch import DEFAULT_BATCH_SIZE, fetch_frame, iter_cursor_frames
 
 def _import_mssql_module():
     for name in ('mssql', 'mssql_python', 'mssqlpython'):
@@ -13,6 +18,34 @@ def _import_mssql_module():
             continue
     raise ImportError("Le package 'mssql-python' n'est pas disponible. Installez-le via 'pip install mssql-python'.")
 
+# Index of the connect signature that last worked, per module name
+_working_signature: Dict[str, int] = {}
+
+def _connect(host, database, user, password, port, timeout):
+    mssql = _import_mssql_module()
+    # Essayer différentes signatures de connect (celle qui a fonctionné en premier)
+    signatures = (
+        dict(server=host, database=database, user=user, password=password, port=port, timeout=timeout),
+        dict(host=host, database=database, user=user, password=password, port=port, timeout=timeout),
+        dict(server=host, db=database, uid=user, pwd=password, port=port, timeout=timeout),
+    )
+    known = _working_signature.get(mssql.__name__)
+    order = [known] + [i for i in range(len(signatures)) if i != known] if known is not None else range(len(signatures))
+    last_err = None
+    for i in order:
+        try:
+            conn = mssql.connect(**{k: v for k, v in signatures[i].items() if v is not None})
+        except Exception as e:
+            last_err = e
+            continue
+        _working_signature[mssql.__name__] = i
+        return conn
+    raise RuntimeError(f"Impossible d'établir la connexion mssql-python: {last_err}")
+
+def _pool(host, database, user, password, port, timeout):
+    key = ('mssql-python', host, database, user, password, port, timeout)
+    return get_dbapi_pool(key, lambda: _connect(host, database, user, password, port, timeout))
+
 def load_from_sqlserver_mssqlpy(
     host: str,
     database: str,
@@ -22,37 +55,56 @@ def load_from_sqlserver_mssqlpy(
     query: str = '',
     as_string: bool = True,
     timeout: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
 ) -> pd.DataFrame:
+    """Run ``query`` and return the result, fetched ``batch_size`` rows at a
+    time into typed (Arrow-backed by default) columns. ``profiler`` records the
+    'connect', 'execute', 'fetch' and 'format' stages."""
     if not query:
         raise ValueError('Requête SQL vide')
-    mssql = _import_mssql_module()
-    # Essayer différentes signatures de connect
-    conn = None
-    last_err = None
-    for kwargs in (
-        dict(server=host, database=database, user=user, password=password, port=port, timeout=timeout),
-        dict(host=host, database=database, user=user, password=password, port=port, timeout=timeout),
-        dict(server=host, db=database, uid=user, pwd=password, port=port, timeout=timeout),
-    ):
-        try:
-            conn = mssql.connect(**{k: v for k, v in kwargs.items() if v is not None})
-            break
-        except Exception as e:
-            last_err = e
-            conn = None
-    if conn is None:
-        raise RuntimeError(f"Impossible d'établir la connexion mssql-python: {last_err}")
-    try:
+    prof = as_profiler(profiler)
+    with ExitStack() as stack:
+        with prof.stage('connect'):
+            conn = stack.enter_context(_pool(host, database, user, password, port, timeout).connection())
         cur = conn.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        cols = [d[0] for d in cur.description] if cur.description else []
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-    df = pd.DataFrame(rows, columns=cols)
-    if as_string:
-        df = apply_smart_string(df)
-    return df
+        with prof.stage('execute'):
+            cur.execute(query)
+        with prof.stage('fetch') as st:
+            df = fetch_frame(cur, batch_size, dtype_backend, on_progress)
+            st['rows'] = len(df)
+        cur.close()
+    with prof.stage('format', rows=len(df)):
+        return format_loaded_frame(df, as_string)
+
+def iter_from_sqlserver_mssqlpy(
+    host: str,
+    database: str,
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    port: int = 1433,
+    query: str = '',
+    chunksize: int = DEFAULT_BATCH_SIZE,
+    as_string: bool = True,
+    timeout: Optional[int] = None,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream the query result in DataFrame chunks of ``chunksize`` rows."""
+    if not query:
+        raise ValueError('Requête SQL vide')
+    prof = as_profiler(profiler)
+    with ExitStack() as stack:
+        with prof.stage('connect'):
+            conn = stack.enter_context(_pool(host, database, user, password, port, timeout).connection())
+        cur = conn.cursor()
+        with prof.stage('execute'):
+            cur.execute(query)
+        for chunk in prof.iterate('fetch', iter_cursor_frames(cur, chunksize, dtype_backend, on_progress)):
+            with prof.stage('format', rows=len(chunk)):
+                chunk = format_loaded_frame(chunk, as_string)
+            yield chunk
+        cur.close()
@@ -1,13 +1,30 @@
-
 from __future__ import annotations
+import importlib
+from contextlib import ExitStack
 import pandas as pd
-from typing import Optional
-from ..utils.normalize import apply_smart_string
+from typing import Iterator, Optional
+from ..utils.normalize import format_loaded_frame
+from ..utils.profiling import Profiler, as_profiler
+from ..utils.progress import ProgressCallback
+from .connections import get_dbapi_pool
+from .cursor_fetch import DEFAULT_BATCH_SIZE, fetch_frame, iter_cursor_frames
+
+def _import_tds_module():
+    """The python-tds driver, imported on first connection (module 'pytds', or 'tds' in old releases)."""
+    for name in ('pytds', 'tds'):
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    raise ImportError("Le package 'python-tds' n'est pas disponible. Installez-le via 'pip install python-tds'.")
 
-try:
-    import pytds as tds
-except ImportError:
-    import tds  # fallback module name
+def _connect(host, database, user, password, port, timeout):
+    tds = _import_tds_module()
+    return tds.connect(server=host, database=database, user=user, password=password, port=port, timeout=timeout, login_timeout=timeout, autocommit=True)
+
+def _pool(host, database, user, password, port, timeout):
+    key = ('pytds', host, database, user, password, port, timeout)
+    return get_dbapi_pool(key, lambda: _connect(host, database, user, password, port, timeout))
 
 def load_from_sqlserver_pytds(
     host: str,
@@ -18,22 +35,54 @@ def load_from_sqlserver_pytds(
     query: str = '',
     as_string: bool = True,
     timeout: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
 ) -> pd.DataFrame:
+    """Run ``query`` and return the result, fetched ``batch_size`` rows at a
+    time into typed (Arrow-backed by default) columns. ``profiler`` records the
+    'connect', 'execute', 'fetch' and 'format' stages."""
+    if not query:
+        raise ValueError('Requête SQL vide')
+    prof = as_profiler(profiler)
+    with ExitStack() as stack:
+        with prof.stage('connect'):
+            conn = stack.enter_context(_pool(host, database, user, password, port, timeout).connection())
+        with conn.cursor() as cur:
+            with prof.stage('execute'):
+                cur.execute(query)
+            with prof.stage('fetch') as st:
+                df = fetch_frame(cur, batch_size, dtype_backend, on_progress)
+                st['rows'] = len(df)
+    with prof.stage('format', rows=len(df)):
+        return format_loaded_frame(df, as_string)
+
+def iter_from_sqlserver_pytds(
+    host: str,
+    database: str,
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    port: int = 1433,
+    query: str = '',
+    chunksize: int = DEFAULT_BATCH_SIZE,
+    as_string: bool = True,
+    timeout: Optional[int] = None,
+    dtype_backend: str = 'pyarrow',
+    on_progress: Optional[ProgressCallback] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream the query result in DataFrame chunks of ``chunksize`` rows."""
     if not query:
         raise ValueError('Requête SQL vide')
-    conn = tds.connect(server=host, database=database, user=user, password=password, port=port, timeout=timeout, login_timeout=timeout, autocommit=True)
-    try:
+    prof = as_profiler(profiler)
+    with ExitStack() as stack:
+        with prof.stage('connect'):
+            conn = stack.enter_context(_pool(host, database, user, password, port, timeout).connection())
         with conn.cursor() as cur:
-            cur.execute(query)
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description] if cur.description else []
-    finally:
-        conn.close()
-    df = pd.DataFrame(rows, columns=cols)
-    if as_string:
-        df = apply_smart_string(df)
-    else:
-        for c in df.columns:
-            if pd.api.types.is_string_dtype(df[c]):
-                df[c] = df[c].str.strip()
-    return df
+            with prof.stage('execute'):
+                cur.execute(query)
+            for chunk in prof.iterate('fetch', iter_cursor_frames(cur, chunksize, dtype_backend, on_progress)):
+                with prof.stage('format', rows=len(chunk)):
+                    chunk = format_loaded_frame(chunk, as_string)
+                yield chunk
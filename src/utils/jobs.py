@@ -0,0 +1,200 @@
+from __future__ import annotations
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from .progress import ProgressCallback
+
+# Background jobs of the app. A load or a comparison runs in a worker thread
+# of a process-wide registry and outlives the Streamlit script run that
+# started it: the session only keeps the job id and reattaches to the job
+# (running or finished) on the next rerun. The work receives the job's
+# ProgressCallback; events ('stage', 'rows', 'rows_per_sec', and 'step'/
+# 'steps' or 'total' when the amount of work is known) update the job, and
+# after cancel() the next event raises JobCancelled inside the work, which
+# therefore stops at its next batch or stage.
+#
+# The registry is shared by every session of the server: each job carries the
+# owner token of the session that submitted it (``owner``), get/cancel/jobs
+# only see the caller's jobs, and ids are random so they cannot be guessed.
+# Each owner also gets its own worker threads: concurrency is limited per
+# session, not shared by all of them.
+
+STATES = ('pending', 'running', 'done', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised in a job's work by its progress callback once cancel() was called."""
+
+
+class Job:
+    def __init__(self, job_id: str, name: str, kind: str = '', owner: Optional[str] = None):
+        self.id = job_id
+        self.name = name
+        self.kind = kind
+        self.owner = owner
+        self.state = 'pending'
+        self.stage: Optional[str] = None
+        self.rows = 0
+        self.rows_per_sec = 0.0
+        self.mb_per_sec = 0.0
+        self.step: Optional[int] = None
+        self.steps: Optional[int] = None
+        self.total: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+
+    def progress(self, event: Dict[str, Any]) -> None:
+        """ProgressCallback of the work; raises JobCancelled after cancel()."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job annulé: {self.name}")
+        self.stage = event.get('stage', self.stage)
+        for name in ('rows', 'rows_per_sec', 'mb_per_sec', 'step', 'steps', 'total'):
+            if event.get(name) is not None:
+                setattr(self, name, event[name])
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.state in ('done', 'failed', 'cancelled')
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the work done, None when its amount is unknown."""
+        if self.state == 'done':
+            return 1.0
+        if self.steps:
+            return min((self.step or 0) / self.steps, 1.0)
+        if self.total:
+            return min(self.rows / self.total, 1.0)
+        return None
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left, extrapolated from the elapsed time and the fraction done."""
+        fraction = self.fraction
+        if self.done or not fraction or fraction >= 1.0:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+
+class JobRegistry:
+    """Runs each owner's jobs on ``max_workers`` threads of its own, so a
+    session's long load never queues the jobs of another session, and keeps,
+    per owner, the last ``keep`` finished ones, for at most ``max_age`` seconds
+    after they end. An owner's threads end with its last unfinished job."""
+
+    def __init__(self, max_workers: int = 2, keep: int = 20, max_age: float = 3600.0):
+        self.max_workers = max_workers
+        self._executors: Dict[Optional[str], ThreadPoolExecutor] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.keep = keep
+        self.max_age = max_age
+
+    def submit(self, name: str, work: Callable[[ProgressCallback], Any], kind: str = '',
+               owner: Optional[str] = None) -> Job:
+        """Start ``work(progress)`` in the background for ``owner`` (session
+        token); its return value becomes ``job.result``."""
+        with self._lock:
+            job = Job(uuid.uuid4().hex, name, kind, owner)
+            self._jobs[job.id] = job
+            self._prune()
+            executor = self._executors.get(owner)
+            if executor is None:
+                executor = self._executors[owner] = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='comparateur-job')
+            executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[ProgressCallback], Any]) -> None:
+        try:
+            self._execute(job, work)
+        finally:
+            self._release(job.owner)
+
+    def _execute(self, job: Job, work: Callable[[ProgressCallback], Any]) -> None:
+        job.started = time.time()
+        if job.cancel_requested:
+            job.state = 'cancelled'
+            job.finished = job.started
+            return
+        job.state = 'running'
+        try:
+            job.result = work(job.progress)
+            job.state = 'done'
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.error = e
+            job.state = 'failed'
+        finally:
+            job.finished = time.time()
+
+    def _release(self, owner: Optional[str]) -> None:
+        # submit() registers a job and hands it to the executor under the same
+        # lock, so an executor is only dropped when no job can still reach it
+        with self._lock:
+            if any(j.owner == owner and not j.done for j in self._jobs.values()):
+                return
+            executor = self._executors.pop(owner, None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished: Dict[Optional[str], List[Job]] = {}
+        for job in self._jobs.values():
+            if job.done:
+                finished.setdefault(job.owner, []).append(job)
+        for jobs in finished.values():
+            for i, job in enumerate(jobs):
+                if i < len(jobs) - self.keep or now - (job.finished or now) > self.max_age:
+                    del self._jobs[job.id]
+
+    def get(self, job_id: Optional[str], owner: Optional[str] = None) -> Optional[Job]:
+        """Job ``job_id`` if it belongs to ``owner``."""
+        with self._lock:
+            job = self._jobs.get(job_id) if job_id else None
+        return job if job is not None and job.owner == owner else None
+
+    def cancel(self, job_id: str, owner: Optional[str] = None) -> bool:
+        job = self.get(job_id, owner)
+        if job is None or job.done:
+            return False
+        job.cancel()
+        return True
+
+    def jobs(self, kind: Optional[str] = None, owner: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            return [j for j in self._jobs.values() if j.owner == owner and (kind is None or j.kind == kind)]
+
+
+_default: Optional[JobRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_default_registry() -> JobRegistry:
+    """Process-wide registry (shared by every Streamlit session of the server)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobRegistry()
+        return _default
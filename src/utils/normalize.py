@@ -3,6 +3,10 @@ from __future__ import annotations
 import pandas as pd
 import numpy as np
 
+def float_digits(float_tol: float = 1e-9) -> int:
+    """Number of decimals used to round floats for a given tolerance."""
+    return max(0, int(abs(np.log10(float_tol)))) if float_tol > 0 else 9
+
 def canonical_cell(value, float_tol: float = 1e-9):
     if pd.isna(value):
         return '<<NA>>'
@@ -11,7 +15,7 @@ def canonical_cell(value, float_tol: float = 1e-9):
     if isinstance(value, (np.integer, int)):
         return int(value)
     if isinstance(value, (np.floating, float)):
-        return round(float(value), max(0, int(abs(np.log10(float_tol)))) if float_tol > 0 else 9)
+        return round(float(value), float_digits(float_tol))
     if isinstance(value, (pd.Timestamp,)):
         return value.isoformat()
     s = str(value).strip()
@@ -21,7 +25,7 @@ def canonical_cell(value, float_tol: float = 1e-9):
     if not has_leading_zero:
         try:
             if '.' in s or 'e' in s.lower():
-                return round(float(s), max(0, int(abs(np.log10(float_tol)))) if float_tol > 0 else 9)
+                return round(float(s), float_digits(float_tol))
             if s.lstrip('-').isdigit():
                 return int(s)
         except Exception:
@@ -32,6 +36,23 @@ def canonical_row(row: pd.Series, columns, float_tol: float = 1e-9, ignore_colum
     cols = sorted(columns) if ignore_column_order else list(columns)
     return tuple(canonical_cell(row[c], float_tol=float_tol) for c in cols)
 
+def isoformat_datetimes(values: np.ndarray) -> np.ndarray:
+    """Vectorized ``Timestamp.isoformat()`` for a tz-naive datetime64 array.
+    NaT entries come back as ''; callers mask them beforehand.
+    """
+    ns = values.astype('datetime64[ns]')
+    out = np.datetime_as_string(ns.astype('datetime64[s]')).astype(object)
+    nat = np.isnat(ns)
+    frac = ns.view('i8') % 1_000_000_000
+    micro = ~nat & (frac != 0) & (frac % 1000 == 0)
+    nano = ~nat & (frac % 1000 != 0)
+    if micro.any():
+        out[micro] = out[micro] + np.char.mod('.%06d', frac[micro] // 1000).astype(object)
+    if nano.any():
+        out[nano] = out[nano] + np.char.mod('.%09d', frac[nano]).astype(object)
+    out[nat] = ''
+    return out
+
 def normalize_object_columns(df: pd.DataFrame) -> pd.DataFrame:
     df2 = df.copy()
     for col in df2.columns:
@@ -39,6 +60,69 @@ def normalize_object_columns(df: pd.DataFrame) -> pd.DataFrame:
             df2[col] = df2[col].astype(str).str.strip()
     return df2
 
+def _is_text(col: pd.Series) -> bool:
+    return col.dtype == 'object' or pd.api.types.is_string_dtype(col)
+
+def _normalized_codes(col: pd.Series):
+    """(codes, dictionary) of ``str(v).strip()`` for every cell, the values of
+    normalize_object_columns, with str/strip applied to distinct values only."""
+    if col.dtype == 'object' and pd.api.types.infer_dtype(col, skipna=True) not in ('string', 'empty'):
+        # mixed objects: 1, 1.0 and True factorize together, so normalize per row
+        return pd.factorize(col.astype(str).str.strip())
+    codes, uniques = pd.factorize(col)
+    raw = pd.Index(uniques).astype(str)
+    uniques = raw.str.strip()
+    merge = bool((uniques != raw).any())
+    na = codes < 0
+    if na.any():
+        # NA spellings differ ('<NA>', 'None', 'nan'): keep each one's str()
+        na_codes, na_uniques = pd.factorize(col[na].astype(str).str.strip())
+        codes[na] = na_codes + len(uniques)
+        uniques = uniques.append(pd.Index(na_uniques, dtype=object))
+        merge = True
+    if not merge:
+        return codes, uniques
+    merged, dictionary = pd.factorize(uniques)  # ' a' and 'a' are one value once stripped
+    return merged[codes], pd.Index(dictionary, dtype=object)
+
+def encode_string_columns(left: pd.DataFrame, right: pd.DataFrame, sorted_columns=()):
+    """Dictionary-encoded counterpart of normalize_object_columns for a pair of
+    frames: each text column becomes a Categorical over the union of both
+    sides' stripped values, with the same CategoricalDtype on both sides, so
+    comparisons and joins run on integer codes. Equal cells and decoded values
+    are those of normalize_object_columns; categories of ``sorted_columns``
+    (keys) are sorted so that code order is string order. A column that is
+    text on one side only is normalized the usual way; other columns are not
+    copied."""
+    left_e, right_e = left.copy(deep=False), right.copy(deep=False)
+    frames = (left_e, right_e)
+    columns = list(left_e.columns) + [c for c in right_e.columns if c not in set(left_e.columns)]
+    for c in columns:
+        present = [df for df in frames if c in df.columns]
+        text = [df for df in present if _is_text(df[c])]
+        if not text:
+            continue
+        if len(text) < len(present):
+            for df in text:
+                df[c] = df[c].astype(str).str.strip()
+            continue
+        encoded = [_normalized_codes(df[c]) for df in text]
+        # one pass over both dictionaries gives the shared codes
+        mapping, categories = pd.factorize(np.concatenate([d.to_numpy(dtype=object) for _, d in encoded]),
+                                           sort=c in sorted_columns)
+        dtype = pd.CategoricalDtype(pd.Index(categories, dtype=object))
+        offset = 0
+        for df, (codes, dictionary) in zip(text, encoded):
+            df[c] = pd.Categorical.from_codes(mapping[offset:offset + len(dictionary)][codes], dtype=dtype,
+                                              validate=False)
+            offset += len(dictionary)
+    return left_e, right_e
+
+def decode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """Back to plain object columns (reported rows of encoded comparisons)."""
+    cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    return df.astype({c: object for c in cats}) if cats else df
+
 # ---- Smart string formatting (no trailing .0) ----
 def smart_str(value):
     """Return a display string without adding trailing .0 for integer-like numbers.
@@ -71,18 +155,74 @@ def smart_str(value):
     # Fallback
     return str(value)
 
+def _is_naive_arrow_timestamp(dtype) -> bool:
+    # Arrow timestamp types carry a ``tz`` attribute, date types do not
+    return isinstance(dtype, pd.ArrowDtype) and dtype.kind == 'M' and \
+        hasattr(dtype.pyarrow_dtype, 'tz') and dtype.pyarrow_dtype.tz is None
+
+def _smart_str_values(col: pd.Series):
+    """Vectorized smart_str for one column, or None when the column needs the
+    per-cell fallback (mixed objects, tz-aware datetimes, timedeltas...)."""
+    dtype = col.dtype
+    na = col.isna().to_numpy()
+    out = np.full(len(col), '', dtype=object)
+    valid = ~na
+    if pd.api.types.is_bool_dtype(dtype):
+        # smart_str sees Python bools, i.e. ints
+        out[valid] = np.where(col.to_numpy(dtype=bool, na_value=False)[valid], '1', '0')
+    elif pd.api.types.is_integer_dtype(dtype):
+        out[valid] = list(map(str, col.to_numpy(dtype=object)[valid].tolist()))
+    elif pd.api.types.is_float_dtype(dtype):
+        values = col.to_numpy(dtype='float64', na_value=np.nan)[valid]
+        integral = np.isfinite(values) & (values == np.trunc(values))
+        formatted = np.empty(len(values), dtype=object)
+        # C-level formatting of whole arrays; same '%d' / '%f' rules as smart_str
+        formatted[integral] = list(map('%d'.__mod__, values[integral].tolist()))
+        fixed = map('%f'.__mod__, values[~integral].tolist())
+        formatted[~integral] = [f.rstrip('0').rstrip('.') for f in fixed]
+        out[valid] = formatted
+    elif pd.api.types.is_datetime64_dtype(dtype):
+        out[valid] = isoformat_datetimes(col.to_numpy())[valid]
+    elif _is_naive_arrow_timestamp(dtype):
+        # Arrow timestamps (batched SQL loaders); dates beyond the ns range use the fallback
+        try:
+            values = col.astype('datetime64[ns]').to_numpy()
+        except (OverflowError, ValueError):
+            return None
+        out[valid] = isoformat_datetimes(values)[valid]
+    elif pd.api.types.is_string_dtype(dtype) and (
+            isinstance(dtype, pd.StringDtype) or pd.api.types.infer_dtype(col, skipna=True) in ('string', 'empty')):
+        out[valid] = list(map(str.strip, col.to_numpy(dtype=object)[valid].tolist()))
+    else:
+        return None
+    return out
+
 def apply_smart_string(df: pd.DataFrame) -> pd.DataFrame:
-    """Map all cells to smart_str and cast to Pandas string dtype."""
+    """Map all cells to smart_str and cast to Pandas string dtype.
+    Integer, float, bool, naive datetime and pure string columns use
+    vectorized converters; only mixed columns are mapped cell by cell.
+    """
     if df.empty:
         return df
-    df2 = df.applymap(smart_str)
-    # Cast to string dtype for consistency (nullable)
-    try:
-        df2 = df2.astype('string')
-    except Exception:
-        pass
-    # Trim again to be safe
-    for c in df2.columns:
-        if pd.api.types.is_string_dtype(df2[c]):
-            df2[c] = df2[c].str.strip()
+    cols = {}
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        values = _smart_str_values(col)
+        if values is None:
+            # Per-cell fallback; trim again to be safe (str() of objects may pad)
+            cols[i] = col.astype(object).map(smart_str).astype('string').str.strip()
+        else:
+            cols[i] = pd.Series(values, index=df.index, dtype='string')
+    df2 = pd.DataFrame(cols, index=df.index)
+    df2.columns = df.columns
     return df2
+
+def format_loaded_frame(df: pd.DataFrame, as_string: bool = True) -> pd.DataFrame:
+    """Post-processing shared by the loaders (whole frame or chunk):
+    smart string formatting, or a minimal trim of string columns."""
+    if as_string:
+        return apply_smart_string(df)
+    for c in df.columns:
+        if pd.api.types.is_string_dtype(df[c]):
+            df[c] = df[c].str.strip()
+    return df
@@ -0,0 +1,215 @@
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+from .progress import ProgressCallback
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS, memory columns stay at 0
+    resource = None
+
+# Opt-in per-stage instrumentation for compare_dataframes and the loaders.
+# Each stage accumulates wall time, rows and the peak memory it added above its
+# start; repeated stages (one per chunk) are merged. Stage records use the same
+# keys as progress events ('stage', 'rows', 'elapsed', 'rows_per_sec'), so any
+# ProgressCallback can serve as the metrics sink (``on_stage``).
+#
+# memory='rss' (default) reads the process peak RSS, reset per stage through
+# /proc/self/clear_refs on Linux: nearly free, and counts Arrow/numpy buffers.
+# memory='tracemalloc' traces Python allocations only (numpy included, Arrow
+# not) and slows allocation-heavy stages; memory=None records time only.
+# Both counters are process-wide: a stage that overlaps a stage of another
+# profiler (another job's thread) neither resets them nor gets a peak
+# (peak_mb None, memory None), since each would count and reset the other's
+# allocations. Each record names what its peak measured ('memory').
+MEMORY_MODES = ('rss', 'tracemalloc', None)
+# What peak_mb covers, per mode
+MEMORY_SCOPES = {'rss': 'rss (processus)', 'tracemalloc': 'tracemalloc (Python)', None: None}
+
+_memory_lock = threading.Lock()
+_open_stages: Dict[int, int] = {}  # open memory-measured stages per profiler
+_overlaps = 0                      # bumped whenever stages of two profilers overlap
+
+
+def _rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return _peak_rss_bytes()
+
+
+def _peak_rss_bytes() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class Profiler:
+    """Collects per-stage wall time, rows and peak memory of one run.
+
+    ``with profiler.stage('merge', rows=n): ...`` times a block (stages may
+    nest; an enclosing stage's peak includes its inner stages);
+    ``profiler.iterate('fetch', chunks)`` times the production of each chunk
+    of an iterator (rows = chunk length). A disabled profiler does nothing.
+    """
+
+    def __init__(self, on_stage: Optional[ProgressCallback] = None, memory: Optional[str] = 'rss',
+                 enabled: bool = True):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Mode mémoire inconnu: {memory} (attendu: rss, tracemalloc ou None)")
+        self.on_stage = on_stage
+        self.memory = memory
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._open: List[Dict[str, Any]] = []
+        self._owns_trace = False
+
+    def _current_peak(self) -> int:
+        if self.memory == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[1]
+        return _peak_rss_bytes()
+
+    def _join(self, token: Dict[str, Any]) -> bool:
+        """Count an open stage of this profiler; False when another profiler has one."""
+        global _overlaps
+        with _memory_lock:
+            alone = all(owner == id(self) for owner in _open_stages)
+            if not alone:
+                _overlaps += 1
+            _open_stages[id(self)] = _open_stages.get(id(self), 0) + 1
+            token['overlaps'] = _overlaps
+        return alone
+
+    def _leave(self, token: Dict[str, Any]) -> bool:
+        """Close a stage; True when no other profiler's stage overlapped it."""
+        with _memory_lock:
+            left = _open_stages[id(self)] - 1
+            if left:
+                _open_stages[id(self)] = left
+            else:
+                del _open_stages[id(self)]
+            return not token['shared'] and token['overlaps'] == _overlaps
+
+    def _start(self) -> Dict[str, Any]:
+        token = {'start': time.perf_counter(), 'base': 0, 'peak': 0, 'shared': False}
+        if self.memory is not None:
+            token['shared'] = not self._join(token)
+        if self.memory == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_trace = True
+        if self.memory is not None and not token['shared']:
+            if self._open:
+                # keep the enclosing stage's peak before resetting the counter
+                self._open[-1]['peak'] = max(self._open[-1]['peak'], self._current_peak())
+            if self.memory == 'tracemalloc':
+                tracemalloc.reset_peak()
+                token['base'] = tracemalloc.get_traced_memory()[0]
+            else:
+                token['base'] = _rss_bytes()
+                if not _reset_peak_rss():
+                    token['base'] = _peak_rss_bytes()
+        self._open.append(token)
+        return token
+
+    def _stop(self, name: str, token: Dict[str, Any], rows: Optional[int]) -> None:
+        elapsed = time.perf_counter() - token['start']
+        self._open.pop()
+        peak: Optional[int] = 0
+        if self.memory is not None:
+            current = self._current_peak()
+            peak = max(token['peak'], current) - token['base'] if self._leave(token) else None
+            if self._open:
+                self._open[-1]['peak'] = max(self._open[-1]['peak'], current)
+            elif self._owns_trace:
+                tracemalloc.stop()
+                self._owns_trace = False
+        rec = self.stages.setdefault(name, {'stage': name, 'rows': 0, 'elapsed': 0.0, 'rows_per_sec': 0.0,
+                                            'peak_mb': 0.0, 'calls': 0, 'memory': MEMORY_SCOPES[self.memory]})
+        rec['elapsed'] += elapsed
+        rec['calls'] += 1
+        if rows is not None:
+            rec['rows'] += int(rows)
+        rec['rows_per_sec'] = rec['rows'] / rec['elapsed'] if rec['elapsed'] > 0 else 0.0
+        if peak is None:  # overlapped another profiler: time only
+            rec['peak_mb'] = rec['memory'] = None
+        elif rec['peak_mb'] is not None:
+            rec['peak_mb'] = max(rec['peak_mb'], max(peak, 0) / 1024 ** 2)
+        if self.on_stage is not None:
+            self.on_stage(dict(rec))
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Time the block; rows known only inside it can be set on the yielded
+        dict (``with prof.stage('fetch') as st: ...; st['rows'] = len(df)``)."""
+        counter = {'rows': rows}
+        if not self.enabled:
+            yield counter
+            return
+        token = self._start()
+        try:
+            yield counter
+        finally:
+            self._stop(name, token, counter['rows'])
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield the items of ``iterable``, timing only the production of each one."""
+        it = iter(iterable)
+        if not self.enabled:
+            yield from it
+            return
+        while True:
+            token = self._start()
+            try:
+                item = next(it)
+            except StopIteration:
+                self._stop(name, token, 0)
+                return
+            except BaseException:
+                self._stop(name, token, None)
+                raise
+            self._stop(name, token, len(item) if hasattr(item, '__len__') else None)
+            yield item
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Stage records in first-run order, with their share of the total time."""
+        total = sum(r['elapsed'] for r in self.stages.values())
+        return [dict(r, share=r['elapsed'] / total if total > 0 else 0.0) for r in self.stages.values()]
+
+
+def as_profiler(profile: Union[bool, Profiler, None], on_stage: Optional[ProgressCallback] = None) -> Profiler:
+    """Profiler for a ``profile=`` argument: an existing Profiler is shared,
+    True (or a callback alone) creates one, False gives a disabled one."""
+    if isinstance(profile, Profiler):
+        return profile
+    return Profiler(on_stage=on_stage, enabled=bool(profile) or on_stage is not None)
+
+
+def profile_table(report: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Report as a DataFrame (seconds, rows, rows/s, peak MB and what it measured, share) for display."""
+    cols = ['stage', 'elapsed', 'rows', 'rows_per_sec', 'peak_mb', 'memory', 'calls', 'share']
+    return pd.DataFrame(report, columns=cols)
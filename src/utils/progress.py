@@ -0,0 +1,61 @@
+from __future__ import annotations
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Progress events are plain dicts passed to an optional callback, e.g.
+# {'stage': 'fetch', 'rows': 150000, 'elapsed': 2.1, 'rows_per_sec': 71428.6}
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class RateMeter:
+    """Counts rows processed by one stage and reports throughput."""
+
+    def __init__(self, stage: str, callback: Optional[ProgressCallback] = None):
+        self.stage = stage
+        self.callback = callback
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def event(self, **extra) -> Dict[str, Any]:
+        return {'stage': self.stage, 'rows': self.rows, 'elapsed': self.elapsed,
+                'rows_per_sec': self.rows_per_sec, **extra}
+
+    def update(self, rows: int, **extra) -> None:
+        self.rows += rows
+        if self.callback is not None:
+            self.callback(self.event(**extra))
+
+    def finish(self, **extra) -> None:
+        if self.callback is not None:
+            self.callback(self.event(done=True, **extra))
+
+
+class StageProgress:
+    """ProgressCallback over stage records (Profiler.on_stage): each new stage
+    is one step out of ``steps`` planned, and events carry the stage, the rows
+    of the stages run so far and 'step'/'steps' (a fraction for progress bars)."""
+
+    def __init__(self, callback: ProgressCallback, steps: int):
+        self.meter = RateMeter('', callback)
+        self.steps = max(int(steps), 1)
+        self._rows: Dict[str, int] = {}  # stage records are cumulative when a stage repeats
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        stage = record['stage']
+        rows = int(record.get('rows') or 0)
+        added = rows - self._rows.get(stage, 0)
+        self._rows[stage] = rows
+        self.meter.stage = stage
+        self.meter.update(added, step=min(len(self._rows), self.steps), steps=self.steps)
+
+    def finish(self) -> None:
+        self.meter.finish(step=self.steps, steps=self.steps)
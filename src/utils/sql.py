@@ -0,0 +1,76 @@
+from __future__ import annotations
+import re
+from typing import List, Tuple
+
+# Helpers for user queries wrapped as a derived table, ``SELECT ... FROM (<query>) src``.
+# SQL Server rejects ORDER BY in a derived table (unless TOP/OFFSET is given),
+# and the row order of a subquery means nothing anyway: a trailing ORDER BY is
+# dropped, except when it selects the rows (TOP, OFFSET/FETCH, LIMIT).
+
+_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_$#@]*')
+_LIMITING = {'limit', 'offset', 'fetch'}
+
+
+def _scan(query: str) -> Tuple[List[Tuple[int, str]], int]:
+    """(position, lower-case word) of the words outside parentheses, string
+    literals, quoted identifiers and comments, and the end of the last
+    character that is not a comment or a blank."""
+    words = []
+    depth = 0
+    i, n = 0, len(query)
+    end = 0
+    while i < n:
+        c = query[i]
+        if c.isspace():
+            i += 1
+            continue
+        if query.startswith('--', i):
+            j = query.find('\n', i)
+            i = n if j < 0 else j + 1
+            continue
+        if query.startswith('/*', i):
+            j = query.find('*/', i + 2)
+            i = n if j < 0 else j + 2
+            continue
+        if c in ("'", '"', '[', '`'):
+            close = ']' if c == '[' else c
+            i += 1
+            while i < n:
+                if query[i] == close:
+                    if query.startswith(close * 2, i):  # doubled quote
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+        elif c in '()':
+            depth += 1 if c == '(' else -1
+            i += 1
+        else:
+            m = _WORD.match(query, i)
+            if m is None:
+                i += 1
+            else:
+                if depth == 0:
+                    words.append((i, m.group().lower()))
+                i = m.end()
+        end = min(i, n)
+    return words, end
+
+
+def as_subquery(query: str) -> str:
+    """``query`` ready to be wrapped as ``(<query>) src``: trailing comments,
+    ';' and a trailing ORDER BY removed. ValueError when the ORDER BY selects the rows
+    (TOP, OFFSET/FETCH, LIMIT), since dropping it would change the result."""
+    words, end = _scan(query)
+    query = query[:end].rstrip(';').rstrip()
+    order = [k for k in range(len(words) - 1) if words[k][1] == 'order' and words[k + 1][1] == 'by']
+    if not order:
+        return query
+    start = words[order[-1]][0]
+    top = any(w == 'top' and prev in ('select', 'distinct', 'all') for (_, prev), (_, w) in zip(words, words[1:]))
+    if top or any(w in _LIMITING for p, w in words if p > start):
+        raise ValueError(
+            "Requête avec ORDER BY et TOP/OFFSET/LIMIT non supportée ici : "
+            "retirez l'ORDER BY ou filtrez les lignes autrement (WHERE)")
+    return query[:start].rstrip()
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _frame_pair(n: int = 400, seed: int = 0):
+    """Two frames with unique keys, NaN/None in every column, mixed dtypes,
+    rows on one side only and changed cells (also NA -> value and back)."""
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(n * 2)[:n]
+    left = pd.DataFrame({
+        'id': ids,
+        'amount': np.where(rng.random(n) < 0.1, np.nan, rng.normal(1000, 300, n).round(2)),
+        'qty': pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(0, 50, n)), dtype='Int64'),
+        'label': np.where(rng.random(n) < 0.1, None, rng.choice(['a', 'b ', ' c', '007', '7'], n)).astype(object),
+        'mixed': pd.Series([[1, '1.0', 'x', None, 2.5][i % 5] for i in range(n)], dtype=object),
+        'day': pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 400, n), unit='D'),
+    })
+    left.loc[rng.random(n) < 0.05, 'day'] = pd.NaT
+    right = left.sample(frac=1.0, random_state=seed).iloc[: n - 15].copy()
+    extra = left.iloc[:10].copy()
+    extra['id'] = np.arange(n * 2, n * 2 + 10)
+    right = pd.concat([right, extra], ignore_index=True)
+    changed = rng.choice(len(right), 25, replace=False)
+    right.loc[changed[:8], 'amount'] = right.loc[changed[:8], 'amount'] + 1.5
+    right.loc[changed[8:12], 'amount'] = np.nan
+    right.loc[changed[12:16], 'label'] = 'z'
+    right.loc[changed[16:20], 'qty'] = pd.NA
+    right.loc[changed[20:], 'mixed'] = 'changed'
+    right.loc[changed[:3], 'amount'] = right.loc[changed[:3], 'amount'] + 1e-12  # within float_tol
+    return left.reset_index(drop=True), right.reset_index(drop=True)
+
+
+@pytest.fixture
+def frame_pair():
+    return _frame_pair
+
+
+def _same_differences(actual, expected):
+    """Assert two result dicts report the same differences (samples compared
+    as sets of rows, by repr so that NaN equals NaN)."""
+    assert set(actual['differences']) >= set(expected['differences'])
+    for name, value in expected['differences'].items():
+        if isinstance(value, list):
+            assert sorted(map(repr, actual['differences'][name])) == sorted(map(repr, value)), name
+        else:
+            assert actual['differences'][name] == value, name
+    for name in ('left_count', 'right_count', 'row_count_equal', 'columns_equal', 'data_equal'):
+        assert actual[name] == expected[name], name
+
+
+@pytest.fixture
+def same_differences():
+    return _same_differences
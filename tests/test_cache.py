@@ -0,0 +1,38 @@
+import json
+import os
+import pandas as pd
+import pytest
+from src.loaders.cache import LoaderCache
+
+pytest.importorskip('pyarrow')
+
+
+def test_query_ttl_and_age(tmp_path):
+    cache = LoaderCache(str(tmp_path / 'c'))
+    df = pd.DataFrame({'a': ['1', '2']})
+    _, info = cache.load('k', lambda: df, ttl_seconds=600)
+    assert not info['hit'] and info['age_seconds'] == 0
+    cached, info = cache.load('k', lambda: df)
+    assert info['hit'] and info['age_seconds'] >= 0
+    pd.testing.assert_frame_equal(cached, df)
+    meta = cache._read_meta('k')
+    meta['created'] -= 601  # past the entry's own TTL, well within the default 24 h
+    with open(cache._meta_path('k'), 'w') as f:
+        json.dump(meta, f)
+    assert cache.get('k') == (None, None)
+
+
+def test_frames_parquet_cannot_hold_are_not_cached(tmp_path):
+    cache = LoaderCache(str(tmp_path / 'c'))
+    df = pd.DataFrame({1: [object()]})
+    assert not cache.put('k', df)
+    assert cache.keys() == [] and not [n for n in os.listdir(cache.directory) if n.endswith('.pkl')]
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX permissions')
+def test_shared_directory_is_refused(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        LoaderCache(str(shared))
@@ -0,0 +1,124 @@
+import threading
+import pytest
+from src.loaders import connections
+from src.loaders.connections import DbapiPool, close_all, get_dbapi_pool, get_engine
+
+
+class _Conn:
+    def __init__(self, n):
+        self.n, self.closed, self.alive = n, False, True
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor:
+            def execute(self, sql):
+                if not conn.alive:
+                    raise OSError('connexion perdue')
+
+            def fetchall(self):
+                return [(1,)]
+
+            def close(self):
+                pass
+        return _Cursor()
+
+    def close(self):
+        self.closed = True
+
+
+def _factory():
+    opened = []
+
+    def connect():
+        opened.append(_Conn(len(opened)))
+        return opened[-1]
+    return connect, opened
+
+
+@pytest.fixture(autouse=True)
+def _empty_registry():
+    close_all()
+    yield
+    close_all()
+
+
+def test_engine_is_shared_per_url_and_options(tmp_path):
+    pytest.importorskip('sqlalchemy')
+    url = f'sqlite:///{tmp_path / "a.db"}'
+    engine = get_engine(url)
+    assert get_engine(url) is engine
+    assert get_engine(url, pool_size=2) is not engine
+    assert get_engine(f'sqlite:///{tmp_path / "b.db"}') is not engine
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql('SELECT 1').scalar() == 1
+
+
+def test_close_all_disposes_and_forgets(tmp_path):
+    pytest.importorskip('sqlalchemy')
+    engine = get_engine(f'sqlite:///{tmp_path / "a.db"}')
+    disposed = []
+    engine.dispose = lambda: disposed.append(engine)
+    connect, opened = _factory()
+    pool = get_dbapi_pool(('fake', 'srv'), connect)
+    with pool.connection():
+        pass
+    close_all()
+    assert disposed == [engine] and opened[0].closed
+    assert not connections._engines and not connections._pools
+    assert get_engine(f'sqlite:///{tmp_path / "a.db"}') is not engine
+
+
+def test_pool_is_shared_per_key_and_reuses_connections():
+    connect, opened = _factory()
+    pool = get_dbapi_pool(('fake', 'srv', 'db'), connect)
+    assert get_dbapi_pool(('fake', 'srv', 'db'), lambda: None) is pool
+    assert get_dbapi_pool(('fake', 'srv', 'other'), connect) is not pool
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second and len(opened) == 1 and not first.closed
+
+
+def test_dead_failed_and_expired_connections_are_replaced():
+    connect, opened = _factory()
+    pool = DbapiPool(connect, idle_timeout=60)
+    with pool.connection() as conn:
+        pass
+    conn.alive = False  # fails the SELECT 1 on checkout
+    with pool.connection() as conn:
+        pass
+    assert opened[0].closed and conn is opened[1]
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError('requête en échec')
+    assert opened[1].closed
+    with pool.connection():
+        pass
+    pool.idle_timeout = -1
+    with pool.connection() as conn:
+        pass
+    assert opened[2].closed and conn is opened[3]
+
+
+def test_pool_caps_open_and_idle_connections():
+    connect, opened = _factory()
+    pool = DbapiPool(connect, max_size=2, max_idle=1, checkout_timeout=0.05)
+    with pool.connection(), pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    assert len(opened) == 2 and sum(c.closed for c in opened) == 1
+    released = threading.Event()
+
+    def hold():
+        with pool.connection():
+            released.wait(5)
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for t in threads:
+        t.start()
+    released.set()
+    for t in threads:
+        t.join()
+    assert sum(not c.closed for c in opened) == 1
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.loaders.csv_loader import iter_csv_chunks, load_from_csv  # noqa: E402
+
+
+def test_ragged_rows_are_padded():
+    data = b'a,b,c\n1,2,3\n4,5\n'
+    df = load_from_csv(data)
+    assert df.to_dict('list') == {'a': ['1', '4'], 'b': ['2', '5'], 'c': ['3', '']}
+    assert load_from_csv(data, as_string=False)['c'].isna().tolist() == [False, True]
+
+
+def test_ragged_row_after_first_chunk():
+    data = ('a,b\n' + '1,2\n' * 1000 + '3\n' + '4,5\n' * 10).encode()
+    chunks = list(iter_csv_chunks(data, chunksize=300))
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == 1011
+    assert df.iloc[1000].tolist() == ['3', '']
+    pd.testing.assert_frame_equal(df, load_from_csv(data))
+
+
+def test_blank_header_cells_named_like_pandas(tmp_path):
+    path = tmp_path / 'blank.csv'
+    path.write_text('a,,a,\n1,2,3,4\n')
+    expected = list(pd.read_csv(path).columns)
+    assert expected == ['a', 'Unnamed: 1', 'a.1', 'Unnamed: 3']
+    assert list(load_from_csv(str(path)).columns) == expected
+    assert list(next(iter_csv_chunks(str(path))).columns) == expected
@@ -0,0 +1,84 @@
+import os
+import time
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.diff_sink import EXPORT_PREFIX, FORMATS, PARQUET_AVAILABLE, DiffSink, read_diff, remove_stale_exports
+
+_FORMATS = [f for f in FORMATS if f == 'csv' or PARQUET_AVAILABLE]
+
+
+def _rows(start, n):
+    return pd.DataFrame({'id': [f'{i:03d}' for i in range(start, start + n)],
+                         'v': [None if i % 3 == 0 else str(i) for i in range(start, start + n)]})
+
+
+@pytest.mark.parametrize('fmt', _FORMATS)
+def test_round_trip_keeps_text_and_nulls(tmp_path, fmt):
+    with DiffSink(str(tmp_path), fmt) as sink:
+        sink('left_only', _rows(0, 4))
+        sink('left_only', pd.DataFrame({'id': [7], 'v': [2.5]}))  # another dtype, same columns
+    back = read_diff(sink.files['left_only']['path'])
+    assert back['id'].tolist() == ['000', '001', '002', '003', '7']
+    assert back['v'].isna().tolist() == [True, False, False, True, False]
+    assert back['v'].iloc[[1, 2, 4]].tolist() == ['1', '2', '2.5']
+    assert read_diff(sink.files['left_only']['path'], nrows=2)['id'].tolist() == ['000', '001']
+    assert sink.rows == {'left_only': 5, 'right_only': 0, 'mismatch': 0}
+    assert list(sink.files) == ['left_only']
+
+
+@pytest.mark.parametrize('fmt', _FORMATS)
+def test_small_frames_are_grouped_and_large_ones_sliced(tmp_path, fmt):
+    written = []
+    sink = DiffSink(str(tmp_path), fmt, batch_rows=4)
+    flush = sink._flush
+    sink._flush = lambda kind: (written.append(sum(len(p) for p in sink._pending[kind])), flush(kind))
+    for start in range(0, 6, 2):
+        sink('right_only', _rows(start, 2))  # 2 + 2 -> one batch of 4
+    sink('right_only', _rows(6, 9))          # 2 pending + 9 in slices of 4
+    sink.close()
+    assert [w for w in written if w] == [4, 6, 4, 1]
+    assert read_diff(sink.path('right_only'))['id'].tolist() == [f'{i:03d}' for i in range(15)]
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        assert pq.ParquetFile(sink.path('right_only')).metadata.num_row_groups == 4
+
+
+def test_inconsistent_columns_and_bad_calls_raise(tmp_path):
+    sink = DiffSink(str(tmp_path), 'csv')
+    sink('mismatch', _rows(0, 2))
+    with pytest.raises(ValueError, match='Colonnes incohérentes'):
+        sink('mismatch', _rows(0, 2)[['v', 'id']])
+    with pytest.raises(ValueError, match='inconnu'):
+        sink('other', _rows(0, 1))
+    sink.close()
+    with pytest.raises(ValueError, match='fermé'):
+        sink('mismatch', _rows(0, 1))
+    with pytest.raises(ValueError, match="Format d'export inconnu"):
+        DiffSink(str(tmp_path), 'xlsx')
+
+
+@pytest.mark.parametrize('fmt', _FORMATS)
+def test_full_export_of_a_comparison(tmp_path, frame_pair, fmt):
+    left, right = frame_pair()
+    with DiffSink(str(tmp_path), fmt, batch_rows=7) as sink:
+        res = compare_dataframes(left, right, keys=['id'], sample_size=5, on_difference=sink)
+    d = res['differences']
+    assert sink.rows['left_only'] == d['left_only_keys_count']
+    assert sink.rows['right_only'] == d['right_only_keys_count']
+    mismatch = read_diff(sink.files['mismatch']['path'])
+    assert list(mismatch.columns) == ['id', 'column', 'left', 'right']
+    assert mismatch['id'].nunique() == d['mismatched_rows_count']
+    assert len(read_diff(sink.files['left_only']['path'])) == d['left_only_keys_count']
+
+
+def test_stale_export_dirs_are_removed(tmp_path):
+    old, fresh, other = (tmp_path / f'{EXPORT_PREFIX}old', tmp_path / f'{EXPORT_PREFIX}fresh', tmp_path / 'other')
+    for d in (old, fresh, other):
+        d.mkdir()
+        (d / 'mismatch.csv').write_text('id\n')
+    day_ago = time.time() - 2 * 24 * 3600
+    for path in (old, old / 'mismatch.csv', other, other / 'mismatch.csv', fresh):
+        os.utime(path, (day_ago, day_ago))  # fresh still has a recent file
+    assert remove_stale_exports(directory=str(tmp_path)) == [str(old)]
+    assert not old.exists() and fresh.exists() and other.exists()
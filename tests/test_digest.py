@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes, precheck_dataframes, tables_equal
+
+
+def _same_count_pairs(frame_pair):
+    """(name, left, right) with equal row counts, so that the pre-check runs."""
+    left, _ = frame_pair(seed=1)
+    shuffled = left.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    changed = shuffled.copy()
+    changed.loc[[3, 50], 'amount'] += 1.5
+    changed.loc[7, 'label'] = 'z'
+    swapped = shuffled.copy()
+    swapped.loc[[0, 1], 'id'] = swapped.loc[[1, 0], 'id'].to_numpy()  # same keys and rows, other pairing
+    moved = shuffled.copy()
+    moved.loc[0, 'id'] = moved['id'].max() + 1                       # one key replaced
+    within = shuffled.copy()
+    within['amount'] += 1e-12                                          # inside float_tol
+    return [('equal', left, shuffled), ('changed', left, changed), ('swapped', left, swapped),
+            ('moved', left, moved), ('within_tol', left, within)]
+
+
+@pytest.mark.parametrize('keys', [['id'], ['id', 'label'], None])
+def test_precheck_on_matches_off(frame_pair, same_differences, keys):
+    for name, left, right in _same_count_pairs(frame_pair):
+        on = compare_dataframes(left, right, keys=keys, sample_size=1000, precheck=True)
+        off = compare_dataframes(left, right, keys=keys, sample_size=1000, precheck=False)
+        same_differences(on, off)
+        assert 'precheck' in on and 'precheck' not in off, name
+        if on['precheck']['equal'] is not None:
+            assert on['precheck']['equal'] == off['data_equal'], name
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+def test_verdict_matches_detailed_comparison(frame_pair, keys):
+    for name, left, right in _same_count_pairs(frame_pair):
+        data_equal = compare_dataframes(left, right, keys=keys, precheck=False)['data_equal']
+        assert precheck_dataframes(left, right, keys)['equal'] == data_equal, name
+        assert tables_equal(left, right, keys) == data_equal, name
+
+
+def test_undecided_cases_fall_back(frame_pair):
+    left, _ = frame_pair(seed=2)
+    left['flags'] = np.arange(len(left), dtype='uint8')
+    right = left.copy()
+    right.loc[5, 'flags'] += 1
+    # unsigned integers have no exact hash: the keyed digest cannot decide
+    assert precheck_dataframes(left, right, ['id'])['equal'] is None
+    assert not tables_equal(left, right, ['id'])
+    # float keys are left to the detailed comparison
+    floats = pd.DataFrame({'k': [0.1, 0.2, 0.3], 'v': [1, 2, 3]})
+    assert precheck_dataframes(floats, floats.iloc[::-1], ['k'])['equal'] is None
+    assert tables_equal(floats, floats.iloc[::-1], ['k'])
+
+
+def test_duplicate_keys_are_not_confirmed_equal():
+    left = pd.DataFrame({'id': [1, 1, 2], 'v': ['a', 'b', 'c']})
+    right = pd.DataFrame({'id': [1, 1, 2], 'v': ['b', 'a', 'c']})
+    check = precheck_dataframes(left, right, ['id'])
+    assert check['equal'] is not True and check['keys_equal'] is not True
+
+
+def test_mismatched_shapes():
+    left = pd.DataFrame({'id': [1, 2], 'v': [1.0, np.nan]})
+    assert precheck_dataframes(left, left.rename(columns={'v': 'w'}))['equal'] is False
+    assert precheck_dataframes(left, left.drop(columns='v'), ['id'])['equal'] is False
+    assert precheck_dataframes(left, left, ['other'])['equal'] is False
+    assert precheck_dataframes(left, left.iloc[:1], ['id'])['equal'] is False
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from src.compare.dataframe_compare import compare_dataframes  # noqa: E402
+
+
+def _both(left, right, **options):
+    return (compare_dataframes(left, right, backend='duckdb', **options),
+            compare_dataframes(left, right, backend='pandas', **options))
+
+
+# the 'mixed' column (ints, floats and text) has no exact hash and sends keyed
+# comparisons back to pandas: dropped to exercise the SQL join
+@pytest.mark.parametrize('keys', [['id'], ['id', 'label'], None])
+@pytest.mark.parametrize('encode_strings', [True, False])
+def test_matches_pandas_backend(frame_pair, same_differences, keys, encode_strings):
+    left, right = (df.drop(columns='mixed') for df in frame_pair(seed=5))
+    same_differences(*_both(left, right, keys=keys, sample_size=1000, encode_strings=encode_strings))
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+@pytest.mark.parametrize('tolerance', [{'abs': 1.5}, {'rel': 1e-3}, {'abs': 0.0, 'rel': 0.0}])
+def test_tolerances_match_pandas_backend(frame_pair, same_differences, keys, tolerance):
+    left, right = (df.drop(columns='mixed') for df in frame_pair(seed=6))
+    same_differences(*_both(left, right, keys=keys, sample_size=1000, column_tolerances={'amount': tolerance}))
+
+
+def test_tolerance_edge_cases():
+    left = pd.DataFrame({'id': range(7), 'x': [1.0, 1.0, 0.0, 0.0, 100.0, np.nan, np.inf]})
+    right = pd.DataFrame({'id': range(7), 'x': [1.25, 1.5, 0.0, 1e-300, 110.0, np.nan, np.inf]})
+    for tol in ({'abs': 0.25}, {'rel': 0.1}, {'abs': 0.25, 'rel': 0.1}):
+        for keys in (['id'], None):
+            duck, pandas_ = _both(left, right, keys=keys, column_tolerances={'x': tol})
+            assert duck['differences'] == pandas_['differences'], (tol, keys)
+
+
+def test_mixed_type_column_falls_back(frame_pair, same_differences):
+    left, right = frame_pair(seed=7)
+    same_differences(*_both(left, right, keys=['id'], sample_size=1000))
+
+
+def test_empty_frames(frame_pair, same_differences):
+    left, right = frame_pair(seed=8)
+    for keys in (['id'], None):
+        same_differences(*_both(left.iloc[:0], right, keys=keys, sample_size=1000))
+        same_differences(*_both(left.iloc[:0], right.iloc[:0], keys=keys))
+
+
+def test_backend_options_reach_the_connection(frame_pair, same_differences, tmp_path, monkeypatch):
+    from src.compare import duckdb_backend
+    settings, connect = [], duckdb_backend.connect
+
+    @contextmanager
+    def recording(**options):
+        with connect(**options) as con:
+            settings.append(con.execute("SELECT current_setting('threads'), current_setting('memory_limit'), "
+                                        "current_setting('temp_directory')").fetchone())
+            yield con
+    monkeypatch.setattr(duckdb_backend, 'connect', recording)
+    left, right = (df.drop(columns='mixed') for df in frame_pair(seed=9))
+    options = {'memory_limit': '256MB', 'threads': 1, 'spill_dir': str(tmp_path)}
+    for keys in (['id'], None):
+        same_differences(compare_dataframes(left, right, keys=keys, backend='duckdb', backend_options=options),
+                         compare_dataframes(left, right, keys=keys))
+    with connect(memory_limit='256MB') as con:  # as DuckDB renders it
+        limit = con.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+    assert settings == [(1, limit, str(tmp_path))] * 2
+    assert tmp_path.exists()  # a caller's spill directory is kept
+
+
+def test_unknown_backend(frame_pair):
+    left, right = frame_pair()
+    with pytest.raises(ValueError, match='Moteur de comparaison inconnu'):
+        compare_dataframes(left, right, backend='polars')
+
+
+def test_missing_duckdb_is_reported_before_comparing(frame_pair, monkeypatch):
+    from src.compare import duckdb_backend
+    monkeypatch.setattr(duckdb_backend, 'DUCKDB_AVAILABLE', False)
+    with pytest.raises(ImportError, match="backend='pandas'"):
+        compare_dataframes(*frame_pair(), backend='duckdb')
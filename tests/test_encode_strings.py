@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.utils.normalize import apply_smart_string, encode_string_columns, normalize_object_columns
+
+
+def _both(left, right, **options):
+    return (compare_dataframes(left, right, sample_size=1000, encode_strings=True, **options),
+            compare_dataframes(left, right, sample_size=1000, encode_strings=False, **options))
+
+
+@pytest.mark.parametrize('keys', [['id'], ['id', 'label'], None])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_encoded_matches_plain(frame_pair, same_differences, keys, seed):
+    same_differences(*_both(*frame_pair(seed=seed), keys=keys))
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+def test_encoded_matches_plain_on_loaded_text(frame_pair, same_differences, keys):
+    left, right = (apply_smart_string(df) for df in frame_pair(seed=2))
+    same_differences(*_both(left, right, keys=keys))
+
+
+def test_text_on_one_side_and_disjoint_dictionaries(same_differences):
+    left = pd.DataFrame({'id': ['1', ' 2', '3 '], 'code': ['a', 'b', None], 'n': ['1', '2', '3']})
+    right = pd.DataFrame({'id': [1, 2, 4], 'code': ['x ', 'b', None], 'n': [1, 2, 3]})
+    for keys in (['id'], None):
+        same_differences(*_both(left, right, keys=keys))
+
+
+def test_encoding_keeps_normalized_values(frame_pair):
+    left, right = frame_pair(seed=3)
+    left_e, right_e = encode_string_columns(left, right, sorted_columns=['label'])
+    assert left_e['label'].dtype == right_e['label'].dtype
+    assert list(left_e['label'].cat.categories) == sorted(left_e['label'].cat.categories)
+    for encoded, df in ((left_e, left), (right_e, right)):
+        plain = normalize_object_columns(df)
+        for c in ('label', 'mixed'):
+            assert encoded[c].astype(object).where(encoded[c].notna(), None).tolist() == \
+                plain[c].astype(object).where(plain[c].notna(), None).tolist(), c
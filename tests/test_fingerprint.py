@@ -0,0 +1,56 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.utils.normalize import apply_smart_string, canonical_row, normalize_object_columns
+
+
+def _baseline_counts(left, right, float_tol=1e-9):
+    """Keyless counts as the row-by-row implementation computed them
+    (canonical_row of every row, multiset difference of Counters)."""
+    cols = sorted(left.columns)
+    left_c, right_c = (Counter(canonical_row(r, cols, float_tol=float_tol, ignore_column_order=False)
+                               for _, r in normalize_object_columns(df)[cols].iterrows()) for df in (left, right))
+    return {'only_in_left_count': sum((left_c - right_c).values()),
+            'only_in_right_count': sum((right_c - left_c).values()),
+            'data_equal': left_c == right_c}
+
+
+def _counts(res):
+    d = res['differences']
+    return {'only_in_left_count': d['only_in_left_count'], 'only_in_right_count': d['only_in_right_count'],
+            'data_equal': res['data_equal']}
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('float_tol', [1e-9, 1e-2, 1e-20])
+def test_counts_match_row_by_row_fingerprints(frame_pair, seed, float_tol):
+    left, right = frame_pair(seed=seed)
+    res = compare_dataframes(left, right, float_tol=float_tol)
+    assert _counts(res) == _baseline_counts(left, right, float_tol)
+
+
+def test_duplicates_count_as_a_multiset(frame_pair):
+    left, _ = frame_pair(n=60)
+    right = pd.concat([left, left.iloc[:5], left.iloc[:2]], ignore_index=True).iloc[3:]
+    left = pd.concat([left, left.iloc[10:12]], ignore_index=True)
+    res = compare_dataframes(left, right.iloc[::-1])
+    assert _counts(res) == _baseline_counts(left, right) == {
+        'only_in_left_count': 2, 'only_in_right_count': 4, 'data_equal': False}
+
+
+def test_text_and_typed_sides_share_fingerprints():
+    # leading zeros stay text, '1.50' equals 1.5, '3' equals 3.0, blanks stay blanks
+    left = pd.DataFrame({'code': ['007', '7', ' 7 ', '', None], 'x': ['1.50', '3', '-0', '1e3', 'abc'],
+                         'n': pd.array([1, None, 3, 4, 5], dtype='Int64')})
+    right = pd.DataFrame({'code': ['007', 7, '7', '', np.nan], 'x': [1.5, 3.0, 0, 1000.0, 'abc'],
+                          'n': [1.0, np.nan, 3.0, 4.0, 6.0]})
+    res = compare_dataframes(left, right)
+    assert _counts(res) == _baseline_counts(left, right)
+    assert res['differences']['only_in_left_count'] == 1
+
+
+def test_loaded_text_frames(frame_pair):
+    left, right = (apply_smart_string(df) for df in frame_pair(seed=3))
+    assert _counts(compare_dataframes(left, right)) == _baseline_counts(left, right)
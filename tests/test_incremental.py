@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from src.compare.incremental import SnapshotStore, changed_since_query, compare_incremental, sql_key_fetcher
+
+pytest.importorskip('sqlalchemy')
+
+from src.loaders.sql_loader import load_from_sql  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / 'inc.db'
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE t (id INTEGER, "updated at" TEXT, v TEXT)')
+        conn.executemany('INSERT INTO t VALUES (?, ?, ?)',
+                         [(1, '2024-01-01', 'a'), (2, '2024-02-01', "b'"), (3, '2024-03-01', 'c')])
+    return f'sqlite:///{path}'
+
+
+def test_changed_since_binds_watermark_and_quotes_column(db):
+    query = changed_since_query('SELECT * FROM t;', 'updated at', '2024-01-15', db)
+    assert '2024-01-15' not in str(query)
+    assert load_from_sql(db, query)['id'].tolist() == ['2', '3']
+    hostile = changed_since_query('SELECT * FROM t', 'updated at', "x' OR '1'='1", db)
+    assert load_from_sql(db, hostile).empty
+    assert len(load_from_sql(db, changed_since_query('SELECT * FROM t', 'updated at', None, db))) == 3
+
+
+def test_key_fetcher(db):
+    fetch = sql_key_fetcher(db, 'SELECT * FROM t', ['id'])
+    assert sorted(fetch(pd.DataFrame({'id': [3, 1]}))['v']) == ['a', 'c']
+
+
+def test_ordered_query_is_wrapped_without_its_order_by(db):
+    query = changed_since_query('SELECT * FROM t ORDER BY id DESC;', 'updated at', '2024-01-15', db)
+    assert 'ORDER BY' not in str(query).upper()
+    assert sorted(load_from_sql(db, query)['id']) == ['2', '3']
+    fetch = sql_key_fetcher(db, 'SELECT * FROM t\nORDER BY v -- tri', ['id'])
+    assert sorted(fetch(pd.DataFrame({'id': [3, 1]}))['v']) == ['a', 'c']
+    with pytest.raises(ValueError, match='ORDER BY'):
+        changed_since_query('SELECT * FROM t ORDER BY id LIMIT 2', 'updated at', '2024-01-15', db)
+
+
+def test_incremental_matches_full_comparison(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snap'))
+    left = pd.DataFrame({'id': ['1', '2', '3'], 'v': ['a', 'b', 'c']})
+    right = left.copy()
+    compare_incremental(left, right, ['id'], store, 'job')
+    right.loc[1, 'v'] = 'x'
+    res = compare_incremental(left, right, ['id'], store, 'job')
+    assert res['differences']['mismatched_rows_count'] == 1
+    assert res['differences'] == compare_incremental(left, right, ['id'], SnapshotStore(str(tmp_path / 'b')),
+                                                     'job')['differences']
+
+
+def test_import_does_not_load_sqlalchemy():
+    code = 'import sys, src.compare.incremental; sys.exit("sqlalchemy" in sys.modules)'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, '-c', code], cwd=root).returncode == 0
@@ -0,0 +1,68 @@
+import threading
+from src.utils.jobs import JobRegistry
+
+
+def _wait(job):
+    while not job.done:
+        threading.Event().wait(0.01)
+
+
+def test_jobs_are_private_to_their_owner():
+    registry = JobRegistry()
+    release = threading.Event()
+    job = registry.submit('Chargement A', lambda progress: release.wait(5) and 'df', kind='load', owner='alice')
+    assert len(job.id) == 32 and job.id not in ('load-1', 'job-1')
+    assert registry.get(job.id) is None and registry.get(job.id, owner='bob') is None
+    assert registry.jobs(owner='bob') == [] and registry.jobs() == []
+    assert not registry.cancel(job.id, owner='bob') and not job.cancel_requested
+    assert registry.get(job.id, owner='alice') is job and registry.jobs(owner='alice') == [job]
+    release.set()
+    _wait(job)
+    assert job.state == 'done' and registry.get(job.id, owner='alice').result == 'df'
+
+
+def test_cancel_by_owner():
+    registry = JobRegistry()
+    started, release = threading.Event(), threading.Event()
+
+    def work(progress):
+        started.set()
+        release.wait(5)
+        progress({'stage': 'read', 'rows': 1})
+
+    job = registry.submit('Comparaison', work, owner='alice')
+    started.wait(5)
+    assert registry.cancel(job.id, owner='alice')
+    release.set()
+    _wait(job)
+    assert job.state == 'cancelled'
+
+
+def test_finished_jobs_kept_per_owner():
+    registry = JobRegistry(keep=2)
+    jobs = {owner: [registry.submit(str(i), lambda progress: None, owner=owner) for i in range(3)]
+            for owner in ('alice', 'bob')}
+    for job in jobs['alice'] + jobs['bob']:
+        _wait(job)
+    registry.submit('last', lambda progress: None, owner='carol')
+    assert [j.name for j in registry.jobs(owner='alice')] == ['1', '2']
+    assert [j.name for j in registry.jobs(owner='bob')] == ['1', '2']
+
+
+def test_owners_do_not_queue_behind_each_other():
+    registry = JobRegistry(max_workers=1)
+    release = threading.Event()
+    long_load = registry.submit('A', lambda progress: release.wait(5), owner='alice')
+    queued = registry.submit('B', lambda progress: 'b', owner='alice')
+    other = registry.submit('A', lambda progress: 'a', owner='bob')
+    _wait(other)
+    assert other.result == 'a'
+    assert long_load.state == 'running' and queued.state == 'pending'  # alice's own limit
+    release.set()
+    _wait(queued)
+    assert queued.result == 'b'
+    for _ in range(500):  # the last job's thread releases the owner's executor
+        if not registry._executors:
+            break
+        threading.Event().wait(0.01)
+    assert registry._executors == {}
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.utils.normalize import normalize_object_columns
+
+
+def _baseline_keyed(left, right, keys, float_tol=1e-9):
+    """Keyed differences as the row-by-row implementation computed them, except
+    that NA against NA is equal (the vectorized path's intended behaviour; the
+    original reported such cells as mismatches, or failed on pd.NA)."""
+    left_n, right_n = normalize_object_columns(left), normalize_object_columns(right)
+    for k in keys:
+        if left_n[k].dtype != right_n[k].dtype:
+            left_n[k] = left_n[k].astype('string').str.strip()
+            right_n[k] = right_n[k].astype('string').str.strip()
+    non_key = [c for c in left_n.columns if c in set(right_n.columns) and c not in keys]
+    left_k, right_k = left_n.set_index(keys), right_n.set_index(keys)
+    common = left_k.index.intersection(right_k.index)
+    digits = int(abs(np.log10(float_tol))) if float_tol > 0 else 9
+
+    def rounded(df):
+        df = df.loc[common, non_key].sort_index()
+        return df.apply(lambda col: col.round(digits) if pd.api.types.is_float_dtype(col) else col)
+    left_c, right_c = rounded(left_k), rounded(right_k)
+    mismatches = []
+    for idx in left_c.index:
+        row_l, row_r = left_c.loc[idx], right_c.loc[idx]
+        cols = [c for c in non_key if pd.isna(row_l[c]) != pd.isna(row_r[c])
+                or (not pd.isna(row_l[c]) and row_l[c] != row_r[c])]
+        if cols:
+            mismatches.append({'keys': dict(zip(keys, idx if isinstance(idx, tuple) else (idx,))), 'columns': cols,
+                               'left_values': {c: row_l[c] for c in cols},
+                               'right_values': {c: row_r[c] for c in cols}})
+    return {'left_only_keys_count': len(left_k.index.difference(right_k.index)),
+            'right_only_keys_count': len(right_k.index.difference(left_k.index)),
+            'mismatched_rows_count': len(mismatches),
+            'mismatched_rows_sample': mismatches}
+
+
+def _plain(value):
+    return repr(value.item() if isinstance(value, np.generic) else value)
+
+
+def _comparable(records):
+    """Records with their columns in one order and cells by repr of the plain
+    Python value (NaN == NaN, np.int64(1) == 1)."""
+    return [{'keys': {k: _plain(v) for k, v in r['keys'].items()}, 'columns': sorted(r['columns']),
+             'left_values': sorted((c, _plain(v)) for c, v in r['left_values'].items()),
+             'right_values': sorted((c, _plain(v)) for c, v in r['right_values'].items())} for r in records]
+
+
+def _check(left, right, keys, **kwargs):
+    res = compare_dataframes(left, right, keys=keys, sample_size=10_000, **kwargs)
+    expected = _baseline_keyed(left, right, keys, **kwargs)
+    d = res['differences']
+    for name in ('left_only_keys_count', 'right_only_keys_count', 'mismatched_rows_count'):
+        assert d[name] == expected[name], name
+    assert _comparable(d['mismatched_rows_sample']) == _comparable(expected['mismatched_rows_sample'])
+    return res
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('float_tol', [1e-9, 1e-2])
+def test_counts_and_samples_match_row_by_row(frame_pair, seed, float_tol):
+    left, right = frame_pair(seed=seed)
+    _check(left, right, ['id'], float_tol=float_tol)
+
+
+def test_composite_keys_and_key_dtypes(frame_pair):
+    left, right = frame_pair(seed=4)
+    for df in (left, right):
+        df['part'] = df['id'] % 3
+    right['id'] = right['id'].astype(str).str.pad(5)  # text keys on one side: compared stripped
+    res = _check(left, right, ['id', 'part'])
+    assert res['differences']['mismatched_rows_count'] > 0
+
+
+def test_sample_is_the_first_mismatches_in_key_order(frame_pair):
+    left, right = frame_pair(seed=5)
+    full = compare_dataframes(left, right, keys=['id'], sample_size=10_000)['differences']['mismatched_rows_sample']
+    head = compare_dataframes(left, right, keys=['id'], sample_size=7)['differences']['mismatched_rows_sample']
+    assert [r['keys'] for r in head] == [r['keys'] for r in full[:7]]
+    assert [r['keys']['id'] for r in full] == sorted(r['keys']['id'] for r in full)
+
+
+def test_na_against_na_is_equal():
+    left = pd.DataFrame({'id': [1, 2, 3], 'f': [np.nan, 1.0, np.nan], 's': [None, 'a', 'b'],
+                         'n': pd.array([None, 1, 2], dtype='Int64')})
+    right = pd.DataFrame({'id': [1, 2, 3], 'f': [np.nan, 1.0, 2.0], 's': [None, 'a', 'b'],
+                          'n': pd.array([None, 1, None], dtype='Int64')})
+    res = _check(left, right, ['id'])
+    assert [r['keys'] for r in res['differences']['mismatched_rows_sample']] == [{'id': 3}]
+    assert sorted(res['differences']['mismatched_rows_sample'][0]['columns']) == ['f', 'n']
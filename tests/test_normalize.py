@@ -0,0 +1,55 @@
+from decimal import Decimal
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.loaders.csv_loader import load_from_csv
+from src.loaders.cursor_fetch import fetch_frame, iter_cursor_frames
+from src.utils.normalize import apply_smart_string, smart_str
+
+DECIMALS = [Decimal('10.50'), Decimal('3.00'), Decimal('0.00'), Decimal('-100.00'), Decimal('0.07'), None]
+EXPECTED = ['10.50', '3.00', '0.00', '-100.00', '0.07', '']
+
+
+class _Cursor:
+    """DB-API cursor of a DECIMAL(10, 2) column, as SQL Server drivers return it."""
+
+    def __init__(self, rows, batch=2):
+        self.description = [('id', int, None, None, 10, 0, False), ('amount', Decimal, None, None, 10, 2, True)]
+        self.rows, self.batch = list(rows), batch
+
+    def fetchmany(self, n):
+        out, self.rows = self.rows[:min(n, self.batch)], self.rows[min(n, self.batch):]
+        return out
+
+
+def _rows():
+    return list(enumerate(DECIMALS))
+
+
+def test_smart_str_decimals_keep_their_scale():
+    assert [smart_str(v) for v in DECIMALS] == EXPECTED
+
+
+def test_object_decimal_column():
+    df = pd.DataFrame({'d': pd.Series(DECIMALS, dtype=object)})
+    assert list(apply_smart_string(df)['d']) == EXPECTED
+
+
+def test_fetched_decimals_keep_the_declared_scale():
+    pytest.importorskip('pyarrow')
+    # Values written with fewer digits are not typed by their own scale
+    df = fetch_frame(_Cursor([(10, Decimal('1.5')), (11, Decimal('2'))]))
+    assert list(apply_smart_string(df)['amount']) == ['1.50', '2.00']
+    chunks = [apply_smart_string(c)['amount'].tolist() for c in iter_cursor_frames(_Cursor(_rows()), chunksize=2)]
+    assert sum(chunks, []) == EXPECTED
+
+
+def test_sql_decimals_equal_csv_export(tmp_path):
+    pytest.importorskip('pyarrow')
+    sql_df = fetch_frame(_Cursor(_rows()), batch_size=2)
+    path = tmp_path / 'export.csv'
+    pd.DataFrame(_rows(), columns=['id', 'amount']).to_csv(path, index=False)
+    csv_df = load_from_csv(str(path))
+    assert csv_df['amount'].tolist()[:2] == ['10.50', '3.00']
+    res = compare_dataframes(apply_smart_string(sql_df), csv_df, keys=['id'])
+    assert res['data_equal'], res['differences']
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from src.compare import parallel
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.parallel import compare_parallel
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_matches_in_memory_comparison(frame_pair, same_differences, keys, workers):
+    left, right = frame_pair(seed=2)
+    expected = compare_dataframes(left, right, keys=keys, sample_size=1000)
+    res = compare_parallel(left, right, keys=keys, sample_size=1000, workers=workers, num_partitions=8)
+    same_differences(res, expected)
+
+
+def test_float_tol_and_column_order(frame_pair, same_differences):
+    left, right = frame_pair(seed=3)
+    right = right[list(reversed(right.columns))]
+    for float_tol in (1e-9, 1e-20):
+        expected = compare_dataframes(left, right, keys=['id'], float_tol=float_tol, sample_size=1000)
+        res = compare_parallel(left, right, keys=['id'], float_tol=float_tol, sample_size=1000, workers=2)
+        same_differences(res, expected)
+
+
+def test_threaded_caller_does_not_fork(frame_pair, same_differences, monkeypatch):
+    left, right = frame_pair(seed=5)
+    methods = []
+    start_method = parallel._start_method
+    monkeypatch.setattr(parallel, '_start_method', lambda workers: methods.append(start_method(workers)) or methods[-1])
+    release = threading.Event()
+    other = threading.Thread(target=release.wait, args=(5,))
+    other.start()  # e.g. Streamlit's server threads
+    try:
+        out = {}
+        worker = threading.Thread(target=lambda: out.update(res=compare_parallel(
+            left, right, keys=['id'], sample_size=1000, workers=2, num_partitions=4)))
+        worker.start()
+        worker.join(120)
+    finally:
+        release.set()
+        other.join()
+    assert methods and methods[0] in ('forkserver', 'spawn')
+    same_differences(out['res'], compare_dataframes(left, right, keys=['id'], sample_size=1000))
+
+
+def _failing_spill(*args, **kwargs):
+    raise RuntimeError('disque plein')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_worker_failure_propagates_and_cleans_up(frame_pair, tmp_path, monkeypatch, workers):
+    left, right = frame_pair(seed=6)
+    monkeypatch.setattr(parallel, '_start_method', lambda w: 'fork' if w > 1 else None)
+    monkeypatch.setattr(parallel, '_spill_slice', _failing_spill)
+    with pytest.raises(RuntimeError, match='disque plein'):
+        compare_parallel(left, right, keys=['id'], workers=workers, spill_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == [] and parallel._SHARED == {}
@@ -0,0 +1,70 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.compare import partitioned
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.partitioned import compare_partitioned, iter_frame_chunks
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+@pytest.mark.parametrize('num_partitions, budget_mb', [(1, 512), (8, 512), (16, 0.2)])
+def test_matches_in_memory_comparison(frame_pair, same_differences, keys, num_partitions, budget_mb):
+    left, right = frame_pair()
+    expected = compare_dataframes(left, right, keys=keys, sample_size=1000)
+    res = compare_partitioned(iter_frame_chunks(left, 97), iter_frame_chunks(right, 61), keys=keys,
+                              sample_size=1000, num_partitions=num_partitions, memory_budget_mb=budget_mb)
+    same_differences(res, expected)
+
+
+def test_sample_size_and_equal_inputs(frame_pair, same_differences):
+    left, _ = frame_pair(seed=1)
+    res = compare_partitioned(iter_frame_chunks(left, 50), iter_frame_chunks(left.iloc[::-1], 70), keys=['id'])
+    same_differences(res, compare_dataframes(left, left.iloc[::-1], keys=['id']))
+    assert res['data_equal']
+
+
+def test_missing_key():
+    left = pd.DataFrame({'id': [1], 'v': ['a']})
+    right = pd.DataFrame({'ident': [1], 'v': ['a']})
+    res = compare_partitioned([left], [right], keys=['id'])
+    assert res == compare_dataframes(left, right, keys=['id'])
+
+
+def _record_groups(monkeypatch):
+    """Spilled bytes of every group of partitions compared."""
+    groups = []
+    compare = partitioned.compare_partition
+
+    def recording(left_paths, right_paths, *args):
+        groups.append(sum(os.path.getsize(f) for f in left_paths + right_paths if os.path.exists(f)))
+        return compare(left_paths, right_paths, *args)
+    monkeypatch.setattr(partitioned, 'compare_partition', recording)
+    return groups
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+def test_partition_over_budget_is_split(frame_pair, same_differences, monkeypatch, keys):
+    left, right = frame_pair(n=3000, seed=2)
+    budget_mb = 0.5
+    groups = _record_groups(monkeypatch)
+    res = compare_partitioned(iter_frame_chunks(left, 500), iter_frame_chunks(right, 500), keys=keys,
+                              sample_size=1000, num_partitions=2, memory_budget_mb=budget_mb)
+    same_differences(res, compare_dataframes(left, right, keys=keys, sample_size=1000))
+    budget = budget_mb * 1024 * 1024
+    assert len(groups) > 2 and max(groups) * partitioned._MEMORY_EXPANSION <= budget
+    # the two top-level partitions alone would not have fitted
+    spilled = sum(groups)
+    assert spilled / 2 * partitioned._MEMORY_EXPANSION > budget
+
+
+def test_rows_that_cannot_be_split_are_compared_whole(monkeypatch, same_differences):
+    # keyless, 2000 identical rows: one fingerprint, one partition at every level
+    left = pd.DataFrame({'a': ['x'] * 2000 + [str(i) for i in range(50)], 'b': np.arange(2050) % 2 * 0})
+    right = left.iloc[::-1].iloc[3:]
+    groups = _record_groups(monkeypatch)
+    res = compare_partitioned(iter_frame_chunks(left, 300), iter_frame_chunks(right, 300), num_partitions=4,
+                              memory_budget_mb=0.01, sample_size=1000)
+    same_differences(res, compare_dataframes(left, right, sample_size=1000))
+    assert res['differences']['only_in_left_count'] == 3
+    assert max(groups) * partitioned._MEMORY_EXPANSION > 0.01 * 1024 * 1024
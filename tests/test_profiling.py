@@ -0,0 +1,37 @@
+import threading
+import numpy as np
+from src.utils.profiling import Profiler, profile_table
+
+
+def test_single_profiler_reports_peak_and_scope():
+    prof = Profiler()
+    with prof.stage('alloc', rows=1):
+        block = np.ones(8 * 1024 * 1024)
+    del block
+    (rec,) = prof.report()
+    assert rec['memory'] == 'rss (processus)' and rec['peak_mb'] is not None
+    assert list(profile_table(prof.report())['memory']) == ['rss (processus)']
+
+
+def test_overlapping_profilers_record_time_only():
+    first, second = Profiler(), Profiler(memory='tracemalloc')
+    inside, done = threading.Event(), threading.Event()
+
+    def other():
+        with second.stage('other'):
+            inside.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=other)
+    with first.stage('outer'):
+        thread.start()
+        inside.wait(5)
+        done.set()
+        thread.join()
+    with first.stage('after'):
+        pass
+    records = {r['stage']: r for r in first.report()}
+    assert records['outer']['peak_mb'] is None and records['outer']['memory'] is None
+    assert records['outer']['elapsed'] > 0
+    assert second.report()[0]['peak_mb'] is None
+    assert records['after']['memory'] == 'rss (processus)' and records['after']['peak_mb'] is not None
@@ -0,0 +1,95 @@
+import sqlite3
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from src.compare.dataframe_compare import compare_dataframes  # noqa: E402
+from src.compare.pushdown import _Source, compare_pushdown  # noqa: E402
+from src.loaders.sql_loader import load_from_sql  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, frame_pair):
+    left, right = frame_pair(seed=4)
+    path = tmp_path / 'pushdown.db'
+    with sqlite3.connect(path) as conn:
+        left.to_sql('l', conn, index=False)
+        right.to_sql('r', conn, index=False)
+    return f'sqlite:///{path}'
+
+
+@pytest.mark.parametrize('buckets, fetch_threshold', [(64, 50_000), (4, 20), (2, 1)])
+def test_matches_comparison_of_loaded_queries(db, same_differences, buckets, fetch_threshold):
+    res = compare_pushdown(db, 'SELECT * FROM l', db, 'SELECT * FROM r', keys=['id'], sample_size=1000,
+                           buckets=buckets, fetch_threshold=fetch_threshold)
+    expected = compare_dataframes(load_from_sql(db, 'SELECT * FROM l'), load_from_sql(db, 'SELECT * FROM r'),
+                                  keys=['id'], sample_size=1000)
+    same_differences(res, expected)
+    assert 0 < res['differences']['divergent_buckets']
+
+
+
+@pytest.mark.parametrize('max_depth', [0, 1, 3])
+def test_large_divergent_buckets_are_subdivided_up_to_max_depth(db, same_differences, monkeypatch, max_depth):
+    levels, fetched = [], []
+    summaries, fetch = _Source.bucket_summaries, _Source.fetch
+
+    def record_summaries(self, keys, columns, modulus, parent_modulus, parents):
+        out = summaries(self, keys, columns, modulus, parent_modulus, parents)
+        levels.append((modulus, parent_modulus, parents, out))
+        return out
+
+    def record_fetch(self, keys, modulus, buckets, as_string):
+        fetched.append((modulus, buckets))
+        return fetch(self, keys, modulus, buckets, as_string)
+    monkeypatch.setattr(_Source, 'bucket_summaries', record_summaries)
+    monkeypatch.setattr(_Source, 'fetch', record_fetch)
+    res = compare_pushdown(db, 'SELECT * FROM l', db, 'SELECT * FROM r', keys=['id'], sample_size=1000,
+                           buckets=2, fetch_threshold=1, max_depth=max_depth)
+    expected = compare_dataframes(load_from_sql(db, 'SELECT * FROM l'), load_from_sql(db, 'SELECT * FROM r'),
+                                  keys=['id'], sample_size=1000)
+    same_differences(res, expected)
+    # both sides at each level, one level per subdivision, 2 ** (depth + 1) buckets
+    moduli = [m for m, *_ in levels[::2]]
+    assert moduli == [2 ** (d + 1) for d in range(max_depth + 1)]
+    for (_, parent_m, parents, out), (prev_m, _, _, prev) in zip(levels[2::2], levels[::2]):
+        # a level only reads the rows of the previous level's large buckets
+        assert parent_m == prev_m and set(parents) <= set(prev)
+        assert all(b % parent_m in parents for b in out)
+    # only the last level fetches: every bucket above it holds more than one row
+    assert {m for m, _ in fetched} == {2 ** (max_depth + 1)}
+    assert res['differences']['divergent_buckets'] == sum(len(b) for _, b in fetched) // 2
+
+def test_identical_queries_fetch_nothing(db):
+    res = compare_pushdown(db, 'SELECT * FROM l', db, 'SELECT * FROM l', keys=['id'])
+    assert res['data_equal'] and res['differences']['divergent_buckets'] == 0
+
+
+def test_missing_key(db):
+    res = compare_pushdown(db, 'SELECT * FROM l', db, 'SELECT * FROM r', keys=['nope'])
+    assert res['differences'] == {'missing_key': 'Colonne clé manquante: nope'}
+
+
+def test_ordered_query_is_not_wrapped_with_its_order_by(db, same_differences):
+    from sqlalchemy import event
+    from src.loaders.connections import get_engine
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(get_engine(db), 'before_cursor_execute', record)
+    try:
+        res = compare_pushdown(db, 'SELECT * FROM l ORDER BY id DESC;', db, 'SELECT * FROM r\nORDER BY id -- tri\n',
+                               keys=['id'], sample_size=1000)
+    finally:
+        event.remove(get_engine(db), 'before_cursor_execute', record)
+    same_differences(res, compare_pushdown(db, 'SELECT * FROM l', db, 'SELECT * FROM r', keys=['id'], sample_size=1000))
+    assert statements and not any('ORDER BY' in s.upper() for s in statements)
+
+
+@pytest.mark.parametrize('query', ['SELECT TOP 10 * FROM l ORDER BY id',
+                                   'SELECT * FROM l ORDER BY id OFFSET 5 ROWS FETCH NEXT 5 ROWS ONLY',
+                                   'SELECT * FROM l ORDER BY id LIMIT 5'])
+def test_order_by_selecting_rows_is_rejected(db, query):
+    with pytest.raises(ValueError, match='ORDER BY'):
+        compare_pushdown(db, query, db, 'SELECT * FROM r', keys=['id'])
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+import pytest
+from src.loaders.registry import SCHEMA_ROWS, get_source, source_types
+
+
+def test_lookup_and_unknown_type():
+    assert source_types() == ['csv', 'sql', 'pytds', 'mssql']
+    sql = get_source('sql')
+    assert sql.aliases == {'conn': 'conn_str', 'query': 'sql_query'}
+    assert sql.target({'conn_str': 'sqlite://'}) == 'sqlite://'
+    assert get_source('pytds').target({'user': 'u', 'host': 'h', 'database': 'd'}) == 'u@h:1433/d'
+    with pytest.raises(ValueError, match="Type de source inconnu: xls"):
+        get_source('xls')
+
+
+def test_load_stream_and_schema_share_parameters(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_text('id;v\n' + ''.join(f'{i};{i / 2}\n' for i in range(SCHEMA_ROWS * 3)), encoding='utf-8')
+    csv = get_source('csv')
+    df = csv.load(path=str(path), sep=';')
+    chunks = list(csv.stream(path=str(path), sep=';', chunksize=SCHEMA_ROWS))
+    assert len(df) == sum(map(len, chunks)) == SCHEMA_ROWS * 3
+    assert csv.schema(path=str(path), sep=';') == {str(c): str(t) for c, t in chunks[0].dtypes.items()}
+
+
+def test_loaders_and_drivers_are_imported_on_first_use():
+    code = textwrap.dedent("""
+        import sys
+        from src.loaders.registry import get_source
+        for name in ('csv', 'sql', 'pytds', 'mssql'):
+            get_source(name).available
+        print(sorted(m for m in sys.modules if m.split('.')[0] in ('sqlalchemy', 'pytds', 'mssql_python')
+                     or m in ('src.loaders.sql_loader', 'src.loaders.sqlserver_pytds', 'src.loaders.csv_loader')))
+        get_source('csv').loader
+        print('src.loaders.csv_loader' in sys.modules, 'sqlalchemy' in sys.modules)
+    """)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).resolve().parents[1]).stdout.split('\n')
+    assert out[:2] == ['[]', 'True False']
@@ -0,0 +1,63 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.normalize import apply_smart_string, smart_str
+
+
+def _cell_by_cell(df):
+    """apply_smart_string as first written: smart_str on every cell."""
+    out = df.map(smart_str).astype('string')
+    return out.apply(lambda col: col.str.strip())
+
+
+COLUMNS = {
+    'int64': pd.Series([0, -7, 123456789012], dtype='int64'),
+    'uint8': pd.Series([0, 7, 255], dtype='uint8'),
+    'Int64': pd.array([1, None, -3], dtype='Int64'),
+    'float64': [1.0, 20.5, np.nan],
+    'float_small_large': [1e-7, 123456789.125, -0.0],
+    'float_inf': [np.inf, -np.inf, 2.50],
+    'float32': pd.Series([1.5, 2.0, np.nan], dtype='float32'),
+    'Float64': pd.array([0.1, None, 3.0], dtype='Float64'),
+    'bool': [True, False, True],
+    'boolean': pd.array([True, None, False], dtype='boolean'),
+    'datetime': pd.Series([pd.Timestamp('2024-01-01'), pd.NaT, pd.Timestamp('2024-03-01 12:30:00.000001')]),
+    'datetime_ns': pd.Series([pd.Timestamp('2024-01-01 00:00:00.000000001'), pd.Timestamp(0), pd.NaT]),
+    'datetime_tz': pd.Series([pd.Timestamp('2024-01-01 10:00', tz='Europe/Paris'), pd.NaT,
+                              pd.Timestamp('2024-06-01', tz='Europe/Paris')]),
+    'timedelta': pd.to_timedelta(['1 day', None, '2 hours']),
+    'object_text': ['007', ' a ', None],
+    'string': pd.array([' 007', 'b ', None], dtype='string'),
+    'object_mixed': [1, '1.0', 2.5],
+    'object_dates': [datetime.date(2024, 1, 1), None, datetime.datetime(2024, 1, 2, 3, 4)],
+    'category': pd.Categorical(['x ', None, 'y']),
+    'empty_text': pd.Series([None, None, None], dtype=object),
+}
+
+
+@pytest.mark.parametrize('name', list(COLUMNS))
+def test_column_matches_cell_by_cell(name):
+    df = pd.DataFrame({name: COLUMNS[name]})
+    pd.testing.assert_frame_equal(apply_smart_string(df), _cell_by_cell(df))
+
+
+def test_arrow_columns_match_cell_by_cell():
+    pa = pytest.importorskip('pyarrow')
+    df = pd.DataFrame({
+        'ts': pd.arrays.ArrowExtensionArray(pa.array([datetime.datetime(2024, 1, 1, 5), None], pa.timestamp('us'))),
+        'far': pd.arrays.ArrowExtensionArray(pa.array([datetime.datetime(2500, 1, 1), None], pa.timestamp('us'))),
+        'day': pd.arrays.ArrowExtensionArray(pa.array([datetime.date(2024, 1, 1), None])),
+        'i': pd.arrays.ArrowExtensionArray(pa.array([1, None], pa.int32())),
+        'f': pd.arrays.ArrowExtensionArray(pa.array([1.0, 2.25])),
+        's': pd.arrays.ArrowExtensionArray(pa.array([' x', None])),
+    })
+    pd.testing.assert_frame_equal(apply_smart_string(df), _cell_by_cell(df))
+
+
+def test_whole_frame_keeps_index_and_column_names(frame_pair):
+    left, _ = frame_pair()
+    left = left.set_axis(left.index * 3)
+    left.columns = ['id', 'amount', 'qty', 'id', 'mixed', 'day']  # duplicated name
+    pd.testing.assert_frame_equal(apply_smart_string(left), _cell_by_cell(left))
+    assert apply_smart_string(left.iloc[:0]).empty
@@ -0,0 +1,52 @@
+import sqlite3
+import threading
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from src.loaders.registry import get_source  # noqa: E402
+from src.loaders.sql_loader import DEFAULT_CHUNKSIZE, load_from_sql  # noqa: E402
+from src.utils.jobs import JobRegistry  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / 'load.db'
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE t (id INTEGER, v TEXT)')
+        conn.executemany('INSERT INTO t VALUES (?, ?)', [(i, f'v{i}') for i in range(25)])
+    return f'sqlite:///{path}'
+
+
+def test_load_reports_progress_per_chunk(db):
+    events = []
+    df = load_from_sql(db, 'SELECT * FROM t', chunksize=10, on_progress=events.append)
+    assert df['id'].tolist() == [str(i) for i in range(25)]
+    assert [e['rows'] for e in events if not e.get('done')] == [10, 20, 25]
+    whole = load_from_sql(db, 'SELECT * FROM t', chunksize=None)
+    assert whole.equals(df)
+
+
+def test_app_load_is_cancelled_between_chunks(tmp_path):
+    # the app's load (registry entry, default parameters) in a job: its
+    # progress events, hence cancellation points, come once per chunk
+    path = tmp_path / 'big.db'
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE t (id INTEGER)')
+        conn.executemany('INSERT INTO t VALUES (?)', ((i,) for i in range(2 * DEFAULT_CHUNKSIZE + 1)))
+    registry = JobRegistry()
+    seen = []
+
+    def work(progress):
+        def on_progress(event):
+            seen.append(event.get('rows'))
+            if len(seen) == 1:
+                registry.jobs(owner='alice')[0].cancel()
+            progress(event)
+        return get_source('sql').load(conn_str=f'sqlite:///{path}', sql_query='SELECT * FROM t',
+                                      on_progress=on_progress)
+
+    job = registry.submit('Chargement A', work, owner='alice')
+    while not job.done:
+        threading.Event().wait(0.01)
+    assert job.state == 'cancelled' and seen == [DEFAULT_CHUNKSIZE]
@@ -0,0 +1,27 @@
+import pandas as pd
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.stream_compare import compare_sorted_streams
+
+
+def _chunks(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def test_matches_in_memory_comparison():
+    left = pd.DataFrame({'id': range(10), 'v': [str(i) for i in range(10)]})
+    right = left[left['id'] != 3].copy()
+    right.loc[right['id'] == 7, 'v'] = 'x'
+    right = pd.concat([right, pd.DataFrame({'id': [10], 'v': ['10']})], ignore_index=True)
+    res = compare_sorted_streams(_chunks(left, 3), _chunks(right, 4), keys=['id'])
+    expected = compare_dataframes(left, right, keys=['id'])
+    for name in ('left_only_keys_count', 'right_only_keys_count', 'mismatched_rows_count'):
+        assert res['differences'][name] == expected['differences'][name]
+    assert res['left_count'] == 10 and res['right_count'] == 10 and not res['data_equal']
+
+
+def test_missing_key_column_gives_missing_key_result():
+    left = pd.DataFrame({'id': [1, 2], 'v': ['a', 'b']})
+    right = pd.DataFrame({'ident': [1, 2, 3], 'v': ['a', 'b', 'c']})
+    res = compare_sorted_streams(_chunks(left, 1), _chunks(right, 2), keys=['id'])
+    assert res == compare_dataframes(left, right, keys=['id'])
+    assert res['differences'] == {'missing_key': 'Colonne clé manquante: id'}
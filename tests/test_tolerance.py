@@ -0,0 +1,84 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.compare.dataframe_compare import compare_dataframes
+from src.compare.tolerance import Tolerance, as_tolerance
+
+# (left, right, tolerance, equal): exact binary fractions so that |a - b| == abs_tol holds
+CASES = [
+    (1.0, 1.25, {'abs': 0.25}, True),           # abs == tol
+    (1.0, 1.5, {'abs': 0.25}, False),
+    (-1.0, -0.75, {'abs': 0.25}, True),
+    (0.0, 0.0, {'rel': 0.1}, True),             # rel with a zero reference
+    (0.0, 1e-300, {'rel': 0.1}, False),
+    (1e-300, 0.0, {'rel': 0.1}, False),
+    (0.0, 1e-300, {'abs': 1e-300, 'rel': 0.1}, True),
+    (100.0, 110.0, {'rel': 0.1}, True),         # rel * max(|a|, |b|) == |a - b|
+    (100.0, 112.0, {'rel': 0.1}, False),
+    (-0.0, 0.0, {'abs': 0.0}, True),
+    (np.nan, np.nan, {'abs': 1.0}, True),
+    (np.nan, 1.0, {'abs': 1.0}, False),
+    (np.inf, np.inf, {'rel': 0.5}, True),
+    (np.inf, -np.inf, {'abs': 1.0}, False),
+    (5.0, 5.0, {'abs': 0.0, 'rel': 0.0}, True),
+]
+
+
+def _close(a, b, tol: Tolerance) -> bool:
+    """Reference definition, one pair of Python floats at a time."""
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    if a == b:
+        return True
+    return abs(a - b) <= max(tol.abs_tol, tol.rel_tol * max(abs(a), abs(b)))
+
+
+@pytest.mark.parametrize('a, b, tol, equal', CASES)
+def test_reference_cases(a, b, tol, equal):
+    assert _close(a, b, as_tolerance(tol)) == equal
+    assert bool(as_tolerance(tol).close([a], [b])[0]) == equal
+
+
+def _frames(as_text: bool):
+    n = len(CASES)
+    left = pd.DataFrame({'id': range(n), 'x': [c[0] for c in CASES], 'y': ['a'] * n})
+    right = pd.DataFrame({'id': range(n), 'x': [c[1] for c in CASES], 'y': ['a'] * n})
+    if as_text:  # all-string frames of the loaders
+        left, right = (df.astype(str).replace('nan', '') for df in (left, right))
+    return left, right
+
+
+@pytest.mark.parametrize('as_text', [False, True])
+def test_per_row_tolerances_keyed(as_text):
+    for i, (a, b, tol, equal) in enumerate(CASES):
+        left, right = _frames(as_text)
+        left, right = left.iloc[[i]], right.iloc[[i]]
+        res = compare_dataframes(left, right, keys=['id'], column_tolerances={'x': tol})
+        assert res['differences']['mismatched_rows_count'] == (0 if equal else 1), (a, b, tol)
+        keyless = compare_dataframes(left, right, column_tolerances={'x': tol})
+        assert keyless['differences']['only_in_left_count'] == (0 if equal else 1), (a, b, tol)
+
+
+def test_whole_column_matches_reference():
+    left, right = _frames(False)
+    tol = {'abs': 0.25, 'rel': 0.1}
+    expected = sum(not _close(a, b, as_tolerance(tol)) for a, b, _, _ in CASES)
+    res = compare_dataframes(left, right, keys=['id'], tolerance=tol)
+    assert res['differences']['mismatched_rows_count'] == expected
+    keyless = compare_dataframes(left, right, column_tolerances={'x': tol})
+    assert keyless['differences']['only_in_left_count'] == expected
+    identical = sum(a == b or (math.isnan(a) and math.isnan(b)) for a, b, _, _ in CASES)
+    assert keyless['differences']['matched_within_tolerance'] == len(CASES) - expected - identical
+
+
+@pytest.mark.parametrize('keys', [['id'], None])
+def test_zero_tolerance_matches_exact_path(frame_pair, same_differences, keys):
+    """With float_tol small enough not to round anything, a zero tolerance
+    reports what the exact path reports."""
+    left, right = frame_pair()
+    exact = compare_dataframes(left, right, keys=keys, sample_size=1000, float_tol=1e-20)
+    tolerant = compare_dataframes(left, right, keys=keys, sample_size=1000, float_tol=1e-20,
+                                  column_tolerances={'amount': 0.0})
+    tolerant['differences'].pop('matched_within_tolerance', None)
+    same_differences(tolerant, exact)